@@ -9,4 +9,89 @@ WIDTH = 800    # 遊戲視窗寬度（像素）
 HEIGHT = 600   # 遊戲視窗高度（像素）
 
 # 遊戲幀率設定
-FPS = 60      # 每秒幀數，控制遊戲運行的流暢度
+FPS = 60      # 畫面更新的目標幀率（FRAME_PACING 是 'target' 時使用），和物理步長無關
+FRAME_PACING = 'target'    # 'target' 照 FPS 限速，'vsync' 跟著螢幕更新率，'uncapped' 不限速
+BUSY_LOOP_PACING = False   # True 用 clock.tick_busy_loop 忙碌等待，幀與幀的間隔更穩定，但會吃滿一個核心
+INTERPOLATE = True         # 畫面畫在上一步和這一步之間的內插位置，幀率和物理步數對不齊時動作也平順
+
+# 物理模擬設定
+PHYSICS_HZ = 60        # 每秒固定跑幾步物理，不管畫面幀率是 30、60 還是 240，遊戲結果都一樣
+FIXED_DT = 1.0 / PHYSICS_HZ   # 每一步物理模擬固定前進的時間（秒）
+MAX_FRAME_STEPS = 5    # 畫面卡住時，一幀最多補跑幾步物理，避免越補越慢
+THREADED_SIMULATION = False   # True 讓模擬在背景執行緒照固定步調跑，畫圖再慢也不會拖到物理
+
+# 關卡設定
+LEVEL_PATH = 'levels/classic.json'   # 遊戲啟動時載入的關卡檔（相對於專案根目錄），None 表示用內建的磚塊牆
+
+# 捲動關卡設定（關卡比視窗高時，鏡頭跟著清掉的磚塊往上捲）
+CHUNK_HEIGHT = 128         # 關卡切成一條一條的區塊，每條的高度（像素）
+CHUNK_MARGIN = 1           # 畫面上下各多模擬幾條區塊
+CHUNK_KEEP = 4             # 離畫面超過幾條區塊就釋放磚塊物件，回到附近時再從關卡檔建回來
+SCROLL_WALL_BOTTOM = 200   # 捲動時讓最下面還在的磚塊停在畫面的這個高度
+SCROLL_SPEED = 120         # 鏡頭捲動的速度（像素/秒）
+
+# 多球模式設定
+MULTIBALL_COUNT = 0    # 除了主球以外額外加入的球數，0 表示關閉多球模式
+
+# 碰撞設定
+COLLISION_MODE = 'point'   # 'point' 只檢查球心（原本的方式），'swept' 沿著移動路線找碰撞點，高速也不會穿牆
+
+# 繪圖設定
+RENDER_MODE = 'full'       # 'full' 每幀更新整個畫面，'dirty' 只更新有變動的矩形（軟體繪圖的電腦比較快）
+DIRTY_RECT_LIMIT = 200     # 變動的矩形超過這個數量就直接更新整個畫面，矩形太多反而比較慢
+SPRITE_CACHE_SIZE = 256    # 縮放後圖片快取最多保留幾張，超過時丟掉最久沒用的
+TORNADO_ROTATION_STEPS = 36   # 龍捲風預先畫好幾張旋轉畫面（36 張就是每 10 度一張）
+
+# 畫面品質設定
+# 由好到差排列的畫面品質等級：{名稱: {設定: 值}}，電腦跟不上時一級一級往下降，只影響畫面，不影響遊戲結果
+#   tornado_layer_spacing: 龍捲風每隔幾像素畫一層橢圓（越大層數越少）
+#   balloon_draw_cap: 最多畫幾個慶祝氣球，None 表示全部畫（模擬裡的氣球數量不變）
+#   balloon_highlight: 氣球要不要畫高光
+#   smooth_scale: 球的圖片用 smoothscale（True，比較平滑）還是 scale（False，比較快）縮放
+# 沒有「降低內部解析度」這一項：軟體繪圖時把小畫布放大回視窗要一次整頁的成本（800x600 約 0.3 ms），
+# 比所有物件加起來的繪圖時間（畫面上再多東西也不到 0.1 ms）還多，實測每一級都只會變慢
+QUALITY_PRESETS = {
+    'high':    {'tornado_layer_spacing': 8,  'balloon_draw_cap': None, 'balloon_highlight': True, 'smooth_scale': True},
+    'medium':  {'tornado_layer_spacing': 12, 'balloon_draw_cap': 20,   'balloon_highlight': True, 'smooth_scale': False},
+    'low':     {'tornado_layer_spacing': 16, 'balloon_draw_cap': 12,   'balloon_highlight': False, 'smooth_scale': False},
+    'minimum': {'tornado_layer_spacing': 24, 'balloon_draw_cap': 6,    'balloon_highlight': False, 'smooth_scale': False},
+}
+QUALITY_LEVEL = 'high'         # 一開始用哪個畫面品質等級
+ADAPTIVE_QUALITY = True        # 依照實際量到的每幀耗時自動調整畫面品質
+QUALITY_WINDOW = 120           # 自動調整時看最近幾幀的耗時（約 2 秒），換等級後要重新收集滿才會再判斷
+QUALITY_CHECK_INTERVAL = 30    # 每隔幾幀判斷一次要不要換等級
+QUALITY_DOWNGRADE_RATIO = 0.9  # 耗時 p95 超過一幀預算（1000 / FPS 毫秒）的這個比例就降一級
+QUALITY_UPGRADE_RATIO = 0.5    # 耗時 p95 一直低於一幀預算的這個比例，才會升一級（和降級的比例分開，避免來回跳）
+QUALITY_UPGRADE_FRAMES = 300   # 要連續這麼多幀都夠快才升一級（約 5 秒）；升級後馬上又降級的話，下次要等的幀數加倍
+
+# 物件池設定
+TORNADO_POOL_CAPACITY = 16  # 龍捲風物件池一開始預先建立幾個（不夠時會自動加，之後一直回收再利用）
+
+# 勝利慶祝設定
+BALLOON_CAP = 30           # 畫面上最多同時有幾個慶祝氣球
+
+# 資源設定
+# 遊戲啟動時預先載入的圖片：{名稱: [候選路徑, ...]}，依序嘗試，第一個成功的就用它
+# 路徑都是相對於專案根目錄，不受執行時所在的資料夾影響
+ASSET_MANIFEST = {
+    'ball': ['assets/images/ball/ball.png', 'image/41QWjX05doL.png'],
+}
+ASSET_ATLAS_INDEX = 'assets/atlas.json'   # 打包好的圖集索引檔，存在時優先從圖集載入
+
+# 效能分析設定
+PROFILE_WINDOW = 300       # 分段計時保留最近幾幀來算 p50/p95/p99（約 5 秒）
+SAMPLE_PROFILE_HZ = 100    # 取樣分析器每秒看幾次呼叫堆疊（越高越準，額外成本也越高）
+SAMPLE_PROFILE_MAX_DEPTH = 64   # 每次取樣最多記錄幾層呼叫
+SAMPLE_PROFILE_SWITCH_INTERVAL = 0.0001   # 取樣期間把執行緒切換間隔調短（秒），取樣才不會都擠在釋放 GIL 的地方；None 表示不調整
+SAMPLE_PROFILE_DIR = 'profiles'  # 按 F4 停止取樣時，堆疊檔存放的資料夾
+ALLOC_SNAPSHOT_INTERVAL = 600   # 記憶體配置追蹤每隔幾幀拍一次快照，找出淨增加最多的程式位置
+ALLOC_TRACE_DEPTH = 1           # tracemalloc 每次配置記幾層呼叫位置（越多越慢）
+ALLOC_BUDGET_BYTES_PER_FRAME = 16      # 耐久測試：穩定狀態平均每幀淨增加超過這麼多位元組就算失敗（有東西越積越多）
+ALLOC_BUDGET_PEAK_BYTES = 64 * 1024    # 耐久測試：每幀暫時用掉的記憶體 p99 超過這麼多位元組就算失敗
+
+# 錄製重播設定
+REPLAY_CHECKPOINT_INTERVAL = 60   # 錄製時每隔幾步記一次狀態雜湊值，重播時拿來比對
+
+# 快速存檔和倒轉設定
+REWIND_MAX_STEPS = 600            # 最多可以倒轉幾步（600 步約 10 秒）
+REWIND_MAX_BYTES = 16 * 1024 * 1024   # 倒轉記錄最多佔多少記憶體（位元組），超過時丟掉最舊的
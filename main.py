@@ -9,7 +9,16 @@ Breaking the Block - 打磚塊遊戲主程式
 - 勝利氣球慶祝效果
 
 執行方式：python main.py
+效能分析：python main.py --profile --profile-csv frames.csv
+取樣分析：python main.py --sample-profile session.folded（遊戲中按 F4 開始 / 停止，結果可以畫成火焰圖）
+記憶體配置：python main.py --track-alloc（遊戲中按 F6 開始 / 停止；耐久測試用 tools/soak_test.py）
+畫面品質：python main.py --quality low --no-adaptive-quality（預設會依照每幀耗時自動調整，遊戲中按 F7 切換）
+錄製輸入：python main.py --seed 42 --record game.btbr（之後用 tools/replay.py 重播）
+指定關卡：python main.py --level levels/classic.json（關卡檔用 tools/level_tool.py 轉換和檢查）
+畫面節奏：python main.py --fps 144 --busy-loop 或 python main.py --pacing vsync（物理固定每秒 PHYSICS_HZ 步）
 """
+import argparse
+import os
 import sys
 
 
@@ -25,8 +34,47 @@ def main():
     
     使用動態匯入的好處：\n
     - 避免某些 IDE 或執行環境的匯入路徑問題\n
-    - 確保在執行時才載入遊戲引擎，提供更好的錯誤處理
+    - 確保在執行時才載入遊戲引擎，提供更好的錯誤處理\n
+    
+    命令列參數：\n
+    --profile: 一開始就顯示每幀分段計時（遊戲中按 F3 切換）\n
+    --profile-csv 檔案: 把每幀分段耗時寫到 CSV 檔\n
+    --seed 數字: 固定亂數種子\n
+    --record 檔案: 錄下這局的種子和每一步的輸入\n
+    --level 檔案: 載入指定的關卡檔（.json 或 .btbl）\n
+    --fps 數字: 畫面的目標幀率（只影響畫幾次，不影響遊戲結果）\n
+    --pacing 模式: target（照 --fps 限速）、vsync（跟螢幕更新率）或 uncapped（不限速）\n
+    --busy-loop: 用忙碌等待控制幀率，幀間隔比較穩定\n
+    --no-interpolate: 關閉畫面內插，直接畫最新一步的位置\n
+    --threaded: 模擬在背景執行緒跑，主執行緒只負責輸入和畫圖\n
+    --sample-profile 檔案: 一開始就用取樣分析器分析，結束時把呼叫堆疊寫到這個檔案（collapsed stack 格式）\n
+    --sample-hz 數字: 取樣分析器每秒取樣幾次\n
+    --track-alloc: 追蹤每幀的記憶體配置，結束時印出報告（會變慢）\n
+    --quality 名稱: 一開始的畫面品質等級（high、medium、low、minimum）\n
+    --no-adaptive-quality: 固定在 --quality 的等級，不依照每幀耗時自動調整
     """
+    parser = argparse.ArgumentParser(description='Breaking the Block 打磚塊遊戲')
+    parser.add_argument('--profile', action='store_true', help='顯示每幀分段計時（F3 切換）')
+    parser.add_argument('--profile-csv', metavar='PATH', default=None, help='把每幀分段耗時寫到 CSV 檔')
+    parser.add_argument('--seed', type=int, default=None, help='固定亂數種子（重現同樣的龍捲風和氣球）')
+    parser.add_argument('--record', metavar='PATH', default=None, help='錄下這局的種子和每一步的輸入')
+    parser.add_argument('--level', metavar='PATH', default=None, help='載入指定的關卡檔（.json 或 .btbl）')
+    parser.add_argument('--fps', type=int, default=None, help='畫面的目標幀率（物理步數固定，不受影響）')
+    parser.add_argument('--pacing', choices=('target', 'vsync', 'uncapped'), default=None,
+                        help='畫面節奏：照目標幀率、垂直同步或不限速')
+    parser.add_argument('--busy-loop', action='store_true', help='用忙碌等待控制幀率（幀間隔比較穩定，但會吃滿一個核心）')
+    parser.add_argument('--no-interpolate', action='store_true', help='關閉畫面內插')
+    parser.add_argument('--threaded', action='store_true', help='模擬在背景執行緒照固定步調跑（畫圖慢也不影響物理）')
+    parser.add_argument('--sample-profile', metavar='PATH', default=None,
+                        help='一開始就取樣分析，結束時把呼叫堆疊寫到這個檔案（F4 切換）')
+    parser.add_argument('--sample-hz', type=float, default=None, help='取樣分析器每秒取樣幾次')
+    parser.add_argument('--track-alloc', action='store_true', help='追蹤每幀的記憶體配置，結束時印出報告（F6 切換）')
+    parser.add_argument('--quality', metavar='NAME', default=None,
+                        help='一開始的畫面品質等級（settings.QUALITY_PRESETS 的名稱，例如 high、low）')
+    parser.add_argument('--no-adaptive-quality', action='store_true',
+                        help='固定畫面品質，不依照每幀耗時自動調整（F7 切換）')
+    args = parser.parse_args()
+
     try:
         # 動態匯入遊戲引擎類別
         # 這樣做可以避免在某些環境下的路徑問題
@@ -36,7 +84,32 @@ def main():
         raise RuntimeError("無法匯入 GameEngine，請確認專案根目錄已在 PYTHONPATH，或使用 `python main.py` 從專案根目錄執行。") from e
 
     # 建立遊戲引擎實例並開始遊戲
-    engine = GameEngine()
+    # 命令列給的關卡路徑以目前所在的資料夾為準，沒給就用設定檔的關卡
+    kwargs = {}
+    if args.level is not None:
+        kwargs['level_path'] = os.path.abspath(args.level)
+    if args.fps is not None:
+        kwargs['fps'] = args.fps
+    if args.pacing is not None:
+        kwargs['pacing'] = args.pacing
+    if args.busy_loop:
+        kwargs['busy_loop'] = True
+    if args.no_interpolate:
+        kwargs['interpolate'] = False
+    if args.threaded:
+        kwargs['threaded'] = True
+    if args.sample_profile is not None:
+        kwargs['sample_profile'] = args.sample_profile
+    if args.sample_hz is not None:
+        kwargs['sample_hz'] = args.sample_hz
+    if args.track_alloc:
+        kwargs['track_alloc'] = True
+    if args.quality is not None:
+        kwargs['quality'] = args.quality
+    if args.no_adaptive_quality:
+        kwargs['adaptive_quality'] = False
+    engine = GameEngine(profile=args.profile, profile_csv=args.profile_csv,
+                        seed=args.seed, record_path=args.record, **kwargs)
     engine.run()
 
 
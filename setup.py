@@ -21,6 +21,7 @@ setup(
     packages=find_packages(exclude=("tests", "docs")),
     install_requires=[
         "pygame>=2.0.0",
+        "numpy>=1.20",
     ],
     author="",
     description="A simple breakout-style game built with pygame",
@@ -4,9 +4,12 @@
 包含所有遊戲物件的類別定義：\n
 - Ball: 彈跳球，玩家操控的主要物件\n
 - Brick: 磚塊，需要被球擊中消除的目標\n
+- BrickStore: 整面磚塊牆的緊湊陣列倉庫（位元陣列記錄擊中狀態）\n
 - Paddle: 底板，玩家用滑鼠控制的反彈板\n
 - Tornado: 龍捲風，移動的障礙物\n
 - Balloon: 氣球，勝利時的慶祝效果\n
+- BalloonEmitter: 用陣列管理大量慶祝氣球的粒子發射器\n
+- EntityRegistry / EntityPool: 物件池，消失的物件回收再利用，用整數 handle 找回物件\n
 
 所有實體都具有基本的 draw() 和 update() 方法\n
 """
\ No newline at end of file
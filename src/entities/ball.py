@@ -1,6 +1,8 @@
 ######################載入套件######################
 import math
 import pygame
+from src.physics.swept import sweep_ball
+from src.rendering.sprite_cache import sprite_cache
 
 
 ######################物件類別######################
@@ -15,8 +17,12 @@ class Ball:
     velocity_x, velocity_y: 速度向量（浮點數）\n
     speed: 球的移動速度（浮點數）\n
     is_launched: 是否已發射（布林值）\n
-    image: 球的圖片物件（可選）
+    image: 球的圖片物件（可選）\n
+    collision_mode: 碰撞方式，'point' 只檢查球心，'swept' 沿著移動路線找碰撞點
     """
+    __slots__ = ('color', 'size', 'x', 'y', 'velocity_x', 'velocity_y', 'speed', 'is_launched', 'image',
+                 'collision_mode')
+
     def __init__(self, color, size, init_x, init_y, speed=5, is_launched=False):
         """
         初始化球物件\n
@@ -46,6 +52,8 @@ class Ball:
         self.is_launched = bool(is_launched)
         # 可選的 pygame 圖片物件用於繪製球
         self.image = None
+        # 碰撞方式：'point' 是原本的球心檢查，'swept' 是不會穿牆的掃掠碰撞
+        self.collision_mode = 'point'
 
     @property
     def radius(self):
@@ -55,24 +63,35 @@ class Ball:
         """
         return self.size // 2
 
-    def draw(self, screen):
+    def draw(self, screen, camera_y=0, smooth=True):
         """
         繪製球的方法\n
         \n
         參數:\n
         screen (pygame.Surface): pygame 螢幕物件\n
+        camera_y (int): 鏡頭的 y 座標，捲動關卡用（預設 0）\n
+        smooth (bool): 圖片用 smoothscale（比較平滑）還是 scale（比較快）縮放，畫面品質降低時用 False\n
         \n
         繪製邏輯:\n
-        - 如果有設定圖片，則繪製圖片並縮放到球的大小\n
+        - 如果有設定圖片，則繪製縮放到球大小的圖片（縮放結果有快取，不會每幀重算）\n
         - 如果沒有圖片，則繪製純色圓形\n
         - 繪製位置以球心座標為準
         """
         if self.image:
-            # 如果需要的話將圖片縮放到球的大小
-            img = pygame.transform.smoothscale(self.image, (self.size, self.size))
-            screen.blit(img, (int(self.x - self.radius), int(self.y - self.radius)))
+            # 從共用快取拿縮放到球大小的圖片，同樣大小只會縮放一次
+            img = sprite_cache.get_scaled(self.image, (self.size, self.size), smooth)
+            screen.blit(img, (int(self.x - self.radius), int(self.y - camera_y - self.radius)))
         else:
-            pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
+            pygame.draw.circle(screen, self.color, (int(self.x), int(self.y - camera_y)), self.radius)
+
+    def get_rect(self, camera_y=0):
+        """
+        取得球在畫面上佔用的矩形範圍（多留 1 像素邊，確保畫出來的圓整個被包住）\n
+        camera_y: 鏡頭的 y 座標，畫在畫面上的位置是 y - camera_y（捲動關卡用，預設 0）\n
+        返回值：pygame.Rect 物件
+        """
+        return pygame.Rect(int(self.x) - self.radius - 1, int(self.y - camera_y) - self.radius - 1,
+                           self.size + 3, self.size + 3)
 
     def launch(self, angle=None):
         """
@@ -115,7 +134,7 @@ class Ball:
         self.velocity_y = 0.0
         self.is_launched = False
 
-    def update(self, dt, width, height, paddle, bricks):
+    def update(self, dt, width, height, paddle, bricks, brick_grid=None, top=0.0):
         """
         更新球的位置並處理碰撞檢測\n
         \n
@@ -125,6 +144,8 @@ class Ball:
         height (int): 螢幕高度，範圍 > 0\n
         paddle (Paddle): 底板物件，包含位置和尺寸資訊\n
         bricks (list): 磚塊陣列，包含所有未被擊中的磚塊\n
+        brick_grid (SpatialGrid): 磚塊的空間索引（可選），有的話只檢查球心附近的磚塊\n
+        top (float): 場地上緣的 y 座標，捲動關卡是鏡頭的位置；場地範圍是 top 到 top + height\n
         \n
         更新邏輯:\n
         1. 如果未發射，球會跟隨底板移動\n
@@ -139,6 +160,32 @@ class Ball:
             self.y = paddle.y - self.radius - 1
             return
 
+        if self.collision_mode == 'swept':
+            # 掃掠碰撞：沿著移動路線找出碰撞點，球跑再快也不會穿過磚塊和底板
+            sweep_ball(self, dt, width, paddle, bricks, brick_grid, top)
+        else:
+            self.move_and_collide(dt, width, paddle, bricks, brick_grid, top)
+
+        # 如果球掉到螢幕底部，重置到底板上
+        if self.y - self.radius > top + height:
+            # 將球放回底板中央上方並標記為未發射
+            self.reset_to(paddle.x + paddle.length / 2, paddle.y - self.radius - 1)
+
+    def move_and_collide(self, dt, width, paddle, bricks, brick_grid=None, top=0.0):
+        """
+        原本的碰撞方式：先移動，再檢查球心有沒有碰到東西\n
+        \n
+        參數:\n
+        dt (float): 距離上一幀的時間差（秒）\n
+        width (int): 螢幕寬度，範圍 > 0\n
+        paddle (Paddle): 底板物件\n
+        bricks (list): 磚塊陣列\n
+        brick_grid (SpatialGrid): 磚塊的空間索引（可選）\n
+        top (float): 天花板的 y 座標\n
+        \n
+        注意:\n
+        - 球一步走得比磚塊還厚時可能直接穿過去，需要時請改用 'swept' 模式
+        """
         # 更新球的位置（使用時間差進行幀率無關的移動）
         self.x += self.velocity_x * dt * 60.0  # 縮放到與幀率無關（大約值）
         self.y += self.velocity_y * dt * 60.0
@@ -154,9 +201,9 @@ class Ball:
             self.velocity_x = -self.velocity_x
 
         # 天花板碰撞檢測
-        if self.y - self.radius <= 0:
+        if self.y - self.radius <= top:
             # 撞到天花板，限制位置並反彈
-            self.y = self.radius
+            self.y = top + self.radius
             self.velocity_y = -self.velocity_y
 
         # 底板碰撞檢測（簡單版本）
@@ -174,7 +221,9 @@ class Ball:
             self.velocity_x += relative_hit * 2.5
 
         # 磚塊碰撞檢測：如果球心在磚塊內，標記磚塊被擊中並反彈
-        for brick in bricks:
+        # 有空間索引時只需要檢查球心所在那一格的磚塊，牆再大也一樣快
+        candidates = bricks if brick_grid is None else brick_grid.query_point(self.x, self.y)
+        for brick in candidates:
             if not brick.is_hit:
                 if brick.check_collision(self.x, self.y):
                     # 簡單反應：反轉 y 方向速度
@@ -183,8 +232,3 @@ class Ball:
                     self.velocity_x *= 1.02
                     self.velocity_y *= 1.02
                     break
-
-        # 如果球掉到螢幕底部，重置到底板上
-        if self.y - self.radius > height:
-            # 將球放回底板中央上方並標記為未發射
-            self.reset_to(paddle.x + paddle.length / 2, paddle.y - self.radius - 1)
@@ -10,38 +10,42 @@ class Balloon:
     氣球類別：用於慶祝遊戲勝利\n
     具有上升和左右搖擺的動畫效果
     """
-    def __init__(self, x, y, color, size=20):
+    __slots__ = ('x', 'y', 'original_y', 'color', 'size', 'speed', 'amplitude', 'frequency', 'time')
+
+    def __init__(self, x, y, color, size=20, rng=random):
         """
         初始化氣球\n
         x, y: 氣球的初始座標\n
         color: 氣球的顏色\n
-        size: 氣球的大小
+        size: 氣球的大小\n
+        rng: 亂數來源（有 uniform 方法），預設使用 random 模組
         """
         self.x = x
         self.y = y
         self.original_y = y
         self.color = color
         self.size = size
-        self.speed = random.uniform(1, 3)
-        self.amplitude = random.uniform(10, 30)  # 左右搖擺幅度
-        self.frequency = random.uniform(0.02, 0.05)  # 搖擺頻率
+        self.speed = rng.uniform(1, 3)
+        self.amplitude = rng.uniform(10, 30)  # 左右搖擺幅度
+        self.frequency = rng.uniform(0.02, 0.05)  # 搖擺頻率
         self.time = 0
         
     def update(self, dt):
         """
         更新氣球位置\n
-        dt: 時間增量
+        dt: 時間增量（秒），速度以 60 FPS 的每幀移動量為單位
         """
         self.time += dt
         # 向上飄浮
-        self.y -= self.speed
+        self.y -= self.speed * dt * 60.0
         # 左右搖擺
         self.x = self.x + math.sin(self.time * self.frequency * 100) * self.amplitude * dt
         
-    def draw(self, screen):
+    def draw(self, screen, highlight=True):
         """
         繪製氣球\n
-        screen: pygame 螢幕物件
+        screen: pygame 螢幕物件\n
+        highlight: 要不要畫高光（畫面品質降低時省掉）
         """
         # 畫氣球本體（橢圓形）
         balloon_rect = (int(self.x - self.size//2), int(self.y - self.size), self.size, int(self.size * 1.2))
@@ -53,11 +57,20 @@ class Balloon:
         pygame.draw.line(screen, (100, 100, 100), string_start, string_end, 2)
         
         # 氣球上的高光
-        highlight_x = int(self.x - self.size//4)
-        highlight_y = int(self.y - self.size//2)
-        highlight_size = max(3, self.size//4)
-        pygame.draw.circle(screen, (255, 255, 255), (highlight_x, highlight_y), highlight_size)
+        if highlight:
+            highlight_x = int(self.x - self.size//4)
+            highlight_y = int(self.y - self.size//2)
+            highlight_size = max(3, self.size//4)
+            pygame.draw.circle(screen, (255, 255, 255), (highlight_x, highlight_y), highlight_size)
     
+    def get_rect(self):
+        """
+        取得氣球（含繩子）在畫面上佔用的矩形範圍\n
+        返回值：pygame.Rect 物件
+        """
+        return pygame.Rect(int(self.x - self.size // 2) - 1, int(self.y - self.size) - 1,
+                           self.size + 3, self.size * 2 + 3)
+
     def is_off_screen(self):
         """
         檢查氣球是否已經飄出螢幕\n
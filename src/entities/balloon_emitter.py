@@ -0,0 +1,257 @@
+######################載入套件######################
+"""
+氣球粒子發射器模組
+把所有慶祝氣球的狀態放在幾個 NumPy 陣列裡（每種屬性一個陣列）
+一次算完所有氣球的上升和搖擺，飄出畫面的氣球用「拿最後一個補洞」的方式移除
+每種顏色和大小的氣球只畫一次小圖，之後每幀直接貼圖
+"""
+import random
+import numpy as np
+import pygame
+
+
+######################物件類別######################
+class BalloonEmitter:
+    """
+    慶祝氣球的粒子發射器\n
+    \n
+    屬性說明：\n
+    count: 目前有幾個氣球（整數）\n
+    x, y: 氣球座標陣列（繩子頂端，和 Balloon 一樣）\n
+    speed: 每幀上升的像素\n
+    amplitude, frequency: 左右搖擺的幅度和頻率\n
+    time: 每個氣球已經飄了多久（秒）\n
+    size: 氣球大小\n
+    color_index: 顏色在 colors 列表裡的編號\n
+    \n
+    設計說明:\n
+    - 規則和 Balloon.update 完全一樣，只是一次處理全部氣球\n
+    - 移除氣球時把最後面的氣球搬到空出來的位置，不用整排往前移\n
+    - 支援 len()、clear()，可以直接取代原本的氣球列表\n
+    \n
+    使用範例:\n
+        emitter = BalloonEmitter()\n
+        emitter.spawn(400, 650, (255, 100, 100), 20)\n
+        emitter.update(dt)\n
+        emitter.draw(screen)
+    """
+    # 小圖的透明色（氣球顏色都比較淺，不會用到這個顏色）
+    SPRITE_COLORKEY = (1, 0, 1)
+
+    def __init__(self, capacity=64):
+        """
+        初始化發射器\n
+        \n
+        參數:\n
+        capacity (int): 一開始預留幾個氣球的空間，不夠時會自動加倍
+        """
+        self.count = 0
+        self.colors = []              # 出現過的顏色，用編號記錄比較省空間
+        self._color_index = {}
+        self._sprites = {}            # {(顏色編號, 大小, 有沒有高光): Surface}
+        self._allocate(max(1, int(capacity)))
+
+    def _allocate(self, capacity):
+        """
+        配置（或擴大）所有狀態陣列，保留既有的氣球\n
+        capacity: 新的容量
+        """
+        def grow(old, dtype):
+            new = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                new[:self.count] = old[:self.count]
+            return new
+
+        self.x = grow(getattr(self, 'x', None), np.float64)
+        self.y = grow(getattr(self, 'y', None), np.float64)
+        self.speed = grow(getattr(self, 'speed', None), np.float64)
+        self.amplitude = grow(getattr(self, 'amplitude', None), np.float64)
+        self.frequency = grow(getattr(self, 'frequency', None), np.float64)
+        self.time = grow(getattr(self, 'time', None), np.float64)
+        self.size = grow(getattr(self, 'size', None), np.int32)
+        self.color_index = grow(getattr(self, 'color_index', None), np.int32)
+        self.capacity = capacity
+
+    def __len__(self):
+        """
+        返回值：目前有幾個氣球
+        """
+        return self.count
+
+    ######################生成和移除######################
+    def spawn(self, x, y, color, size=20, rng=random):
+        """
+        新增一個氣球\n
+        \n
+        參數:\n
+        x, y (float): 氣球的初始座標\n
+        color (tuple): 氣球的顏色 (r,g,b)\n
+        size (int): 氣球大小，範圍 > 0\n
+        rng: 亂數來源（有 uniform 方法），預設使用 random 模組\n
+        \n
+        回傳:\n
+        int: 新氣球的編號（之後移除其他氣球時編號可能會變）
+        """
+        # 空間不夠就加倍，避免每加一個就重新配置一次
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        color_index = self._color_index.get(color)
+        if color_index is None:
+            color_index = len(self.colors)
+            self.colors.append(color)
+            self._color_index[color] = color_index
+
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        # 隨機值的範圍和 Balloon 一樣
+        self.speed[i] = rng.uniform(1, 3)
+        self.amplitude[i] = rng.uniform(10, 30)     # 左右搖擺幅度
+        self.frequency[i] = rng.uniform(0.02, 0.05)  # 搖擺頻率
+        self.time[i] = 0.0
+        self.size[i] = size
+        self.color_index[i] = color_index
+        self.count += 1
+        return i
+
+    def clear(self):
+        """
+        移除所有氣球（保留已配置的空間和畫好的小圖）
+        """
+        self.count = 0
+
+    def remove_where(self, mask):
+        """
+        移除遮罩為 True 的氣球，用最後面的氣球補洞\n
+        \n
+        參數:\n
+        mask (ndarray): 長度等於 count 的布林陣列\n
+        \n
+        回傳:\n
+        int: 移除了幾個氣球\n
+        \n
+        算法說明:\n
+        - 移除後總數是 new_count，前 new_count 個位置裡的洞要補起來\n
+        - 後面那段裡還活著的氣球剛好和洞一樣多，一對一搬過去就好
+        """
+        dead = np.nonzero(mask)[0]
+        if len(dead) == 0:
+            return 0
+        new_count = self.count - len(dead)
+        holes = dead[dead < new_count]
+        movers = np.nonzero(~mask[new_count:])[0] + new_count
+        for array in (self.x, self.y, self.speed, self.amplitude, self.frequency,
+                      self.time, self.size, self.color_index):
+            array[holes] = array[movers]
+        self.count = new_count
+        return len(dead)
+
+    ######################更新######################
+    def update(self, dt, top=0.0):
+        """
+        一次更新所有氣球，並移除飄出畫面的氣球\n
+        \n
+        參數:\n
+        dt (float): 時間增量（秒）\n
+        top (float): 畫面上緣的 y 座標（捲動關卡是鏡頭的位置）\n
+        \n
+        回傳:\n
+        int: 這次移除了幾個氣球
+        """
+        n = self.count
+        if n == 0:
+            return 0
+        time = self.time[:n]
+        time += dt
+        # 向上飄浮（速度以 60 FPS 的每幀移動量為單位）
+        self.y[:n] -= self.speed[:n] * (dt * 60.0)
+        # 左右搖擺
+        self.x[:n] += np.sin(time * self.frequency[:n] * 100) * self.amplitude[:n] * dt
+        # 飄出畫面上方的氣球移除
+        return self.remove_where(self.y[:n] < top - self.size[:n] * 2)
+
+    ######################繪製######################
+    def get_sprite(self, color_index, size, highlight=True):
+        """
+        取得某種顏色和大小的氣球小圖，第一次用到時才畫\n
+        \n
+        參數:\n
+        color_index (int): 顏色編號\n
+        size (int): 氣球大小\n
+        highlight (bool): 要不要畫高光\n
+        \n
+        回傳:\n
+        pygame.Surface: 氣球小圖，錨點（繩子頂端）在 (size // 2 + 1, size + 1)
+        """
+        key = (color_index, size, highlight)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((size + 3, size * 2 + 3))
+            sprite.fill(self.SPRITE_COLORKEY)
+            self.paint_balloon(sprite, size // 2 + 1, size + 1, self.colors[color_index], size, highlight)
+            # 已經有視窗時轉成和螢幕相同的格式，貼圖比較快
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+            sprite.set_colorkey(self.SPRITE_COLORKEY, pygame.RLEACCEL)
+            self._sprites[key] = sprite
+        return sprite
+
+    @staticmethod
+    def paint_balloon(surface, x, y, color, size, highlight=True):
+        """
+        畫出一個氣球（和 Balloon.draw 一樣的三個步驟）\n
+        \n
+        參數:\n
+        surface (pygame.Surface): 要畫上去的畫布\n
+        x, y (int): 繩子頂端的座標\n
+        color (tuple): 氣球顏色\n
+        size (int): 氣球大小\n
+        highlight (bool): 要不要畫高光（畫面品質降低時省掉）
+        """
+        # 畫氣球本體（橢圓形）
+        pygame.draw.ellipse(surface, color, (x - size // 2, y - size, size, int(size * 1.2)))
+        # 畫氣球繩子
+        pygame.draw.line(surface, (100, 100, 100), (x, y), (x, y + size), 2)
+        # 氣球上的高光
+        if highlight:
+            highlight_size = max(3, size // 4)
+            pygame.draw.circle(surface, (255, 255, 255), (x - size // 4, y - size // 2), highlight_size)
+
+    def get_rects(self, camera_y=0):
+        """
+        取得每個氣球（含繩子）在畫面上佔用的矩形範圍\n
+        camera_y: 鏡頭的 y 座標，畫在畫面上的位置是 y - camera_y（捲動關卡用，預設 0）\n
+        返回值：pygame.Rect 列表
+        """
+        n = self.count
+        sizes = self.size[:n]
+        left = (self.x[:n].astype(np.int64) - sizes // 2 - 1).tolist()
+        top = ((self.y[:n] - camera_y).astype(np.int64) - sizes - 1).tolist()
+        sizes = sizes.tolist()
+        return [pygame.Rect(left[i], top[i], sizes[i] + 3, sizes[i] * 2 + 3) for i in range(n)]
+
+    def draw(self, screen, camera_y=0, cap=None, highlight=True):
+        """
+        用預先畫好的小圖一次貼出所有氣球\n
+        screen: pygame 螢幕物件\n
+        camera_y: 鏡頭的 y 座標，畫在畫面上的位置是 y - camera_y（捲動關卡用，預設 0）\n
+        cap: 最多畫幾個氣球，None 表示全部畫（只影響畫面，模擬裡的氣球數量不變）\n
+        highlight: 要不要畫高光
+        """
+        n = self.count if cap is None else min(self.count, cap)
+        if n == 0:
+            return
+        sizes = self.size[:n]
+        left = (self.x[:n].astype(np.int64) - sizes // 2 - 1).tolist()
+        top = ((self.y[:n] - camera_y).astype(np.int64) - sizes - 1).tolist()
+        keys = (self.color_index[:n].astype(np.int64) * 1024 + sizes).tolist()
+        sprites = {}
+        blit_list = []
+        for i in range(n):
+            # 同樣顏色和大小的氣球共用同一張小圖
+            sprite = sprites.get(keys[i])
+            if sprite is None:
+                sprite = self.get_sprite(keys[i] // 1024, keys[i] % 1024, highlight)
+                sprites[keys[i]] = sprite
+            blit_list.append((sprite, (left[i], top[i])))
+        screen.blits(blit_list, False)
@@ -6,39 +6,117 @@ import pygame
 class Brick:
     """
     磚塊類別\n
-    負責處理磚塊的繪製和碰撞檢測
+    負責處理磚塊的繪製和碰撞檢測\n
+    整面牆可能有上萬個磚塊，用 __slots__ 讓每個磚塊不用帶一個 __dict__
     """
-    def __init__(self, x, y, height, length, color):
+    __slots__ = ('x', 'y', 'height', 'length', 'color', 'hit_points', '_remaining', '_is_hit',
+                 'listeners', '_store', '_index')
+
+    def __init__(self, x, y, height, length, color, hit_points=1):
         """
         初始化磚塊\n
         x, y: 磚塊的左上角座標\n
         height, length: 磚塊的高度和寬度\n
         color: 磚塊的顏色\n
+        hit_points: 要被撞幾次才會碎（預設 1 次）\n
         """
         self.x = x
         self.y = y
         self.height = height
         self.length = length
         self.color = color
-        self.is_hit = False  # 預設值為 not been hit
+        self.hit_points = hit_points
+        self._remaining = hit_points  # 還要再撞幾次才會碎
+        self._is_hit = False  # 預設值為 not been hit
+        # 磚塊被擊中或恢復時要通知的物件（例如空間索引），每個物件要有 on_brick_changed(brick) 方法
+        self.listeners = []
+        # 加入磚塊倉庫後，擊中狀態改存在倉庫的位元陣列裡，這個物件只是一個「窗口」
+        self._store = None
+        self._index = -1
+
+    def attach(self, store, index):
+        """
+        把磚塊交給磚塊倉庫管理\n
+        store: BrickStore 物件\n
+        index: 這個磚塊在倉庫裡的編號\n
+        之後讀寫 is_hit 都會直接讀寫倉庫，listeners 也改成和倉庫共用
+        """
+        self._store = store
+        self._index = index
+        self.listeners = store.listeners
+
+    @property
+    def is_hit(self):
+        """
+        磚塊是否已被擊中\n
+        返回值：True 表示已被擊中（消失），False 表示還在
+        """
+        if self._store is not None:
+            return self._store.is_hit(self._index)
+        return self._is_hit
+
+    @is_hit.setter
+    def is_hit(self, value):
+        """
+        設定磚塊是否被擊中\n
+        value: 新的狀態\n
+        狀態真的有改變時，會通知所有 listeners；恢復成沒被擊中時耐久度也會補滿
+        """
+        # 有磚塊倉庫時交給倉庫處理（倉庫會更新計數並通知 listeners）
+        if self._store is not None:
+            self._store.set_hit(self._index, value)
+            return
+        value = bool(value)
+        # 狀態沒變就不用通知，避免重複處理
+        if value == self._is_hit:
+            return
+        self._is_hit = value
+        if not value:
+            self._remaining = self.hit_points  # 恢復時耐久度補滿
+        for listener in self.listeners:
+            listener.on_brick_changed(self)
+
+    def hit(self):
+        """
+        磚塊被撞一次：耐久度減 1，減到 0 就碎掉（is_hit 變成 True）\n
+        返回值：True 表示這一下把磚塊撞碎了，False 表示還沒碎（或早就碎了）
+        """
+        if self._store is not None:
+            return self._store.hit(self._index)
+        if self._is_hit:
+            return False
+        self._remaining -= 1
+        if self._remaining > 0:
+            return False
+        self.is_hit = True
+        return True
 
-    def draw(self, screen):
+    def draw(self, screen, camera_y=0):
         """
         繪製磚塊的方法\n
-        screen: pygame 螢幕物件
+        screen: pygame 螢幕物件\n
+        camera_y: 鏡頭的 y 座標，畫在畫面上的位置是 y - camera_y（捲動關卡用，預設 0）
         """
         if not self.is_hit:  # 只有在磚塊還沒被擊中時才繪製
-            pygame.draw.rect(screen, self.color, (self.x, self.y, self.length, self.height))
+            pygame.draw.rect(screen, self.color, (self.x, self.y - camera_y, self.length, self.height))
+
+    def get_rect(self, camera_y=0):
+        """
+        取得磚塊在畫面上佔用的矩形範圍\n
+        camera_y: 鏡頭的 y 座標，畫在畫面上的位置是 y - camera_y（捲動關卡用，預設 0）\n
+        返回值：pygame.Rect 物件
+        """
+        return pygame.Rect(int(self.x), int(self.y - camera_y), int(self.length), int(self.height))
 
     def check_collision(self, pos_x, pos_y):
         """
         檢查指定位置是否擊中磚塊\n
         pos_x, pos_y: 檢查的座標位置\n
-        返回值：True 表示擊中，False 表示未擊中
+        返回值：True 表示擊中（有耐久度的磚塊會扣 1，不一定碎掉），False 表示未擊中
         """
         if (self.x <= pos_x <= self.x + self.length and 
             self.y <= pos_y <= self.y + self.height and 
             not self.is_hit):
-            self.is_hit = True
+            self.hit()
             return True
         return False
@@ -0,0 +1,262 @@
+######################載入套件######################
+"""
+磚塊倉庫模組
+把整面牆的磚塊資料集中放在幾個緊湊的陣列裡：位置、大小、顏色各一個陣列
+擊中狀態用位元陣列記錄（一個磚塊只佔 1 個位元），另外記錄還剩幾塊磚
+判斷勝利只要看剩下的數量，重新開始只要把位元陣列一次清成 0
+"""
+import numpy as np
+
+
+######################物件類別######################
+class BrickStore:
+    """
+    整面磚塊牆的緊湊資料倉庫\n
+    \n
+    屬性說明：\n
+    count: 磚塊總數\n
+    x, y: 磚塊左上角座標陣列（float32）\n
+    length, height: 磚塊寬高陣列（float32）\n
+    colors: 顏色陣列，形狀 (count, 3)，每個值 0-255（uint8）\n
+    hit_points: 每塊磚要撞幾次才會碎（uint8）\n
+    remaining: 每塊磚還要再撞幾次（uint8），撞到 0 才會設定擊中位元\n
+    hit_bits: 擊中狀態的位元陣列（uint8），第 i 個磚塊在第 i // 8 個位元組的第 i % 8 個位元\n
+    live_count: 還沒被擊中的磚塊數量\n
+    bricks: 對應每個編號的 Brick 物件（只是讀寫倉庫的窗口，方便舊程式繼續使用）\n
+    listeners: 磚塊狀態改變時要通知的物件\n
+    \n
+    listeners 的通知方式:\n
+    - 單一磚塊改變：呼叫 on_brick_changed(brick)\n
+    - 整面牆一起重置或載入存檔：呼叫 on_wall_reset()，讓它們一次處理，不用一塊一塊通知\n
+    \n
+    使用範例:\n
+        store = BrickStore.from_bricks(bricks)\n
+        if store.live_count == 0:\n
+            print('勝利')\n
+        store.reset_all()
+    """
+    def __init__(self, x, y, length, height, colors, hit_points=None):
+        """
+        用陣列建立磚塊倉庫（所有磚塊一開始都還沒被擊中）\n
+        \n
+        參數:\n
+        x, y (array-like): 磚塊左上角座標（已經是 float32 陣列時直接使用，不會複製，可以是 memmap）\n
+        length, height (array-like): 磚塊寬高\n
+        colors (array-like): 顏色，形狀 (count, 3)\n
+        hit_points (array-like): 每塊磚的耐久度，None 表示全部都是 1
+        """
+        self.x = np.asarray(x, dtype=np.float32)
+        self.y = np.asarray(y, dtype=np.float32)
+        self.length = np.asarray(length, dtype=np.float32)
+        self.height = np.asarray(height, dtype=np.float32)
+        self.colors = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+        self.count = len(self.x)
+        if hit_points is None:
+            self.hit_points = np.ones(self.count, dtype=np.uint8)
+        else:
+            self.hit_points = np.asarray(hit_points, dtype=np.uint8)
+        self.remaining = self.hit_points.copy()
+        # 每 8 個磚塊共用一個位元組
+        self.hit_bits = np.zeros((self.count + 7) // 8, dtype=np.uint8)
+        self.live_count = self.count
+        self.bricks = []
+        self.listeners = []
+
+    @classmethod
+    def from_bricks(cls, bricks):
+        """
+        把現有的 Brick 物件收進倉庫\n
+        \n
+        參數:\n
+        bricks (list): Brick 物件列表，順序就是倉庫裡的編號\n
+        \n
+        回傳:\n
+        BrickStore: 新的倉庫，原本的 Brick 物件會變成讀寫倉庫的窗口\n
+        \n
+        說明:\n
+        - 磚塊原本的擊中狀態會一起搬進來\n
+        - 磚塊原本登記的 listeners 會合併到倉庫（同一個物件只登記一次）
+        """
+        store = cls([b.x for b in bricks], [b.y for b in bricks],
+                    [b.length for b in bricks], [b.height for b in bricks],
+                    [b.color for b in bricks] or np.zeros((0, 3)),
+                    [b.hit_points for b in bricks])
+        for index, brick in enumerate(bricks):
+            was_hit = brick.is_hit
+            store.remaining[index] = max(0, brick._remaining)
+            for listener in brick.listeners:
+                if listener not in store.listeners:
+                    store.listeners.append(listener)
+            brick.attach(store, index)
+            if was_hit:
+                store._write_bit(index, True)
+                store.live_count -= 1
+        store.bricks = bricks
+        return store
+
+    def make_bricks(self, indices=None):
+        """
+        替倉庫裡的編號建立對應的 Brick 物件（讀寫倉庫的窗口）\n
+        \n
+        參數:\n
+        indices (ndarray): 只替這些編號建立，None 表示全部\n
+        \n
+        回傳:\n
+        list: 建立的 Brick 物件（順序和 indices 相同），也會放到 self.bricks 對應的位置\n
+        \n
+        說明:\n
+        - 從關卡檔載入時用這個，不用先建 Brick 再搬進倉庫\n
+        - 用 tolist() 一次把陣列換成 Python 數字，十萬塊磚也很快\n
+        - 捲動關卡只替畫面附近的區塊建立，self.bricks 其他位置是 None
+        """
+        from src.entities.brick import Brick
+        if indices is None:
+            indices = np.arange(self.count)
+            self.bricks = [None] * self.count
+        elif len(self.bricks) != self.count:
+            self.bricks = [None] * self.count
+        indices = np.asarray(indices, dtype=np.int64)
+        colors = [tuple(color) for color in self.colors[indices].tolist()]
+        bricks = []
+        for index, x, y, length, height, hit_points, color in zip(
+                indices.tolist(), self.x[indices].tolist(), self.y[indices].tolist(),
+                self.length[indices].tolist(), self.height[indices].tolist(),
+                self.hit_points[indices].tolist(), colors):
+            brick = Brick(x, y, height, length, color, hit_points)
+            brick.attach(self, index)
+            self.bricks[index] = brick
+            bricks.append(brick)
+        return bricks
+
+    def release_bricks(self, indices):
+        """
+        丟掉某些編號的 Brick 物件，釋放記憶體（擊中狀態和耐久度還留在倉庫的陣列裡）\n
+        indices: 要釋放的磚塊編號
+        """
+        bricks = self.bricks
+        for index in np.asarray(indices).tolist():
+            bricks[index] = None
+
+    ######################擊中狀態######################
+    def is_hit(self, index):
+        """
+        查詢某個磚塊是否已被擊中\n
+        index: 磚塊編號\n
+        返回值：True 表示已被擊中
+        """
+        return bool(self.hit_bits[index >> 3] & (1 << (index & 7)))
+
+    def _write_bit(self, index, value):
+        """
+        直接改寫位元陣列裡某個磚塊的位元（不更新計數、不通知）
+        """
+        if value:
+            self.hit_bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self.hit_bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def set_hit(self, index, value):
+        """
+        設定某個磚塊是否被擊中\n
+        \n
+        參數:\n
+        index (int): 磚塊編號\n
+        value (bool): 新的狀態\n
+        \n
+        副作用:\n
+        - 狀態真的有改變時，更新剩餘磚塊數量並通知所有 listeners\n
+          （那塊磚的 Brick 物件已經釋放時，通知的參數是 None）\n
+        - 恢復成沒被擊中時，耐久度也會補滿
+        """
+        value = bool(value)
+        # 狀態沒變就不用處理
+        if value == self.is_hit(index):
+            return
+        self._write_bit(index, value)
+        if not value:
+            self.remaining[index] = self.hit_points[index]
+        self.live_count += -1 if value else 1
+        brick = self.bricks[index] if index < len(self.bricks) else None
+        for listener in self.listeners:
+            listener.on_brick_changed(brick)
+
+    def hit(self, index):
+        """
+        某個磚塊被撞一次：耐久度減 1，減到 0 才算擊中\n
+        \n
+        參數:\n
+        index (int): 磚塊編號\n
+        \n
+        回傳:\n
+        bool: True 表示這一下把磚塊撞碎了
+        """
+        if self.is_hit(index):
+            return False
+        if self.remaining[index] > 1:
+            self.remaining[index] -= 1
+            return False
+        self.remaining[index] = 0
+        self.set_hit(index, True)
+        return True
+
+    def reset_all(self):
+        """
+        整面牆一次恢復（重新開始遊戲時使用）\n
+        \n
+        副作用:\n
+        - 位元陣列一次清成 0，剩餘數量回到總數，每塊磚的耐久度補滿\n
+        - 通知 listeners 整面牆已重置
+        """
+        self.hit_bits[:] = 0
+        self.remaining[:] = self.hit_points
+        self.live_count = self.count
+        for listener in self.listeners:
+            listener.on_wall_reset()
+
+    def load_state(self, hit_bits, remaining):
+        """
+        換成存檔裡的擊中狀態和耐久度（載入快速存檔、倒轉時使用）\n
+        \n
+        參數:\n
+        hit_bits (bytes 或 ndarray): 位元陣列，長度要和 self.hit_bits 一樣\n
+        remaining (bytes 或 ndarray): 每塊磚的剩餘耐久度\n
+        \n
+        副作用:\n
+        - 重算剩餘磚塊數量\n
+        - 只有幾塊磚改變時逐塊通知 listeners（倒轉時每一步通常只差一兩塊），改變很多時通知整面牆重置
+        """
+        new_bits = np.frombuffer(hit_bits, dtype=np.uint8) if isinstance(hit_bits, bytes) else hit_bits
+        new_remaining = np.frombuffer(remaining, dtype=np.uint8) if isinstance(remaining, bytes) else remaining
+        if len(new_bits) != len(self.hit_bits) or len(new_remaining) != self.count:
+            raise ValueError(f'存檔的磚塊數量和目前的關卡不同（目前 {self.count} 塊）')
+        self.remaining[:] = new_remaining
+        changed = np.nonzero(self.hit_bits != new_bits)[0]
+        if len(changed) == 0:
+            return
+        self.hit_bits[:] = new_bits
+        self.live_count = self.count - int(np.unpackbits(self.hit_bits).sum())
+        if len(changed) > 8:
+            for listener in self.listeners:
+                listener.on_wall_reset()
+            return
+        # 改變的位元組裡逐塊通知（同一個位元組裡沒改變的磚塊通知了也沒關係）
+        bricks = self.bricks
+        for byte in changed.tolist():
+            for index in range(byte * 8, min(byte * 8 + 8, self.count)):
+                brick = bricks[index] if index < len(bricks) else None
+                for listener in self.listeners:
+                    listener.on_brick_changed(brick)
+
+    def is_cleared(self):
+        """
+        檢查是不是所有磚塊都被擊中了\n
+        返回值：True 表示已經沒有磚塊（勝利）
+        """
+        return self.live_count == 0
+
+    def hit_mask(self):
+        """
+        取得每個磚塊是否被擊中的布林陣列（給批次運算用）\n
+        返回值：長度 count 的布林陣列
+        """
+        return np.unpackbits(self.hit_bits, count=self.count, bitorder='little').astype(bool)
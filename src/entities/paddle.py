@@ -8,6 +8,8 @@ class Paddle(Brick):
     底板類別，繼承 Brick 並可擴充行為\n
     用於控制玩家操作的底板
     """
+    __slots__ = ()
+
     def __init__(self, x, y, height, length, color):
         """
         初始化底板\n
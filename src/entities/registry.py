@@ -0,0 +1,275 @@
+######################載入套件######################
+"""
+遊戲物件登錄模組
+會一直生成、消失的物件（例如龍捲風）不要每次都 new 一個新物件再丟給垃圾回收
+每種物件有自己的物件池：
+- 消失的物件放回空位清單，下次生成時拿出來重新初始化，穩定狀態下完全不用配置新物件
+- 每個物件有一個固定的槽位編號，加上世代編號組成 handle（整數），物件被回收後舊的 handle 就失效
+- 生成和消失都是 O(1)；活著的物件依生成順序排在 active 列表裡，每一步最後一次整理掉已消失的
+"""
+
+
+######################初始化設定######################
+# handle 的格式：世代編號 << 32 | 物件種類 << 24 | 槽位編號
+HANDLE_SLOT_BITS = 24
+HANDLE_KIND_BITS = 8
+_SLOT_MASK = (1 << HANDLE_SLOT_BITS) - 1
+_KIND_MASK = (1 << HANDLE_KIND_BITS) - 1
+_GENERATION_SHIFT = HANDLE_SLOT_BITS + HANDLE_KIND_BITS
+
+
+######################定義函式區######################
+def make_handle(kind, slot, generation):
+    """
+    組出 handle\n
+    \n
+    參數:\n
+    kind (int): 物件種類編號（EntityRegistry 依登記順序給）\n
+    slot (int): 槽位編號\n
+    generation (int): 這個槽位第幾次被使用\n
+    \n
+    回傳:\n
+    int: handle
+    """
+    return (generation << _GENERATION_SHIFT) | (kind << HANDLE_SLOT_BITS) | slot
+
+
+def split_handle(handle):
+    """
+    把 handle 拆回 (種類, 槽位, 世代)\n
+    handle: make_handle() 產生的整數\n
+    返回值：(kind, slot, generation)
+    """
+    return (handle >> HANDLE_SLOT_BITS) & _KIND_MASK, handle & _SLOT_MASK, handle >> _GENERATION_SHIFT
+
+
+######################物件類別######################
+class EntityPool:
+    """
+    單一種類物件的物件池\n
+    \n
+    屬性說明：\n
+    cls: 物件類別，要有 reset(...) 方法，參數和 __init__ 一樣（__init__ 只呼叫 reset）\n
+    kind: 物件種類編號，會放進 handle\n
+    active: 活著的物件，依生成順序排列（可以直接 for 迴圈）\n
+    slots: 每個槽位對應的物件（包含已經回收的）\n
+    \n
+    物件上會被設定的屬性（類別的 __slots__ 要包含）:\n
+    - slot: 槽位編號\n
+    - handle: 目前的 handle\n
+    - is_alive: 是否活著\n
+    \n
+    設計說明:\n
+    - despawn() 只把物件標記成消失、槽位先放進待回收清單，O(1)，不會在迴圈中途改動 active\n
+    - compact() 一次把消失的物件從 active 拿掉，保留原本的順序（狀態雜湊和快照都依這個順序），\n
+      之後才把待回收的槽位放回空位清單；還在 active 裡的物件不會被 spawn() 拿去重用，\n
+      所以在走訪 active 的迴圈中途 despawn() 再 spawn() 也不會讓同一個物件出現兩次\n
+    - 空位清單是堆疊，最近回收的物件最先被拿來用，比較可能還在 CPU 快取裡\n
+    \n
+    使用範例:\n
+        pool = EntityPool(Tornado)\n
+        tornado = pool.spawn(x, y, rng=rng)\n
+        for tornado in pool:\n
+            if tornado.y > 600:\n
+                pool.despawn(tornado)\n
+        pool.compact()
+    """
+    def __init__(self, cls, kind=0, capacity=0):
+        """
+        建立物件池\n
+        \n
+        參數:\n
+        cls (type): 物件類別\n
+        kind (int): 物件種類編號，範圍 0-255\n
+        capacity (int): 預先建立幾個物件，遊戲中途就不用再配置
+        """
+        self.cls = cls
+        self.kind = kind
+        self.active = []
+        self.slots = []
+        self._generations = []
+        self._free = []
+        # 已經消失、但物件還在 active 裡的槽位，compact() 之後才能重用
+        self._pending_free = []
+        self._dead_count = 0
+        for _ in range(capacity):
+            entity = cls.__new__(cls)
+            entity.is_alive = False
+            self._add_slot(entity)
+            self._free.append(entity.slot)
+        self._free.reverse()
+
+    def _add_slot(self, entity):
+        """
+        替新建立的物件配一個槽位
+        """
+        entity.slot = len(self.slots)
+        self.slots.append(entity)
+        self._generations.append(0)
+
+    def __len__(self):
+        """
+        取得活著的物件數量\n
+        返回值：數量
+        """
+        return len(self.active) - self._dead_count
+
+    def __iter__(self):
+        """
+        依生成順序走訪 active（compact() 之前會包含剛消失的物件，用 is_alive 判斷）
+        """
+        return iter(self.active)
+
+    def spawn(self, *args, **kwargs):
+        """
+        生成一個物件：有回收的就重新初始化拿來用，沒有才建立新的\n
+        上次 compact() 之後才消失的物件還不能重用，這時會拿別的空位或建立新的\n
+        \n
+        參數:\n
+        *args, **kwargs: 傳給 reset()（或 __init__）的參數\n
+        \n
+        回傳:\n
+        物件本身（handle 在 obj.handle）
+        """
+        if self._free:
+            entity = self.slots[self._free.pop()]
+            entity.reset(*args, **kwargs)
+        else:
+            entity = self.cls(*args, **kwargs)
+            self._add_slot(entity)
+        entity.is_alive = True
+        entity.handle = make_handle(self.kind, entity.slot, self._generations[entity.slot])
+        self.active.append(entity)
+        return entity
+
+    def despawn(self, entity):
+        """
+        讓物件消失（O(1)）：槽位放進待回收清單，舊的 handle 失效\n
+        entity: 這個池子生成的物件\n
+        物件要等到 compact() 才會從 active 拿掉、槽位才能重用，已經消失的物件再呼叫一次不會有事
+        """
+        if not entity.is_alive:
+            return
+        entity.is_alive = False
+        self._generations[entity.slot] += 1
+        self._pending_free.append(entity.slot)
+        self._dead_count += 1
+
+    def _release_pending(self):
+        """
+        物件已經不在 active 裡了：待回收的槽位放回空位清單
+        """
+        if self._pending_free:
+            self._free.extend(self._pending_free)
+            self._pending_free.clear()
+
+    def compact(self):
+        """
+        把已經消失的物件從 active 拿掉，保留原本的順序（原地整理，不建立新列表），\n
+        之後它們的槽位才能被 spawn() 重用
+        """
+        if self._dead_count == 0:
+            return
+        active = self.active
+        write = 0
+        for entity in active:
+            if entity.is_alive:
+                active[write] = entity
+                write += 1
+        del active[write:]
+        self._dead_count = 0
+        self._release_pending()
+
+    def clear(self):
+        """
+        讓所有物件消失
+        """
+        for entity in self.active:
+            self.despawn(entity)
+        self.active.clear()
+        self._dead_count = 0
+        self._release_pending()
+
+    def get(self, handle):
+        """
+        用 handle 找回物件\n
+        handle: spawn() 時拿到的 handle\n
+        返回值：物件，已經消失（或槽位已經給別人用）時回傳 None
+        """
+        kind, slot, generation = split_handle(handle)
+        if kind != self.kind or slot >= len(self.slots) or self._generations[slot] != generation:
+            return None
+        entity = self.slots[slot]
+        return entity if entity.is_alive else None
+
+
+class EntityRegistry:
+    """
+    所有物件池的登錄處，每種物件類別一個池子\n
+    \n
+    屬性說明：\n
+    pools: {物件類別: EntityPool}\n
+    \n
+    使用範例:\n
+        registry = EntityRegistry()\n
+        tornadoes = registry.pool(Tornado)\n
+        handle = tornadoes.spawn(x, y).handle\n
+        registry.get(handle)
+    """
+    def __init__(self):
+        """
+        建立空的登錄處，池子在第一次呼叫 pool() 時才建立\n
+        \n
+        參數:\n
+        （沒有參數；每個池子的預先配置數量在 pool() 的 capacity 指定）\n
+        \n
+        說明:\n
+        _by_kind 依照種類編號存放池子，get() 和 despawn() 用 handle 裡的種類編號直接找到池子
+        """
+        self.pools = {}
+        self._by_kind = []
+
+    def pool(self, cls, capacity=0):
+        """
+        取得某種物件的池子，第一次用到時建立\n
+        \n
+        參數:\n
+        cls (type): 物件類別\n
+        capacity (int): 第一次建立時預先配置幾個物件\n
+        \n
+        回傳:\n
+        EntityPool: 這種物件的池子
+        """
+        pool = self.pools.get(cls)
+        if pool is None:
+            if len(self._by_kind) > _KIND_MASK:
+                raise ValueError(f'物件種類太多（最多 {_KIND_MASK + 1} 種）')
+            pool = EntityPool(cls, len(self._by_kind), capacity)
+            self.pools[cls] = pool
+            self._by_kind.append(pool)
+        return pool
+
+    def get(self, handle):
+        """
+        用 handle 找回任何種類的物件\n
+        handle: spawn() 時拿到的 handle\n
+        返回值：物件，已經消失時回傳 None
+        """
+        kind = (handle >> HANDLE_SLOT_BITS) & _KIND_MASK
+        if kind >= len(self._by_kind):
+            return None
+        return self._by_kind[kind].get(handle)
+
+    def despawn(self, entity):
+        """
+        讓任何種類的物件消失\n
+        entity: 由某個池子生成的物件
+        """
+        self.pools[type(entity)].despawn(entity)
+
+    def compact(self):
+        """
+        整理所有池子（每一步最後呼叫一次）
+        """
+        for pool in self._by_kind:
+            pool.compact()
@@ -2,65 +2,180 @@
 import math
 import random
 import pygame
+from config import settings
 
 
 ######################物件類別######################
 class Tornado:
     """
     龍捲風類別：碰到球時重新開始遊戲\n
-    具有螺旋形視覺效果和碰撞檢測功能
+    具有螺旋形視覺效果和碰撞檢測功能\n
+    \n
+    繪圖說明:\n
+    - 每種大小的龍捲風，會預先把每個旋轉角度的樣子畫成一張張小圖\n
+    - 這些小圖放在類別共用的 _frame_cache，所有同樣大小的龍捲風一起用\n
+    - 每幀只要挑最接近目前角度的那張貼上去，不用再畫十幾個橢圓\n
+    - 畫面品質降低時，層和層之間隔得比較開（橢圓比較少）\n
+    \n
+    物件池說明:\n
+    - 模擬核心用 EntityPool 生成龍捲風，消失的龍捲風會被 reset() 重新拿來用\n
+    - slot、handle、is_alive 由物件池設定；__slots__ 讓每個龍捲風不用帶一個 __dict__
     """
-    def __init__(self, x, y, width=30, height=80):
+    __slots__ = ('x', 'y', 'width', 'height', 'speed', 'rotation', 'rotation_speed', 'color',
+                 'slot', 'handle', 'is_alive')
+    # 預先畫好的旋轉畫面：{(寬, 高, 張數): [Surface, ...]}
+    _frame_cache = {}
+    # 旋轉畫面的透明色（龍捲風只有灰色，不會用到這個洋紅色）
+    FRAME_COLORKEY = (255, 0, 255)
+    # 預設每隔幾像素畫一層橢圓
+    LAYER_SPACING = 8
+
+    def __init__(self, x, y, width=30, height=80, rng=random, speed=None, rotation_speed=None):
         """
         初始化龍捲風\n
         x, y: 龍捲風的左上角座標\n
         width, height: 龍捲風的寬度和高度\n
+        rng: 亂數來源（有 uniform 方法），預設使用 random 模組，傳入固定種子的 random.Random 可以重現同樣的龍捲風\n
+        speed, rotation_speed: 下降和旋轉速度，None 表示用 rng 隨機決定（載入存檔時直接給值，不會動到亂數）\n
+        """
+        self.slot = -1
+        self.handle = -1
+        self.is_alive = True
+        self.reset(x, y, width, height, rng, speed, rotation_speed)
+
+    def reset(self, x, y, width=30, height=80, rng=random, speed=None, rotation_speed=None):
+        """
+        重新初始化龍捲風（物件池回收再利用時呼叫，參數和 __init__ 一樣）\n
+        亂數取用的順序和建立新的龍捲風完全相同，重播結果不會因為有沒有回收而改變
         """
         self.x = x
         self.y = y
         self.width = width
         self.height = height
-        self.speed = random.uniform(1, 3)  # 下降速度
+        self.speed = rng.uniform(1, 3) if speed is None else speed  # 下降速度
         self.rotation = 0  # 旋轉角度
-        self.rotation_speed = random.uniform(5, 10)  # 旋轉速度
+        self.rotation_speed = rng.uniform(5, 10) if rotation_speed is None else rotation_speed  # 旋轉速度
         self.color = (150, 150, 150)  # 灰色
         
     def update(self, dt):
         """
         更新龍捲風位置和旋轉\n
-        dt: 時間增量
+        dt: 時間增量（秒），速度和 Ball 一樣以 60 FPS 的每幀移動量為單位
         """
-        self.y += self.speed
-        self.rotation += self.rotation_speed
+        scale = dt * 60.0
+        self.y += self.speed * scale
+        self.rotation += self.rotation_speed * scale
         if self.rotation >= 360:
             self.rotation = 0
     
-    def draw(self, screen):
+    @staticmethod
+    def _frame_half_width(width):
         """
-        繪製龍捲風\n
-        screen: pygame 螢幕物件
+        算出龍捲風畫出來時，從中心到最左（或最右）邊最多有多遠\n
+        \n
+        最下面一層最寬，加上左右搖擺的偏移，畫出來會比 width 還寬一些\n
+        width: 龍捲風的寬度\n
+        返回值：半寬（整數像素）
+        """
+        # 最寬那層的寬度，加上最多四分之一寬度的搖擺
+        widest = width * 0.8 + 5
+        return int(widest * 0.75) + 2
+
+    @staticmethod
+    def draw_layers(surface, center_x, top, width, height, rotation, spacing=8):
+        """
+        用一層一層的橢圓畫出龍捲風（預先產生旋轉畫面時使用）\n
+        \n
+        參數:\n
+        surface (pygame.Surface): 要畫上去的畫布\n
+        center_x (float): 龍捲風中心的 x 座標\n
+        top (float): 龍捲風頂端的 y 座標\n
+        width, height (int): 龍捲風的寬度和高度\n
+        rotation (float): 旋轉角度（度）\n
+        spacing (int): 每隔幾像素畫一層，越大層數越少
         """
-        # 畫龍捲風的螺旋形狀
-        center_x = self.x + self.width // 2
-        
         # 畫多個圓圈形成龍捲風效果
-        for i in range(0, self.height, 8):
+        for i in range(0, height, spacing):
             # 計算每層的寬度（上窄下寬）
-            layer_width = self.width * (i / self.height) * 0.8 + 5
+            layer_width = width * (i / height) * 0.8 + 5
             # 計算旋轉偏移
-            offset = math.sin(math.radians(self.rotation + i * 10)) * (layer_width / 4)
+            offset = math.sin(math.radians(rotation + i * 10)) * (layer_width / 4)
             
             # 繪製龍捲風的每一層
             layer_x = center_x + offset - layer_width // 2
-            layer_y = self.y + i
+            layer_y = top + i
             
             # 顏色漸變（上淺下深）
-            gray_value = int(200 - (i / self.height) * 100)
+            gray_value = int(200 - (i / height) * 100)
             color = (gray_value, gray_value, gray_value)
             
-            pygame.draw.ellipse(screen, color, 
+            pygame.draw.ellipse(surface, color, 
                               (int(layer_x), int(layer_y), int(layer_width), 6))
+
+    @classmethod
+    def get_frames(cls, width, height, steps=None, spacing=LAYER_SPACING):
+        """
+        取得某種大小的龍捲風所有旋轉畫面，第一次用到時才畫\n
+        \n
+        參數:\n
+        width, height (int): 龍捲風的寬度和高度\n
+        steps (int): 一圈要分成幾張，None 表示使用 settings.TORNADO_ROTATION_STEPS\n
+        spacing (int): 每隔幾像素畫一層橢圓\n
+        \n
+        回傳:\n
+        list: 透明背景的 Surface 列表，第 k 張是旋轉 k * 360 / steps 度的樣子
+        """
+        if steps is None:
+            steps = settings.TORNADO_ROTATION_STEPS
+        key = (width, height, steps, spacing)
+        frames = cls._frame_cache.get(key)
+        if frames is None:
+            half = cls._frame_half_width(width)
+            frames = []
+            for k in range(steps):
+                # 先塗滿透明色再畫，透明色的地方貼上去時會被略過
+                # 用透明色（colorkey）而不是每個像素帶透明度，貼圖快很多
+                frame = pygame.Surface((half * 2 + 1, height + 8))
+                frame.fill(cls.FRAME_COLORKEY)
+                # 在小圖裡中心位於 half，頂端往下留 1 像素，和 get_rect 的範圍一致
+                cls.draw_layers(frame, half, 1, width, height, k * 360.0 / steps, spacing)
+                # 已經有視窗時轉成和螢幕相同的格式，貼圖比較快
+                if pygame.display.get_surface() is not None:
+                    frame = frame.convert()
+                frame.set_colorkey(cls.FRAME_COLORKEY, pygame.RLEACCEL)
+                frames.append(frame)
+            cls._frame_cache[key] = frames
+        return frames
+
+    def draw(self, screen, camera_y=0, spacing=LAYER_SPACING):
+        """
+        繪製龍捲風\n
+        screen: pygame 螢幕物件\n
+        camera_y: 鏡頭的 y 座標，畫在畫面上的位置是 y - camera_y（捲動關卡用，預設 0）\n
+        spacing: 每隔幾像素畫一層橢圓（畫面品質降低時加大，層數變少）\n
+        \n
+        挑出最接近目前旋轉角度的預先畫好的畫面，一次貼上
+        """
+        frames = self.get_frames(self.width, self.height, None, spacing)
+        steps = len(frames)
+        # 把角度換算成最接近的那張畫面
+        frame = frames[int(round(self.rotation * steps / 360.0)) % steps]
+        half = self._frame_half_width(self.width)
+        center_x = int(self.x + self.width // 2)
+        screen.blit(frame, (center_x - half, int(self.y - camera_y) - 1))
     
+    def get_rect(self, camera_y=0):
+        """
+        取得龍捲風在畫面上可能佔用的矩形範圍\n
+        \n
+        最下面一層最寬，加上左右搖擺的偏移，畫出來會比 width 還寬一些\n
+        camera_y: 鏡頭的 y 座標，畫在畫面上的位置是 y - camera_y（捲動關卡用，預設 0）\n
+        返回值：pygame.Rect 物件
+        """
+        half = self._frame_half_width(self.width)
+        center_x = int(self.x + self.width // 2)
+        return pygame.Rect(center_x - half, int(self.y - camera_y) - 1, half * 2 + 1, self.height + 8)
+
     def check_collision(self, ball):
         """
         檢查是否與球碰撞\n
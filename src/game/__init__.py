@@ -3,6 +3,13 @@
 
 包含遊戲的核心邏輯：\n
 - GameEngine: 主要的遊戲引擎類別，負責遊戲循環、狀態管理和渲染\n
+- Simulation: 不畫圖的模擬核心，固定時間步長\n
+- Level: 關卡檔（JSON 原始檔和記憶體映射的二進位檔）\n
+- ChunkStreamer: 捲動關卡的區塊載入和釋放\n
+- snapshot: 二進位狀態快照（快速存檔）和差異式倒轉緩衝區 RewindBuffer\n
+- SimulationThread: 在背景執行緒照固定步調推進模擬，發布不可變的狀態快照給主執行緒畫\n
+- replay / batch / autopilot: 輸入錄製重播、行程池批次模擬、自動玩家\n
+- VecEnv: N 個同步前進的向量化環境，給自動底板控制器訓練用\n
 
 遊戲引擎處理：\n
 - 使用者輸入（滑鼠、鍵盤）\n
@@ -0,0 +1,78 @@
+######################載入套件######################
+"""
+自動玩家模組
+不需要真人操作，依照球的位置自動移動底板和發射球
+批次模擬、效能測試和重播錄製都可以用它產生「像人在玩」的輸入
+"""
+import random
+from src.game.simulation import FrameInput
+
+
+######################物件類別######################
+class Autopilot:
+    """
+    追著球跑的自動玩家\n
+    \n
+    屬性說明：\n
+    max_speed: 底板每一步最多能移動幾個像素（模擬人的反應速度）\n
+    aim_jitter: 每次接球時瞄準點的隨機偏移範圍（像素），讓球的路線有變化\n
+    aim_offset: 目前瞄準點相對球心的偏移\n
+    \n
+    說明:\n
+    - 球還沒發射時，底板不動、直接按發射\n
+    - 球往下掉時底板追著球心（加上偏移）移動，速度有上限，所以還是會漏接\n
+    - 每次球往上彈（接到球）就重新抽一次偏移\n
+    - 有自己的亂數來源，不會影響模擬核心的亂數，同樣的種子每次的操作都一樣\n
+    \n
+    使用範例:\n
+        pilot = Autopilot(seed=1)\n
+        while not sim.game_won:\n
+            sim.step(pilot.next_input(sim))
+    """
+    def __init__(self, seed=None, max_speed=12, aim_jitter=40):
+        """
+        初始化自動玩家\n
+        \n
+        參數:\n
+        seed (int): 亂數種子，None 表示隨機\n
+        max_speed (float): 底板每一步最多移動幾個像素，範圍 > 0\n
+        aim_jitter (float): 瞄準點偏移的範圍，範圍 >= 0
+        """
+        self.rng = random.Random(seed)
+        self.max_speed = max_speed
+        self.aim_jitter = aim_jitter
+        self.aim_offset = 0.0
+        self._was_rising = False
+        self._inputs = FrameInput()
+
+    def next_input(self, sim):
+        """
+        根據模擬目前的狀態決定這一步的輸入\n
+        \n
+        參數:\n
+        sim (Simulation): 模擬核心\n
+        \n
+        回傳:\n
+        FrameInput: 這一步的輸入（同一個物件會重複使用，請在下一次呼叫前用完）
+        """
+        inputs = self._inputs
+        inputs.clear_events()
+        ball = sim.ball
+        paddle_center = sim.paddle.x + sim.paddle.length / 2
+
+        if not ball.is_launched:
+            inputs.paddle_x = paddle_center
+            inputs.launch = True
+            return inputs
+
+        # 球剛被接住往上彈，換一個新的瞄準點
+        is_rising = ball.velocity_y < 0
+        if is_rising and not self._was_rising:
+            self.aim_offset = self.rng.uniform(-self.aim_jitter, self.aim_jitter)
+        self._was_rising = is_rising
+
+        # 往瞄準點移動，但一步最多移動 max_speed
+        target = ball.x + self.aim_offset
+        move = max(-self.max_speed, min(self.max_speed, target - paddle_center))
+        inputs.paddle_x = paddle_center + move
+        return inputs
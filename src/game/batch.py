@@ -0,0 +1,194 @@
+######################載入套件######################
+"""
+批次模擬模組
+用很多個行程同時跑很多局不開視窗的遊戲，收集每一局的統計資料
+用來調整遊戲平衡（龍捲風頻率、球速）或檢查改動有沒有讓遊戲變難
+
+- 每一局都是獨立的 Simulation + Autopilot，行程之間不共享任何狀態
+- 結果一局一局串流回來，不用等全部跑完才看得到
+- 每個行程各跑各的，核心數越多跑越快（幾乎是線性成長）
+"""
+import multiprocessing
+import os
+import time
+import numpy as np
+from config import settings
+from src.game.simulation import Simulation
+from src.game.autopilot import Autopilot
+
+
+######################物件類別######################
+class GameConfig:
+    """
+    一局批次模擬的設定\n
+    \n
+    屬性說明：\n
+    seed: 亂數種子（模擬核心和自動玩家都用它）\n
+    ball_speed: 球的初始速率\n
+    tornado_interval: 龍捲風生成間隔的範圍 (最短秒數, 最長秒數)\n
+    max_seconds: 最多玩幾秒遊戲時間，時間到還沒清空就算失敗\n
+    multiball: 多球模式額外加入的球數\n
+    collision_mode: 碰撞方式 'point' 或 'swept'
+    """
+    def __init__(self, seed, ball_speed=6, tornado_interval=(5, 10), max_seconds=600,
+                 multiball=0, collision_mode=settings.COLLISION_MODE):
+        self.seed = seed
+        self.ball_speed = ball_speed
+        self.tornado_interval = tuple(tornado_interval)
+        self.max_seconds = max_seconds
+        self.multiball = multiball
+        self.collision_mode = collision_mode
+
+
+class BatchSummary:
+    """
+    把很多局的結果彙整成統計數字\n
+    \n
+    屬性說明：\n
+    results: 收到的每一局結果（dict）\n
+    started: 開始計時的時間點\n
+    \n
+    使用範例:\n
+        summary = BatchSummary()\n
+        for result in run_batch(configs):\n
+            summary.add(result)\n
+        print(summary.summarize())
+    """
+    def __init__(self):
+        self.results = []
+        self.started = time.perf_counter()
+
+    def add(self, result):
+        """
+        加入一局的結果\n
+        result: run_game() 回傳的 dict
+        """
+        self.results.append(result)
+
+    def summarize(self, results=None):
+        """
+        計算統計數字\n
+        \n
+        參數:\n
+        results (list): 要統計的結果，None 表示全部\n
+        \n
+        回傳:\n
+        dict: games、clear_rate、clear_time 的平均/p50/p95（秒，只算有清空的局）、\n
+              平均龍捲風重來次數、平均掉球數、總模擬步數
+        """
+        if results is None:
+            results = self.results
+        if not results:
+            return {'games': 0}
+        clear_times = np.array([r['clear_time'] for r in results if r['clear_time'] is not None])
+        summary = {
+            'games': len(results),
+            'clear_rate': len(clear_times) / len(results),
+            'tornado_resets_mean': float(np.mean([r['tornado_resets'] for r in results])),
+            'balls_lost_mean': float(np.mean([r['balls_lost'] for r in results])),
+            'steps': int(sum(r['steps'] for r in results)),
+        }
+        if len(clear_times):
+            summary['clear_time_mean'] = float(clear_times.mean())
+            summary['clear_time_p50'] = float(np.percentile(clear_times, 50))
+            summary['clear_time_p95'] = float(np.percentile(clear_times, 95))
+        return summary
+
+    def by_group(self):
+        """
+        依照設定分組統計\n
+        返回值：{(球速, 龍捲風間隔): 統計 dict}
+        """
+        groups = {}
+        for result in self.results:
+            key = (result['ball_speed'], tuple(result['tornado_interval']))
+            groups.setdefault(key, []).append(result)
+        return {key: self.summarize(results) for key, results in sorted(groups.items())}
+
+    def throughput(self):
+        """
+        目前的整體速度\n
+        返回值：(每秒幾局, 每秒幾步)
+        """
+        elapsed = time.perf_counter() - self.started
+        if elapsed <= 0:
+            return 0.0, 0.0
+        steps = sum(r['steps'] for r in self.results)
+        return len(self.results) / elapsed, steps / elapsed
+
+
+######################定義函式區######################
+def run_game(config):
+    """
+    不開視窗、全速跑完一局\n
+    \n
+    參數:\n
+    config (GameConfig): 這一局的設定\n
+    \n
+    回傳:\n
+    dict: seed、ball_speed、tornado_interval、cleared（是否清空）、clear_time（清空花了幾秒遊戲時間，沒清空是 None）、\n
+          tornado_resets、balls_lost（含多球）、steps、elapsed（實際花了幾秒）\n
+    \n
+    說明:\n
+    - 這個函式會在子行程裡執行，參數和回傳值都只用可以 pickle 的簡單型別
+    """
+    start = time.perf_counter()
+    sim = Simulation(verbose=False, multiball=config.multiball, seed=config.seed,
+                     ball_speed=config.ball_speed, tornado_interval=config.tornado_interval)
+    sim.ball.collision_mode = config.collision_mode
+    sim.balls.collision_mode = config.collision_mode
+    pilot = Autopilot(seed=config.seed)
+    dt = settings.FIXED_DT
+    max_steps = int(config.max_seconds / dt)
+
+    while sim.frame < max_steps and sim.clear_frame is None:
+        sim.step(pilot.next_input(sim), dt)
+
+    return {
+        'seed': config.seed,
+        'ball_speed': config.ball_speed,
+        'tornado_interval': list(config.tornado_interval),
+        'cleared': sim.clear_frame is not None,
+        'clear_time': None if sim.clear_frame is None else sim.clear_frame * dt,
+        'tornado_resets': sim.tornado_resets,
+        'balls_lost': sim.balls_lost + sim.balls.lost_count,
+        'steps': sim.frame,
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def run_batch(configs, processes=None, chunksize=None):
+    """
+    用行程池同時跑很多局，每跑完一局就馬上回傳結果\n
+    \n
+    參數:\n
+    configs (list): GameConfig 列表\n
+    processes (int): 要用幾個行程，None 表示 CPU 核心數；1 表示直接在目前的行程跑（方便除錯）\n
+    chunksize (int): 每次交給一個行程幾局，None 表示自動決定\n
+    \n
+    回傳:\n
+    generator: 依照完成順序逐一產生 run_game() 的結果（不一定是 configs 的順序）\n
+    \n
+    說明:\n
+    - 每局的工作量差很多（有的很快清空、有的跑到時間上限），\n
+      用 imap_unordered 讓先做完的行程馬上拿下一批，核心不會閒著\n
+    - chunksize 讓每個行程一次拿幾局，減少行程之間來回傳資料的次數\n
+    - macOS 和 Windows 用 spawn 啟動子行程，子行程會重新匯入主程式，\n
+      所以呼叫這個函式的主程式要放在 if __name__ == '__main__': 底下，否則子行程會再建行程池而卡住
+    """
+    configs = list(configs)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = max(1, min(processes, len(configs) or 1))
+
+    if processes == 1:
+        for config in configs:
+            yield run_game(config)
+        return
+
+    if chunksize is None:
+        # 每個行程大約分到 8 批，兼顧負載平衡和傳輸次數
+        chunksize = max(1, len(configs) // (processes * 8))
+    with multiprocessing.Pool(processes) as pool:
+        for result in pool.imap_unordered(run_game, configs, chunksize):
+            yield result
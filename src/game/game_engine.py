@@ -1,20 +1,29 @@
 ######################載入套件######################
 """
 遊戲引擎模組
-負責管理整個遊戲的主循環、狀態更新和繪製
-包含所有遊戲物件的初始化、更新和碰撞檢測邏輯
+負責開視窗、讀取玩家輸入、把遊戲畫面畫出來
+遊戲規則本身交給 Simulation 模擬核心處理，這裡只是外面的一層互動殼
 """
+import contextlib
+import os
 import pygame
 import sys
-import random
+import threading
+import time
 from config import settings
-from config import colors as game_colors
-from src.entities.ball import Ball
-from src.entities.brick import Brick
-from src.entities.paddle import Paddle
-from src.entities.tornado import Tornado
-from src.entities.balloon import Balloon
-from src.utils.resource_loader import load_image
+from src.game.simulation import Simulation, FrameInput
+from src.game.replay import InputRecorder
+from src.game.snapshot import RewindBuffer, capture_state, restore_state
+from src.game.sim_thread import SimulationThread
+from src.rendering.brick_layer import BrickLayer
+from src.rendering.dirty_renderer import DirtyRectRenderer
+from src.rendering.interpolation import RenderInterpolator
+from src.rendering.quality import QualityController
+from src.utils.resource_loader import assets
+from src.utils.frame_timer import FrameProfiler
+from src.utils.frame_pacer import FramePacer
+from src.utils.sampling_profiler import SamplingProfiler
+from src.utils.alloc_tracker import AllocationTracker
 
 
 ######################物件類別######################
@@ -22,289 +31,476 @@ class GameEngine:
     """
     遊戲引擎類別\n
     
-    這是整個遊戲的核心控制器，負責：\n
-    1. 初始化所有遊戲物件（球、磚塊、底板等）\n
-    2. 管理遊戲主循環和事件處理\n
-    3. 處理物件間的碰撞檢測\n
-    4. 控制遊戲狀態（進行中、勝利等）\n
-    5. 管理特殊效果（龍捲風、慶祝氣球）
+    這是玩家實際操作的互動外殼，負責：\n
+    1. 初始化 Pygame 視窗和遊戲資源\n
+    2. 把滑鼠、鍵盤事件整理成 FrameInput\n
+    3. 用固定時間步長推動 Simulation 模擬核心\n
+    4. 照自己的節奏繪製所有遊戲元素（和物理步數無關，位置用內插）\n
+    \n
+    多執行緒模式（threaded=True）:\n
+    - sim 交給 SimulationThread 在背景照固定步調推進，主執行緒不再碰它\n
+    - 主執行緒另外有一個同關卡的 mirror，每幀載入最新發布的快照，只拿來畫圖\n
+    - 畫圖、送出畫面再慢，物理的步調都不受影響
     """
-    def __init__(self):
+    def __init__(self, profile=False, profile_csv=None, seed=None, record_path=None,
+                 level_path=settings.LEVEL_PATH, pacing=settings.FRAME_PACING, fps=settings.FPS,
+                 busy_loop=settings.BUSY_LOOP_PACING, interpolate=settings.INTERPOLATE,
+                 threaded=settings.THREADED_SIMULATION, sample_profile=None,
+                 sample_hz=settings.SAMPLE_PROFILE_HZ, track_alloc=False, quality=settings.QUALITY_LEVEL,
+                 adaptive_quality=settings.ADAPTIVE_QUALITY):
         """
         初始化遊戲引擎\n
         
         執行以下初始化步驟：\n
         1. 初始化 Pygame 系統\n
         2. 設定遊戲視窗和標題\n
-        3. 載入遊戲資源（圖片等）\n
-        4. 建立所有遊戲物件\n
-        5. 設定遊戲狀態變數
+        3. 建立模擬核心（所有遊戲物件都在裡面）\n
+        4. 載入遊戲資源（圖片等）\n
+        
+        參數:\n
+        profile (bool): 一開始就顯示每幀分段計時（遊戲中也可以按 F3 切換）\n
+        profile_csv (str): 把每幀分段耗時寫到這個 CSV 檔，None 表示不寫\n
+        seed (int): 亂數種子，None 表示隨機；同樣的種子和操作會得到一模一樣的遊戲過程\n
+        record_path (str): 把這局的種子和每一步的輸入錄到這個檔案（關閉視窗時存檔），None 表示不錄\n
+        level_path (str): 關卡檔路徑（.json 原始檔或 .btbl 二進位檔），相對路徑以專案根目錄為準，None 表示用內建的磚塊牆\n
+        pacing (str): 畫面節奏 'target'（照 fps 限速）、'vsync'（跟螢幕更新率）或 'uncapped'（不限速）\n
+        fps (int): 'target' 模式的畫面幀率，物理永遠是每秒 PHYSICS_HZ 步\n
+        busy_loop (bool): 'target' 模式用忙碌等待，幀間隔比較穩定但會吃滿一個核心\n
+        interpolate (bool): 畫面畫在上一步和這一步之間的內插位置\n
+        threaded (bool): 模擬在背景執行緒跑，主執行緒只畫最新發布的狀態\n
+        sample_profile (str): 一開始就用取樣分析器分析，結束時把呼叫堆疊寫到這個檔案，None 表示不分析（遊戲中也可以按 F4 切換）\n
+        sample_hz (float): 取樣分析器每秒取樣幾次\n
+        track_alloc (bool): 一開始就追蹤每幀的記憶體配置，結束時印出報告（遊戲中也可以按 F6 切換）\n
+        quality (str): 一開始的畫面品質等級（settings.QUALITY_PRESETS 的名稱）\n
+        adaptive_quality (bool): 依照每幀耗時自動調整畫面品質（遊戲中可以按 F7 切換自動 / 固定等級）
         """
         # 初始化 Pygame 系統
         pygame.init()
         
-        # 建立時鐘物件控制幀率
-        self.clock = pygame.time.Clock()
-        
-        # 設定遊戲視窗
-        self.screen = pygame.display.set_mode((settings.WIDTH, settings.HEIGHT))
+        # 設定遊戲視窗，vsync 需要 SCALED 視窗，顯示卡或驅動不支援時退回照目標幀率限速
+        size = (settings.WIDTH, settings.HEIGHT)
+        if pacing == 'vsync':
+            try:
+                self.screen = pygame.display.set_mode(size, pygame.SCALED, vsync=1)
+            except pygame.error as e:
+                print(f"⚠️ 無法開啟垂直同步（{e}），改用目標幀率 {fps} FPS")
+                pacing = 'target'
+                self.screen = pygame.display.set_mode(size)
+        else:
+            self.screen = pygame.display.set_mode(size)
         pygame.display.set_caption("Breaking the Block")
 
-        # 載入資源：優先嘗試新的資源路徑，失敗則回退到舊版 'image/' 資料夾
+        # 控制畫面節奏，量每一幀經過的真實時間
+        self.pacer = FramePacer(pacing, fps, busy_loop)
+
+        # 建立模擬核心，互動模式下要印出勝利等訊息
+        if level_path is not None:
+            level_path = assets.resolve(level_path)
+        self.sim = Simulation(settings.WIDTH, settings.HEIGHT, verbose=True, seed=seed, level=level_path)
+        # 多執行緒模式：主執行緒另外建一個一樣的關卡，只用來載入模擬執行緒發布的快照、畫圖
+        self.mirror = None
+        self.sim_thread = None
+        if threaded:
+            self.mirror = Simulation(settings.WIDTH, settings.HEIGHT, seed=self.sim.seed, level=level_path)
+        view = self.view
+
+        # 載入資源：有打包好的圖集就用圖集，再把清單上的圖片全部預先載入
+        # 清單上每個名稱會依序嘗試候選路徑（新的資源路徑優先，再回退到舊版 'image/' 資料夾）
+        assets.manifest.update(settings.ASSET_MANIFEST)
+        assets.load_atlas(settings.ASSET_ATLAS_INDEX)
+        assets.preload()
         # 這種做法確保與舊版本的相容性
-        ball_img = load_image('assets/images/ball/ball.png') or load_image('image/41QWjX05doL.png')
+        ball_img = assets.get('ball')
+        view.ball.image = ball_img  # 設定球的圖片
+        view.balls.image = ball_img  # 多球模式的球使用同一張圖片
 
-        # 創建磚塊陣列
-        self.bricks = []
-        
-        # 磚塊配置參數
-        brick_width = 75      # 每個磚塊的寬度
-        brick_height = 25     # 每個磚塊的高度
-        brick_spacing = 5     # 磚塊間的間距
-        
-        # 計算磚塊牆的位置（置中對齊）
-        wall_width = 10 * brick_width + 9 * brick_spacing  # 10 個磚塊 + 9 個間距
-        start_x = (settings.WIDTH - wall_width) // 2       # 水平置中
-        start_y = 50                                        # 距離頂部的距離
-        
-        # 定義每排磚塊的顏色（由上到下）
-        colors = [
-            (255, 0, 0),    # 紅色
-            (255, 165, 0),  # 橙色
-            (255, 255, 0),  # 黃色
-            (0, 255, 0),    # 綠色
-            (0, 0, 255),    # 藍色
-        ]
-        
-        # 建立 5 排 x 10 列的磚塊陣列
-        for row in range(5):
-            for col in range(10):
-                # 計算每個磚塊的位置
-                x = start_x + col * (brick_width + brick_spacing)
-                y = start_y + row * (brick_height + brick_spacing)
-                # 建立磚塊並加入陣列
-                self.bricks.append(Brick(x, y, brick_height, brick_width, colors[row]))
-
-        # 建立底板（玩家控制的板子）
-        paddle_width = 120                           # 底板寬度
-        paddle_height = 15                           # 底板高度
-        paddle_y = settings.HEIGHT - 50              # 距離底部的距離
-        paddle_x = (settings.WIDTH - paddle_width) // 2  # 水平置中
-        self.paddle = Paddle(paddle_x, paddle_y, paddle_height, paddle_width, game_colors.WHITE)
-
-        # 建立球物件
-        # 初始位置在底板中央上方
-        initial_ball_x = self.paddle.x + self.paddle.length / 2
-        initial_ball_y = self.paddle.y - 12
-        self.ball = Ball(game_colors.WHITE, 12, initial_ball_x, initial_ball_y, speed=6)
-        self.ball.image = ball_img  # 設定球的圖片
-
-        # 遊戲狀態控制
-        self.game_won = False                    # 是否勝利
-        self.victory_balloons = []               # 慶祝氣球列表
-        self.balloon_spawn_timer = 0             # 氣球生成計時器
-        self.balloon_spawn_interval = 0.1        # 氣球生成間隔（秒）
-
-        # 龍捲風系統
-        self.tornadoes = []                      # 龍捲風列表
-        self.tornado_spawn_timer = 0             # 龍捲風生成計時器
-        self.tornado_spawn_interval = random.uniform(5, 10)  # 隨機生成間隔 5-10 秒
-
-    def check_victory(self):
-        """
-        檢查遊戲是否勝利\n
-        
-        遍歷所有磚塊，檢查是否都已被擊中\n
-        返回值：True 表示所有磚塊都已被擊中（勝利），False 表示還有磚塊未被擊中
+        # 磚塊牆先畫在離屏畫布上，每幀只要貼一次
+        self.brick_layer = BrickLayer(view.bricks, (settings.WIDTH, settings.HEIGHT), view.brick_grid)
+        # 局部更新模式只送出有變動的矩形，否則每幀更新整個畫面
+        self.dirty_renderer = None
+        if settings.RENDER_MODE == 'dirty':
+            self.dirty_renderer = DirtyRectRenderer(self.screen, self.brick_layer, settings.DIRTY_RECT_LIMIT)
+
+        # 畫面品質：電腦跟不上時自動降級（F7 切換自動 / 固定等級），預算是一幀的時間
+        self.quality = QualityController(level=quality, adaptive=adaptive_quality, budget_ms=1000.0 / fps)
+
+        # 還沒被模擬消化掉的時間（秒），累積滿一步才推進模擬
+        self.accumulator = 0.0
+        # 記住上一步的位置，畫面幀率和物理步數對不齊時用內插位置畫
+        self.interpolator = RenderInterpolator(interpolate)
+        # 還沒送進模擬的輸入，發射和點擊要等到真的跑了一步才清掉
+        self.pending_input = FrameInput()
+
+        # 每幀分段計時，關閉時幾乎沒有成本；模擬核心共用同一個計時器
+        # （多執行緒模式下模擬在另一條執行緒，不共用，計時只看主執行緒的讀輸入、畫圖和送出畫面）
+        self.profiler = FrameProfiler()
+        if not threaded:
+            self.sim.profiler = self.profiler
+        if profile:
+            self.profiler.toggle_hud()
+        if profile_csv:
+            self.profiler.open_csv(profile_csv)
+        self.profiler.hud_status = self.quality.status_line()
+
+        # 輸入錄製：模擬還沒跑任何一步之前就要開始錄
+        self.record_path = record_path
+        self.recorder = InputRecorder(self.sim) if record_path else None
+
+        # 快速存檔（F5 存、F9 讀）和倒轉（按住 Backspace）
+        # 錄製中不能讀檔或倒轉，不然錄下來的輸入就重播不出同樣的遊戲
+        self.quicksave = None
+        self.rewind = RewindBuffer()
+        self.is_rewinding = False
+        if self.recorder is None:
+            self.rewind.push(self.sim)
+
+        # 多執行緒模式：模擬執行緒在 run() 裡才開始跑，建立時就先發布初始狀態
+        if threaded:
+            self.sim_thread = SimulationThread(self.sim, self.advance)
+            self.shown_state = None
+
+        # 取樣分析（F4 開始 / 停止），取樣主執行緒，多執行緒模式也取樣模擬執行緒
+        self.sample_profile_path = sample_profile
+        self.sampler = SamplingProfiler(sample_hz)
+        self.sampler.add_thread('main', threading.current_thread(), self.profiler)
+        if self.sim_thread is not None:
+            self.sampler.add_thread('simulation', self.sim_thread, self.sim.profiler)
+        if sample_profile:
+            self.sampler.start()
+
+        # 每幀記憶體配置追蹤（F6 開始 / 停止），開著時會變慢，只在找問題時用
+        self.alloc_tracker = AllocationTracker()
+        if track_alloc:
+            self.alloc_tracker.start()
+
+    @property
+    def view(self):
+        """
+        畫圖用的模擬核心：多執行緒模式是 mirror，否則就是 sim 本身
         """
-        for brick in self.bricks:
-            if not brick.is_hit:
-                return False  # 發現未被擊中的磚塊
-        return True  # 所有磚塊都被擊中
+        return self.mirror if self.mirror is not None else self.sim
 
-    def spawn_balloon(self):
+    def poll_input(self):
         """
-        生成勝利慶祝氣球\n
+        讀取這一幀的所有 pygame 事件並整理到 pending_input\n
         
-        在螢幕底部隨機位置生成一個彩色氣球\n
-        氣球具有隨機的顏色和大小\n
-        返回值：新創建的 Balloon 物件
-        """
-        # 隨機水平位置（避免太靠近邊緣）
-        x = random.randint(50, settings.WIDTH - 50)
-        # 從螢幕底部下方開始
-        y = settings.HEIGHT + 50
-        
-        # 隨機選擇氣球顏色
-        color = random.choice([
-            (255, 100, 100),  # 淺紅色
-            (100, 255, 100),  # 淺綠色
-            (100, 100, 255),  # 淺藍色
-            (255, 255, 100),  # 淺黃色
-            (255, 100, 255),  # 淺紫色
-            (100, 255, 255),  # 淺青色
-            (255, 200, 100),  # 淺橙色
-            (200, 100, 255),  # 淺紫羅蘭色
-        ])
-        
-        # 隨機氣球大小
-        size = random.randint(15, 25)
-        
-        return Balloon(x, y, color, size)
+        副作用:\n
+        - 使用者關閉視窗時直接結束程式
+        """
+        # 滑鼠位置就是底板中心
+        mouse_x, _ = pygame.mouse.get_pos()
+        self.pending_input.paddle_x = mouse_x
+        # 按住 Backspace 的期間每一步都倒轉一步
+        self.is_rewinding = self.recorder is None and pygame.key.get_pressed()[pygame.K_BACKSPACE]
+
+        # 處理所有事件
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                # 使用者點擊關閉按鈕
+                self.shutdown()
+                sys.exit()
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                # 滑鼠點擊事件（用於測試，點擊磚塊可直接擊中）
+                self.pending_input.clicks.append(event.pos)
+            elif event.type == pygame.KEYDOWN:
+                # 鍵盤按鍵事件
+                if event.key == pygame.K_SPACE:
+                    # 空白鍵發射球
+                    self.pending_input.launch = True
+                elif event.key == pygame.K_F3:
+                    # F3 切換分段計時顯示
+                    self.profiler.toggle_hud()
+                    # 統計框消失時要整個重畫，不然會留下殘影
+                    if self.dirty_renderer is not None:
+                        self.dirty_renderer.request_full_redraw()
+                elif event.key == pygame.K_F4:
+                    # F4 開始 / 停止取樣分析
+                    self.toggle_sampling()
+                elif event.key == pygame.K_F6:
+                    # F6 開始 / 停止記憶體配置追蹤，停止時印出報告
+                    if self.alloc_tracker.toggle():
+                        print("開始追蹤記憶體配置（會變慢），再按 F6 停止")
+                    else:
+                        print(self.alloc_tracker.report())
+                elif event.key == pygame.K_F7:
+                    # F7 切換畫面品質：自動 → 固定的每個等級 → 自動
+                    self.quality.cycle()
+                    self.report_quality()
+                elif event.key == pygame.K_F5:
+                    # F5 快速存檔
+                    self.run_on_sim(self.save_quicksave)
+                elif event.key == pygame.K_F9:
+                    # F9 讀取快速存檔，畫面可能整個不一樣，整個重畫
+                    self.run_on_sim(self.load_quicksave)
+                    if self.dirty_renderer is not None:
+                        self.dirty_renderer.request_full_redraw()
 
-    def spawn_tornado(self):
+    def run_on_sim(self, function):
         """
-        生成龍捲風障礙物\n
-        
-        在螢幕頂部隨機位置生成一個龍捲風\n
-        龍捲風會向下移動，碰到球時會重置遊戲\n
-        返回值：新創建的 Tornado 物件
-        """
-        # 隨機水平位置
-        x = random.randint(0, settings.WIDTH - 30)
-        # 從螢幕頂部上方開始
-        y = -80
-        
-        return Tornado(x, y)
+        在擁有模擬核心的執行緒上執行某個函式\n
+        function: 沒有參數的函式\n
+        多執行緒模式下交給模擬執行緒在兩步之間執行，否則馬上執行
+        """
+        if self.sim_thread is not None:
+            self.sim_thread.call(function)
+        else:
+            function()
+
+    def toggle_sampling(self):
+        """
+        開始或停止取樣分析，停止時把呼叫堆疊寫成檔案\n
+        返回值：停止時回傳寫入的檔案路徑，開始時回傳 None
+        """
+        if not self.sampler.is_running:
+            self.sampler.start()
+            print(f"開始取樣分析（每秒 {self.sampler.hz} 次），再按 F4 停止")
+            return None
+        return self.stop_sampling()
+
+    def stop_sampling(self):
+        """
+        停止取樣分析，把結果寫到 sample_profile_path（沒指定時寫到 SAMPLE_PROFILE_DIR，檔名帶時間）\n
+        返回值：寫入的檔案路徑
+        """
+        self.sampler.stop()
+        path = self.sample_profile_path
+        if not path:
+            path = os.path.join(settings.SAMPLE_PROFILE_DIR, time.strftime('sample-%Y%m%d-%H%M%S.folded'))
+        self.sampler.write_collapsed(path)
+        print(self.sampler.summary())
+        print(f"已把取樣結果寫到 {path}（flamegraph.pl、speedscope 都能讀）")
+        return path
+
+    def report_quality(self):
+        """
+        畫面品質換了：印出目前的等級，並更新分段計時統計框上顯示的等級\n
+        局部更新模式下換等級後整個重畫一次（氣球高光、龍捲風層數不一樣，舊的樣子要蓋掉）
+        """
+        print(self.quality.describe())
+        self.profiler.hud_status = self.quality.status_line()
+        if self.dirty_renderer is not None:
+            self.dirty_renderer.request_full_redraw()
+
+    def save_quicksave(self):
+        """
+        快速存檔：把模擬目前的狀態存在記憶體裡
+        """
+        self.quicksave = capture_state(self.sim)
+        print(f"已快速存檔（第 {self.sim.frame} 步，{len(self.quicksave)} 位元組）")
+
+    def load_quicksave(self):
+        """
+        讀取快速存檔\n
+        \n
+        副作用:\n
+        - 模擬回到存檔時的狀態，倒轉記錄會多一步（倒轉可以回到讀檔之前）\n
+        - 錄製中或還沒存檔時只印出訊息，不做任何事
+        """
+        if self.recorder is not None:
+            print("錄製中不能讀取快速存檔")
+            return
+        if self.quicksave is None:
+            print("還沒有快速存檔（按 F5 存檔）")
+            return
+        restore_state(self.sim, self.quicksave)
+        self.rewind.push(self.sim)
+        print(f"已讀取快速存檔（第 {self.sim.frame} 步）")
 
-    def restart_game(self):
+    def shutdown(self):
         """
-        重新開始遊戲\n
+        結束遊戲前的收尾：停下取樣分析、記憶體追蹤和模擬執行緒，存下錄製檔、取樣結果和計時資料，關閉 pygame
+        """
+        if self.sampler.is_running:
+            self.stop_sampling()
+        if self.alloc_tracker.is_enabled:
+            self.alloc_tracker.stop()
+            print(self.alloc_tracker.report())
+        if self.sim_thread is not None:
+            self.sim_thread.stop()
+        if self.recorder is not None:
+            self.recorder.save(self.record_path, self.sim)
+            print(f"已錄製 {self.recorder.steps} 步到 {self.record_path}（種子 {self.sim.seed}）")
+        self.profiler.close_csv()
+        pygame.quit()
+
+    def draw_sprites(self, surface):
+        """
+        畫出所有會動的物件（磚塊牆以外的東西）\n
+        surface: 要畫上去的畫面\n
+        物件都用世界座標，畫的時候減掉鏡頭位置（一般關卡鏡頭固定在 0）\n
+        龍捲風層數、氣球數量和高光、球的縮放方式照目前的畫面品質
+        """
+        sim = self.view
+        camera_y = sim.camera_y
+        preset = self.quality.preset
+
+        # 1. 繪製底板
+        sim.paddle.draw(surface, camera_y)
         
-        重置所有遊戲狀態到初始狀態：\n
-        1. 清除勝利狀態和慶祝氣球\n
-        2. 恢復所有磚塊\n
-        3. 將球重置到底板上方
-        """
-        # 重置遊戲狀態
-        self.game_won = False
-        self.victory_balloons.clear()
+        # 2. 繪製球
+        sim.ball.draw(surface, camera_y, preset['smooth_scale'])
+        sim.balls.draw(surface, camera_y, preset['smooth_scale'])
         
-        # 恢復所有磚塊
-        for brick in self.bricks:
-            brick.is_hit = False
+        # 3. 繪製勝利氣球（僅在勝利時）
+        if sim.game_won:
+            sim.victory_balloons.draw(surface, camera_y, preset['balloon_draw_cap'],
+                                      preset['balloon_highlight'])
         
-        # 將球重置到底板中央上方
-        self.ball.reset_to(self.paddle.x + self.paddle.length / 2, self.paddle.y - self.ball.size)
+        # 4. 繪製龍捲風
+        spacing = preset['tornado_layer_spacing']
+        for tornado in sim.tornadoes:
+            tornado.draw(surface, camera_y, spacing)
+
+    def draw(self, alpha=None):
+        """
+        把模擬核心目前的狀態畫到螢幕上\n
+        alpha: 距離上一步過了幾分之一步（0 到 1），物件畫在內插位置；None 表示直接畫最新一步的位置
+        """
+        profiler = self.profiler
+        sim = self.view
+
+        interpolated = contextlib.nullcontext() if alpha is None else self.interpolator.apply(sim, alpha)
+        with profiler.phase('draw'), interpolated:
+            # 捲動關卡：區塊換了就換磚塊圖層用的空間索引，鏡頭移動了就把圖層捲過去
+            if self.brick_layer.brick_grid is not sim.brick_grid:
+                self.brick_layer.set_bricks(sim.bricks, sim.brick_grid)
+            self.brick_layer.scroll_to(sim.camera_y)
+
+            if self.dirty_renderer is not None:
+                # 局部更新模式：只修補有變動的矩形
+                self.dirty_renderer.compose(sim, self.draw_sprites)
+                self.dirty_renderer.add_update_rect(profiler.draw_hud(self.screen))
+            else:
+                # 貼上磚塊圖層（已經包含黑色背景，等於清空螢幕再畫所有磚塊）
+                self.brick_layer.draw(self.screen)
+
+                # 畫所有會動的物件
+                self.draw_sprites(self.screen)
+                profiler.draw_hud(self.screen)
+
+        # 畫完了就算這一幀的耗時（送出畫面不算，開垂直同步時會等螢幕），需要的話換畫面品質
+        if self.quality.end_frame():
+            self.report_quality()
+
+        with profiler.phase('display'):
+            # 更新螢幕顯示
+            if self.dirty_renderer is not None:
+                self.dirty_renderer.present()
+            else:
+                pygame.display.update()
+
+    def advance(self, inputs, is_rewinding=False):
+        """
+        讓模擬前進一步（倒轉中則是往回一步），在擁有模擬核心的執行緒上呼叫\n
+        \n
+        參數:\n
+        inputs (FrameInput): 這一步的輸入\n
+        is_rewinding (bool): 是否正在倒轉\n
+        \n
+        副作用:\n
+        - 錄製中會記下這一步的輸入，否則把這一步記進倒轉緩衝區
+        """
+        sim = self.sim
+        if is_rewinding:
+            with sim.profiler.phase('rewind'):
+                self.rewind.rewind(sim)
+            return
+        if self.recorder is not None:
+            self.recorder.record(inputs)
+        sim.step(inputs, settings.FIXED_DT)
+        if self.recorder is not None:
+            self.recorder.after_step(sim)
+        else:
+            # 每一步都記下和上一步的差異，隨時可以倒轉
+            with sim.profiler.phase('rewind'):
+                self.rewind.push(sim)
 
     def run(self):
         """
         主遊戲循環\n
         
-        這是遊戲的核心循環，負責：\n
-        1. 控制遊戲幀率\n
-        2. 處理使用者輸入（滑鼠、鍵盤）\n
-        3. 更新所有遊戲物件狀態\n
-        4. 檢查碰撞和遊戲狀態\n
-        5. 繪製所有遊戲元素\n
-        6. 管理特殊效果（龍捲風、慶祝氣球）
+        每一幀做三件事：\n
+        1. 讀取玩家輸入\n
+        2. 依照經過的真實時間，用固定步長推進模擬（可能 0 步或好幾步）\n
+        3. 繪製畫面，物件畫在上一步和這一步之間（剩下的累積時間佔一步的比例）\n
+        \n
+        物理步長固定，畫面幀率是 30、60 還是 240 都只影響畫幾次，不影響遊戲結果\n
+        多執行緒模式改跑 run_threaded()
+        """
+        if self.sim_thread is not None:
+            self.run_threaded()
+            return
+
+        fixed_dt = settings.FIXED_DT
+        while True:
+            # 等到這一幀該開始的時間，並量出和上一幀相隔多久
+            dt = self.pacer.tick()
+
+            # 分段計時從等待幀率之後開始算，等待的時間不算在這一幀裡
+            self.profiler.begin_frame()
+            self.alloc_tracker.begin_frame()
+            self.quality.begin_frame()
+
+            with self.profiler.phase('input'):
+                self.poll_input()
+
+            # 累積時間，畫面卡太久時只補有限的步數，避免越補越慢
+            self.accumulator += min(dt, fixed_dt * settings.MAX_FRAME_STEPS)
+
+            # 每累積滿一步的時間就讓模擬前進一步（倒轉中則是往回一步）
+            while self.accumulator >= fixed_dt:
+                self.interpolator.capture(self.sim)
+                self.advance(self.pending_input, self.is_rewinding)
+                self.pending_input.clear_events()
+                self.accumulator -= fixed_dt
+
+            self.draw(self.accumulator / fixed_dt)
+            self.alloc_tracker.end_frame()
+            self.profiler.end_frame()
+
+    def sync_view(self):
+        """
+        多執行緒模式：模擬執行緒發布了新的狀態，就載入到 mirror\n
+        返回值：目前畫的那份 PublishedState
+        """
+        state = self.sim_thread.latest()
+        if state is not self.shown_state:
+            # 載入前先記住舊的位置，畫面在兩份狀態之間內插
+            self.interpolator.capture(self.mirror)
+            restore_state(self.mirror, state.data)
+            self.shown_state = state
+        return state
+
+    def run_threaded(self):
         """
+        多執行緒模式的主循環\n
+        \n
+        主執行緒每一幀只做：\n
+        1. 讀取玩家輸入，交給模擬執行緒\n
+        2. 載入模擬執行緒最新發布的狀態\n
+        3. 繪製畫面，內插比例是距離發布過了幾分之一步\n
+        \n
+        模擬執行緒發生例外時，在主執行緒收尾後重新拋出
+        """
+        fixed_dt = settings.FIXED_DT
+        self.sim_thread.start()
         while True:
-            # 控制遊戲幀率並計算時間差
-            dt_ms = self.clock.tick(settings.FPS)  # 限制為設定的 FPS
-            dt = dt_ms / 1000.0  # 轉換為秒數，用於物理運算
-
-            # 檢查勝利條件
-            if not self.game_won and self.check_victory():
-                self.game_won = True
-                print("恭喜！你贏了！🎉")
-
-            # 滑鼠控制底板移動
-            mouse_x, _ = pygame.mouse.get_pos()
-            new_paddle_x = mouse_x - self.paddle.length // 2  # 滑鼠位置為底板中心
-            
-            # 限制底板不能移出螢幕邊界
-            if new_paddle_x < 0:
-                new_paddle_x = 0
-            elif new_paddle_x + self.paddle.length > settings.WIDTH:
-                new_paddle_x = settings.WIDTH - self.paddle.length
-            
-            self.paddle.x = new_paddle_x
-
-            # 處理所有事件
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    # 使用者點擊關閉按鈕
-                    pygame.quit()
-                    sys.exit()
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    # 滑鼠點擊事件（用於測試，點擊磚塊可直接擊中）
-                    mx, my = pygame.mouse.get_pos()
-                    for brick in self.bricks:
-                        if brick.check_collision(mx, my):
-                            print(f"磚塊被擊中！位置: ({mx}, {my})")
-                elif event.type == pygame.KEYDOWN:
-                    # 鍵盤按鍵事件
-                    if event.key == pygame.K_SPACE:
-                        # 空白鍵發射球
-                        self.ball.launch()
-
-            # 勝利狀態：管理慶祝氣球
-            if self.game_won:
-                # 更新氣球生成計時器
-                self.balloon_spawn_timer += dt
-                
-                # 定期生成新氣球（最多 30 個）
-                if self.balloon_spawn_timer >= self.balloon_spawn_interval and len(self.victory_balloons) < 30:
-                    self.victory_balloons.append(self.spawn_balloon())
-                    self.balloon_spawn_timer = 0
-                
-                # 更新所有氣球並移除飄出螢幕的氣球
-                for balloon in self.victory_balloons[:]:  # 使用切片複製列表，避免迭代時修改
-                    balloon.update(dt)
-                    if balloon.is_off_screen():
-                        self.victory_balloons.remove(balloon)
-
-            # 遊戲進行中：管理龍捲風障礙物
-            if not self.game_won:
-                # 更新龍捲風生成計時器
-                self.tornado_spawn_timer += dt
-                
-                # 達到生成間隔時建立新龍捲風
-                if self.tornado_spawn_timer >= self.tornado_spawn_interval:
-                    self.tornadoes.append(self.spawn_tornado())
-                    self.tornado_spawn_timer = 0
-                    # 設定下次生成的隨機間隔
-                    self.tornado_spawn_interval = random.uniform(5, 10)
-
-            # 更新所有龍捲風
-            for tornado in self.tornadoes[:]:  # 使用切片複製列表
-                tornado.update(dt)
-                
-                # 檢查龍捲風與球的碰撞
-                if tornado.check_collision(self.ball):
-                    # 龍捲風碰到球，重新開始遊戲
-                    self.restart_game()
-                    self.tornadoes.clear()  # 清除所有龍捲風
-                    break  # 跳出迴圈
-                
-                # 移除離開螢幕的龍捲風
-                if tornado.is_off_screen(settings.HEIGHT):
-                    self.tornadoes.remove(tornado)
-
-            # 繪製所有遊戲元素
-            # 1. 清空螢幕（填入黑色背景）
-            self.screen.fill(game_colors.BLACK)
-            
-            # 2. 繪製所有磚塊
-            for brick in self.bricks:
-                brick.draw(self.screen)
-            
-            # 3. 繪製底板
-            self.paddle.draw(self.screen)
-            
-            # 4. 更新並繪製球
-            self.ball.update(dt, settings.WIDTH, settings.HEIGHT, self.paddle, self.bricks)
-            self.ball.draw(self.screen)
-            
-            # 5. 繪製勝利氣球（僅在勝利時）
-            if self.game_won:
-                for balloon in self.victory_balloons:
-                    balloon.draw(self.screen)
-            
-            # 6. 繪製龍捲風
-            for tornado in self.tornadoes:
-                tornado.draw(self.screen)
-            
-            # 7. 更新螢幕顯示
-            pygame.display.update()
+            self.pacer.tick()
+            self.profiler.begin_frame()
+            self.alloc_tracker.begin_frame()
+            self.quality.begin_frame()
+
+            with self.profiler.phase('input'):
+                self.poll_input()
+                self.sim_thread.post_input(self.pending_input, self.is_rewinding)
+                self.pending_input.clear_events()
+
+            if self.sim_thread.error is not None:
+                error = self.sim_thread.error
+                self.shutdown()
+                raise error
+
+            state = self.sync_view()
+            self.draw((time.perf_counter() - state.published_at) / fixed_dt)
+            self.alloc_tracker.end_frame()
+            self.profiler.end_frame()
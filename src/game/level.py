@@ -0,0 +1,370 @@
+######################載入套件######################
+"""
+關卡檔案模組
+關卡（磚塊牆）可以用兩種格式存放：
+- JSON 原始檔：給人看、給人改，可以逐塊列出磚塊，也可以用「格子」一次描述整片規則排列的磚塊
+- 二進位檔（.btbl）：緊湊、載入時直接記憶體映射（memmap），十萬塊磚的關卡也幾乎瞬間開好
+
+二進位檔格式（小端序）:
+- 開頭 8 個位元組 b'BTBLVL1\\n'
+- uint32 資料起點（標頭長度，對齊到 8 個位元組）、uint32 磚塊數量 N
+- uint16 場地寬、uint16 場地高、uint16 關卡名稱長度，接著是 UTF-8 名稱
+- 資料區依序是：x、y、寬、高（各 N 個 float32）、顏色（N x 3 個 uint8）、耐久度（N 個 uint8）
+  每一欄連續存放，載入後可以直接當成 BrickStore 的陣列使用，不用複製
+
+JSON 原始檔格式:
+    {
+      "name": "classic", "width": 800, "height": 600,
+      "grids": [{"x": 5, "y": 50, "cols": 10, "rows": 5, "brick_width": 75, "brick_height": 25,
+                 "spacing": 5, "colors": [[255, 0, 0], ...每一排一個], "hit_points": [1, ...每一排一個]}],
+      "bricks": [{"x": 0, "y": 0, "width": 10, "height": 10, "color": [255, 255, 255], "hit_points": 2}]
+    }
+    grids 和 bricks 都可以省略；格子裡的磚塊排在逐塊列出的磚塊前面，每個格子由上到下、由左到右
+"""
+import json
+import struct
+import numpy as np
+from src.entities.brick_store import BrickStore
+
+
+######################初始化設定######################
+LEVEL_MAGIC = b'BTBLVL1\n'
+_HEADER = struct.Struct('<8sIIHHH')
+
+
+######################物件類別######################
+class Level:
+    """
+    一個關卡的磚塊資料（全部用欄位陣列存放）\n
+    \n
+    屬性說明：\n
+    name: 關卡名稱\n
+    width, height: 關卡設計時的場地大小\n
+    x, y, length, height_array: 磚塊左上角座標和寬高（float32，長度 count）\n
+    colors: 顏色，形狀 (count, 3)（uint8）\n
+    hit_points: 每塊磚要撞幾次才會碎（uint8，1-255）\n
+    count: 磚塊數量\n
+    \n
+    使用範例:\n
+        level = Level.load('levels/classic.json')\n
+        store = level.to_store()\n
+        bricks = store.bricks
+    """
+    def __init__(self, name, width, height, x, y, length, brick_height, colors, hit_points):
+        """
+        用欄位陣列建立關卡\n
+        \n
+        參數:\n
+        name (str): 關卡名稱\n
+        width, height (int): 場地大小\n
+        x, y, length, brick_height (array-like): 每塊磚的左上角座標和寬高\n
+        colors (array-like): 每塊磚的顏色，形狀 (count, 3)\n
+        hit_points (array-like): 每塊磚的耐久度
+        """
+        self.name = name
+        self.width = int(width)
+        self.height = int(height)
+        self.x = np.asarray(x, dtype=np.float32)
+        self.y = np.asarray(y, dtype=np.float32)
+        self.length = np.asarray(length, dtype=np.float32)
+        self.height_array = np.asarray(brick_height, dtype=np.float32)
+        self.colors = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+        self.hit_points = np.asarray(hit_points, dtype=np.uint8)
+        self.count = len(self.x)
+
+    ######################載入######################
+    @classmethod
+    def load(cls, path):
+        """
+        依照副檔名載入關卡（.json 是原始檔，其他當作二進位檔）\n
+        \n
+        參數:\n
+        path (str): 關卡檔路徑\n
+        \n
+        回傳:\n
+        Level: 載入的關卡\n
+        \n
+        例外:\n
+        ValueError: 檔案格式不正確
+        """
+        if path.lower().endswith('.json'):
+            return cls.load_json(path)
+        return cls.load_binary(path)
+
+    @classmethod
+    def load_json(cls, path):
+        """
+        讀取 JSON 原始檔，把格子展開成一塊一塊的磚\n
+        path: 檔案路徑\n
+        返回值：Level 物件
+        """
+        with open(path, encoding='utf-8') as f:
+            source = json.load(f)
+        return cls.from_source(source)
+
+    @classmethod
+    def from_source(cls, source):
+        """
+        把 JSON 原始檔的內容（dict）轉成關卡\n
+        \n
+        參數:\n
+        source (dict): JSON 原始檔的內容\n
+        \n
+        回傳:\n
+        Level: 展開後的關卡\n
+        \n
+        例外:\n
+        ValueError: 缺少必要欄位、欄位型別錯誤，或耐久度、顏色超出 uint8 的範圍
+        """
+        columns = {'x': [], 'y': [], 'length': [], 'height': [], 'colors': [], 'hit_points': []}
+        try:
+            for grid in source.get('grids', []):
+                cols = int(grid['cols'])
+                rows = int(grid['rows'])
+                brick_width = float(grid['brick_width'])
+                brick_height = float(grid['brick_height'])
+                spacing = float(grid.get('spacing', 0))
+                colors = grid['colors']
+                hit_points = grid.get('hit_points', [1] * rows)
+                # 由上到下、由左到右，和原本 build_bricks 的順序相同
+                for row in range(rows):
+                    for col in range(cols):
+                        columns['x'].append(grid['x'] + col * (brick_width + spacing))
+                        columns['y'].append(grid['y'] + row * (brick_height + spacing))
+                        columns['length'].append(brick_width)
+                        columns['height'].append(brick_height)
+                        columns['colors'].append(colors[row % len(colors)])
+                        columns['hit_points'].append(hit_points[row % len(hit_points)])
+            for brick in source.get('bricks', []):
+                columns['x'].append(brick['x'])
+                columns['y'].append(brick['y'])
+                columns['length'].append(brick['width'])
+                columns['height'].append(brick['height'])
+                columns['colors'].append(brick['color'])
+                columns['hit_points'].append(brick.get('hit_points', 1))
+            # 二進位檔用 uint8 存耐久度，超出範圍的值轉換時會直接出錯，先檢查才能說清楚是哪一塊
+            for index, value in enumerate(columns['hit_points']):
+                if not 1 <= int(value) <= 255:
+                    raise ValueError(f"第 {index} 塊磚的耐久度 {value} 必須在 1 到 255 之間")
+            return cls(source.get('name', ''), source.get('width', 800), source.get('height', 600),
+                       columns['x'], columns['y'], columns['length'], columns['height'],
+                       columns['colors'] or np.zeros((0, 3)), columns['hit_points'])
+        except (KeyError, TypeError, ValueError, ZeroDivisionError, OverflowError) as e:
+            raise ValueError(f"關卡原始檔格式錯誤: {e}") from e
+
+    @classmethod
+    def load_binary(cls, path):
+        """
+        記憶體映射方式讀取二進位關卡檔\n
+        \n
+        參數:\n
+        path (str): 檔案路徑\n
+        \n
+        回傳:\n
+        Level: 欄位陣列直接指向檔案內容（唯讀），不會一次讀進整個檔案\n
+        \n
+        例外:\n
+        ValueError: 不是關卡檔或檔案長度不對
+        """
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        if len(data) < _HEADER.size:
+            raise ValueError(f"關卡檔太短: {path}")
+        magic, data_offset, count, width, height, name_length = _HEADER.unpack(data[:_HEADER.size].tobytes())
+        if magic != LEVEL_MAGIC:
+            raise ValueError(f"不是關卡檔: {path}")
+        name = data[_HEADER.size:_HEADER.size + name_length].tobytes().decode('utf-8')
+        if data_offset + count * 20 > len(data):
+            raise ValueError(f"關卡檔長度不對（應該有 {count} 塊磚）: {path}")
+
+        def column(offset, dtype, items):
+            size = np.dtype(dtype).itemsize * items
+            return data[offset:offset + size].view(dtype), offset + size
+
+        offset = data_offset
+        x, offset = column(offset, '<f4', count)
+        y, offset = column(offset, '<f4', count)
+        length, offset = column(offset, '<f4', count)
+        brick_height, offset = column(offset, '<f4', count)
+        colors, offset = column(offset, np.uint8, count * 3)
+        hit_points, offset = column(offset, np.uint8, count)
+        return cls(name, width, height, x, y, length, brick_height, colors, hit_points)
+
+    ######################儲存######################
+    def save_binary(self, path):
+        """
+        寫出二進位關卡檔\n
+        path: 檔案路徑
+        """
+        name = self.name.encode('utf-8')
+        header_size = _HEADER.size + len(name)
+        # 資料區對齊到 8 個位元組，float32 欄位記憶體映射後可以直接使用
+        data_offset = (header_size + 7) // 8 * 8
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(LEVEL_MAGIC, data_offset, self.count, self.width, self.height, len(name)))
+            f.write(name)
+            f.write(b'\0' * (data_offset - header_size))
+            for array in (self.x, self.y, self.length, self.height_array):
+                f.write(array.astype('<f4').tobytes())
+            f.write(self.colors.tobytes())
+            f.write(self.hit_points.tobytes())
+
+    def to_source(self):
+        """
+        轉成 JSON 原始檔的內容（每塊磚逐一列出）\n
+        返回值：dict，可以直接用 json.dump 寫出
+        """
+        bricks = []
+        for x, y, length, height, color, hit_points in zip(
+                self.x.tolist(), self.y.tolist(), self.length.tolist(), self.height_array.tolist(),
+                self.colors.tolist(), self.hit_points.tolist()):
+            bricks.append({'x': x, 'y': y, 'width': length, 'height': height,
+                           'color': color, 'hit_points': hit_points})
+        return {'name': self.name, 'width': self.width, 'height': self.height, 'bricks': bricks}
+
+    def save_json(self, path):
+        """
+        寫出 JSON 原始檔（每塊磚逐一列出）\n
+        path: 檔案路徑
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_source(), f, ensure_ascii=False, indent=1)
+
+    ######################建立遊戲物件######################
+    def to_store(self):
+        """
+        建立磚塊倉庫和對應的 Brick 物件\n
+        返回值：BrickStore，Brick 物件在 store.bricks\n
+        \n
+        說明:\n
+        - 倉庫直接使用關卡的欄位陣列（記憶體映射的也一樣），只有擊中狀態和耐久度是新配置的
+        """
+        store = BrickStore(self.x, self.y, self.length, self.height_array, self.colors, self.hit_points)
+        store.make_bricks()
+        return store
+
+    ######################檢查######################
+    def validate(self, check_overlap=True):
+        """
+        檢查關卡內容是否合理\n
+        \n
+        參數:\n
+        check_overlap (bool): 是否檢查磚塊互相重疊（磚塊很多時比較花時間）\n
+        \n
+        回傳:\n
+        list: 問題描述字串，空的表示沒有問題\n
+        \n
+        檢查項目:\n
+        - 至少要有一塊磚\n
+        - 座標和大小都是有限的數字，寬高大於 0\n
+        - 耐久度至少 1\n
+        - 磚塊完整在場地範圍內\n
+        - 磚塊沒有互相重疊
+        """
+        problems = []
+        if self.count == 0:
+            problems.append('關卡裡沒有任何磚塊')
+            return problems
+
+        geometry = np.stack([self.x, self.y, self.length, self.height_array])
+        bad = ~np.isfinite(geometry).all(axis=0)
+        if bad.any():
+            problems.append(f'{int(bad.sum())} 塊磚的座標或大小不是有效數字（例如第 {int(np.argmax(bad))} 塊）')
+        empty = (self.length <= 0) | (self.height_array <= 0)
+        if empty.any():
+            problems.append(f'{int(empty.sum())} 塊磚的寬或高不大於 0（例如第 {int(np.argmax(empty))} 塊）')
+        broken = self.hit_points < 1
+        if broken.any():
+            problems.append(f'{int(broken.sum())} 塊磚的耐久度是 0（例如第 {int(np.argmax(broken))} 塊）')
+        outside = ((self.x < 0) | (self.y < 0) |
+                   (self.x + self.length > self.width) | (self.y + self.height_array > self.height))
+        if outside.any():
+            problems.append(f'{int(outside.sum())} 塊磚超出 {self.width}x{self.height} 的場地（例如第 {int(np.argmax(outside))} 塊）')
+
+        if check_overlap and not problems:
+            pairs = self.overlapping_pairs()
+            if pairs:
+                a, b = pairs[0]
+                problems.append(f'{len(pairs)} 組磚塊互相重疊（例如第 {a} 和第 {b} 塊）')
+        return problems
+
+    def overlapping_pairs(self, limit=1000):
+        """
+        找出互相重疊的磚塊（只碰到邊不算重疊）\n
+        \n
+        參數:\n
+        limit (int): 最多回報幾組\n
+        \n
+        回傳:\n
+        list: [(編號 a, 編號 b), ...]\n
+        \n
+        算法說明:\n
+        - 格子大小取最大的磚塊寬高，每塊磚依左上角放進一個格子\n
+        - 會重疊的兩塊磚，左上角一定在同一格或相鄰的格子\n
+        - 每塊磚只要和「同一格、右邊、下面三格」比較，每一組只會比到一次\n
+        - 依格子編號排序後用 searchsorted 找出每一格的範圍，全部用陣列運算，十萬塊磚也只要幾十毫秒
+        """
+        count = self.count
+        cols = np.floor(self.x / float(self.length.max())).astype(np.int64)
+        rows = np.floor(self.y / float(self.height_array.max())).astype(np.int64)
+        # 左右各留一格，往左下找的時候不會繞到上一排
+        cols -= cols.min() - 1
+        rows -= rows.min()
+        stride = int(cols.max()) + 2
+        keys = rows * stride + cols
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        x, y = self.x, self.y
+        right, bottom = self.x + self.length, self.y + self.height_array
+        pairs = []
+        for d_row, d_col in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+            neighbor = keys + d_row * stride + d_col
+            start = np.searchsorted(sorted_keys, neighbor, 'left')
+            sizes = np.searchsorted(sorted_keys, neighbor, 'right') - start
+            total = int(sizes.sum())
+            if total == 0:
+                continue
+            # 把每塊磚和鄰居格子裡的每塊磚展開成一組一組
+            a = np.repeat(np.arange(count), sizes)
+            within = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            b = order[np.repeat(start, sizes) + within]
+            if d_row == 0 and d_col == 0:
+                # 同一格裡的兩塊磚只算一次，也不跟自己比
+                keep = a < b
+                a, b = a[keep], b[keep]
+            overlap = (x[a] < right[b]) & (x[b] < right[a]) & (y[a] < bottom[b]) & (y[b] < bottom[a])
+            pairs.extend(zip(a[overlap].tolist(), b[overlap].tolist()))
+            if len(pairs) >= limit:
+                break
+        return sorted(pairs)[:limit]
+
+
+######################定義函式區######################
+def generate_grid_level(count, width=800, height=600, fill_height=None, name='generated'):
+    """
+    產生一個剛好 count 塊磚、規則排列的大型關卡（測試和效能量測用）\n
+    \n
+    參數:\n
+    count (int): 磚塊數量，範圍 > 0\n
+    width, height (int): 場地大小\n
+    fill_height (int): 磚塊牆佔用的高度，None 表示場地上半部\n
+    name (str): 關卡名稱\n
+    \n
+    回傳:\n
+    Level: 產生的關卡（磚塊之間留 1 像素以下的縫，不會重疊）
+    """
+    if fill_height is None:
+        fill_height = height // 2
+    # 磚塊大約是原本 3:1 的形狀
+    cols = max(1, int(round((count * width / fill_height / 3) ** 0.5)))
+    rows = -(-count // cols)
+    cell_w = width / cols
+    cell_h = fill_height / rows
+    index = np.arange(count)
+    row, col = np.divmod(index, cols)
+    palette = np.array([(255, 0, 0), (255, 165, 0), (255, 255, 0), (0, 255, 0), (0, 0, 255)], dtype=np.uint8)
+    return Level(name, width, height,
+                 col * cell_w, row * cell_h,
+                 np.full(count, cell_w * 0.9), np.full(count, cell_h * 0.9),
+                 palette[row % len(palette)], np.ones(count, dtype=np.uint8))
+
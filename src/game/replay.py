@@ -0,0 +1,296 @@
+######################載入套件######################
+"""
+輸入錄製與重播模組
+把一局遊戲的亂數種子和每一步的玩家輸入錄下來，之後可以不開視窗、全速重播
+- 重播時每隔一段步數比對狀態雜湊值，確認每一步的結果和錄製時完全一樣
+- 錄下來的檔案也可以當作固定的效能測試劇本，每次跑的工作量都一樣
+
+檔案格式（小端序）:
+- 開頭 8 個位元組 b'BTBREC2\\n'
+- 4 個位元組的標頭長度，接著是 UTF-8 JSON 標頭（種子、場地大小、設定、檢查點雜湊值）
+- 剩下的是 zlib 壓縮過的輸入串流，每一步:
+    float64 底板 x（NaN 表示底板不動），和送進模擬的值完全一樣，自動玩家的小數座標也不會被截掉
+    uint8 旗標（第 0 位元是發射，第 1-7 位元是這一步的點擊次數）
+    每次點擊 2 個 int16 (x, y)
+- 舊版 b'BTBREC1\\n' 的底板 x 是 int16（-32768 表示不動），還是讀得回來
+"""
+import json
+import math
+import struct
+import time
+import zlib
+from config import settings
+from src.game.simulation import Simulation, FrameInput
+
+
+######################初始化設定######################
+REPLAY_MAGIC = b'BTBREC2\n'
+# 舊版錄製檔（底板 x 是 int16，會截掉小數）
+REPLAY_MAGIC_V1 = b'BTBREC1\n'
+# 底板不動時寫入的值（NaN，實際座標不會用到）
+NO_PADDLE = float('nan')
+# 舊版錄製檔底板不動時的值（int16 最小值）
+NO_PADDLE_V1 = -32768
+# 單一步最多記錄幾次點擊（旗標只有 7 個位元）
+MAX_CLICKS = 127
+
+_STEP_HEAD = struct.Struct('<dB')
+_STEP_HEAD_V1 = struct.Struct('<hB')
+_CLICK = struct.Struct('<hh')
+
+
+######################物件類別######################
+class InputRecorder:
+    """
+    錄製每一步送進模擬的輸入\n
+    \n
+    屬性說明：\n
+    header: 重建同樣模擬需要的資料（種子、場地大小、多球數量、碰撞方式、球速、龍捲風間隔、步長、關卡檔路徑）\n
+    checkpoints: {步數: 狀態雜湊值}，重播時用來比對\n
+    checkpoint_interval: 每隔幾步記一次雜湊值\n
+    steps: 已經錄了幾步\n
+    \n
+    使用範例:\n
+        recorder = InputRecorder(sim)\n
+        recorder.record(inputs)\n
+        sim.step(inputs, dt)\n
+        recorder.after_step(sim)\n
+        recorder.save('game.btbr')
+    """
+    def __init__(self, sim, checkpoint_interval=settings.REPLAY_CHECKPOINT_INTERVAL):
+        """
+        初始化錄製器，要在模擬還沒跑任何一步之前建立\n
+        \n
+        參數:\n
+        sim (Simulation): 要錄製的模擬核心\n
+        checkpoint_interval (int): 每隔幾步記一次狀態雜湊值，範圍 > 0
+        """
+        self.header = {
+            'seed': sim.seed,
+            'width': sim.width,
+            'height': sim.height,
+            'multiball': sim.balls.count,
+            'collision_mode': sim.ball.collision_mode,
+            'ball_speed': sim.ball.speed,
+            'tornado_interval': list(sim.tornado_interval),
+            'dt': settings.FIXED_DT,
+            'level': sim.level_path,
+        }
+        self.checkpoint_interval = max(1, int(checkpoint_interval))
+        self.checkpoints = {0: sim.state_hash()}
+        self.steps = 0
+        self._stream = bytearray()
+
+    def record(self, inputs):
+        """
+        記下這一步要送進模擬的輸入（在 sim.step 之前呼叫）\n
+        \n
+        參數:\n
+        inputs (FrameInput): 這一步的玩家輸入，None 表示沒有任何操作
+        """
+        if inputs is None:
+            self._stream += _STEP_HEAD.pack(NO_PADDLE, 0)
+            return
+        # 底板 x 原封不動存成 float64，重播時送進模擬的值和錄製時一模一樣
+        paddle_x = NO_PADDLE if inputs.paddle_x is None else float(inputs.paddle_x)
+        clicks = inputs.clicks[:MAX_CLICKS]
+        self._stream += _STEP_HEAD.pack(paddle_x, int(inputs.launch) | (len(clicks) << 1))
+        for x, y in clicks:
+            self._stream += _CLICK.pack(int(x), int(y))
+
+    def after_step(self, sim):
+        """
+        模擬跑完一步之後呼叫，到了檢查點就記下狀態雜湊值\n
+        \n
+        參數:\n
+        sim (Simulation): 剛跑完一步的模擬核心
+        """
+        self.steps += 1
+        if self.steps % self.checkpoint_interval == 0:
+            self.checkpoints[self.steps] = sim.state_hash()
+
+    def save(self, path, sim=None):
+        """
+        把錄製結果寫到檔案\n
+        \n
+        參數:\n
+        path (str): 檔案路徑\n
+        sim (Simulation): 有傳入時會把最後一步的狀態也記成檢查點
+        """
+        if sim is not None:
+            self.checkpoints[self.steps] = sim.state_hash()
+        header = dict(self.header, steps=self.steps,
+                      checkpoints={str(step): value for step, value in self.checkpoints.items()})
+        header_bytes = json.dumps(header).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(REPLAY_MAGIC)
+            f.write(struct.pack('<I', len(header_bytes)))
+            f.write(header_bytes)
+            f.write(zlib.compress(bytes(self._stream), 9))
+
+
+class Recording:
+    """
+    從檔案讀回來的錄製結果\n
+    \n
+    屬性說明：\n
+    header: 錄製時的設定（seed、width、height、multiball、collision_mode、dt、level、steps）\n
+    checkpoints: {步數: 狀態雜湊值}\n
+    inputs: 每一步的 FrameInput 列表
+    """
+    def __init__(self, header, inputs):
+        self.header = header
+        self.checkpoints = {int(step): value for step, value in header.get('checkpoints', {}).items()}
+        self.inputs = inputs
+
+    @classmethod
+    def load(cls, path):
+        """
+        讀取錄製檔\n
+        \n
+        參數:\n
+        path (str): 檔案路徑\n
+        \n
+        回傳:\n
+        Recording: 讀回來的錄製結果\n
+        \n
+        例外:\n
+        ValueError: 檔案不是錄製檔或內容損壞
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data.startswith(REPLAY_MAGIC):
+            step_head = _STEP_HEAD
+        elif data.startswith(REPLAY_MAGIC_V1):
+            step_head = _STEP_HEAD_V1
+        else:
+            raise ValueError(f"不是錄製檔: {path}")
+        offset = len(REPLAY_MAGIC)
+        (header_length,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        header = json.loads(data[offset:offset + header_length].decode('utf-8'))
+        try:
+            stream = zlib.decompress(data[offset + header_length:])
+        except zlib.error as e:
+            raise ValueError(f"錄製檔的輸入串流損壞: {path}") from e
+        return cls(header, decode_inputs(stream, step_head))
+
+    def build_simulation(self):
+        """
+        用錄製時的設定建立一個全新的模擬核心（不開視窗、不印訊息）\n
+        返回值：Simulation 物件，狀態和錄製開始時完全一樣
+        """
+        header = self.header
+        sim = Simulation(header['width'], header['height'], verbose=False,
+                         multiball=header['multiball'], seed=header['seed'],
+                         ball_speed=header.get('ball_speed', 6),
+                         tornado_interval=header.get('tornado_interval', (5, 10)),
+                         level=header.get('level'))
+        sim.ball.collision_mode = header['collision_mode']
+        sim.balls.collision_mode = header['collision_mode']
+        return sim
+
+
+class ReplayResult:
+    """
+    一次重播的結果\n
+    \n
+    屬性說明：\n
+    steps: 重播了幾步\n
+    elapsed: 花了多少秒\n
+    checked: 比對了幾個檢查點\n
+    mismatch_step: 第一個對不上的檢查點步數，None 表示全部吻合\n
+    final_hash: 最後一步的狀態雜湊值
+    """
+    def __init__(self, steps, elapsed, checked, mismatch_step, final_hash):
+        self.steps = steps
+        self.elapsed = elapsed
+        self.checked = checked
+        self.mismatch_step = mismatch_step
+        self.final_hash = final_hash
+
+    @property
+    def is_match(self):
+        """
+        返回值：True 表示所有檢查點都和錄製時一樣
+        """
+        return self.mismatch_step is None
+
+    @property
+    def steps_per_second(self):
+        """
+        返回值：每秒跑了幾步
+        """
+        return self.steps / self.elapsed if self.elapsed > 0 else float('inf')
+
+
+######################定義函式區######################
+def decode_inputs(stream, step_head=_STEP_HEAD):
+    """
+    把壓縮前的輸入串流還原成 FrameInput 列表\n
+    \n
+    參數:\n
+    stream (bytes): 錄製檔裡解壓縮後的輸入串流\n
+    step_head (struct.Struct): 每一步開頭的格式，舊版錄製檔用 _STEP_HEAD_V1\n
+    \n
+    回傳:\n
+    list: 每一步一個 FrameInput
+    """
+    inputs = []
+    offset = 0
+    end = len(stream)
+    is_v1 = step_head is _STEP_HEAD_V1
+    while offset < end:
+        paddle_x, flags = step_head.unpack_from(stream, offset)
+        offset += step_head.size
+        clicks = []
+        for _ in range(flags >> 1):
+            clicks.append(_CLICK.unpack_from(stream, offset))
+            offset += _CLICK.size
+        if (paddle_x == NO_PADDLE_V1) if is_v1 else math.isnan(paddle_x):
+            paddle_x = None
+        inputs.append(FrameInput(paddle_x, flags & 1, clicks))
+    return inputs
+
+
+def replay(recording, verify=True, sim=None, on_step=None):
+    """
+    不開視窗、不等待，全速重播一段錄製\n
+    \n
+    參數:\n
+    recording (Recording): 讀回來的錄製結果\n
+    verify (bool): 是否在檢查點比對狀態雜湊值\n
+    sim (Simulation): 要用的模擬核心，None 表示用錄製的設定建立新的\n
+    on_step (callable): 每跑完一步就呼叫一次，參數是模擬核心（例如拿來畫圖），None 表示不呼叫\n
+    \n
+    回傳:\n
+    ReplayResult: 重播結果，對不上時停在第一個錯誤的檢查點
+    """
+    if sim is None:
+        sim = recording.build_simulation()
+    dt = recording.header.get('dt', settings.FIXED_DT)
+    checkpoints = recording.checkpoints if verify else {}
+    checked = 0
+    mismatch_step = None
+
+    if 0 in checkpoints:
+        checked += 1
+        if sim.state_hash() != checkpoints[0]:
+            mismatch_step = 0
+
+    start = time.perf_counter()
+    step = 0
+    if mismatch_step is None:
+        for inputs in recording.inputs:
+            sim.step(inputs, dt)
+            step += 1
+            if on_step is not None:
+                on_step(sim)
+            expected = checkpoints.get(step)
+            if expected is not None:
+                checked += 1
+                if sim.state_hash() != expected:
+                    mismatch_step = step
+                    break
+    elapsed = time.perf_counter() - start
+    return ReplayResult(step, elapsed, checked, mismatch_step, sim.state_hash())
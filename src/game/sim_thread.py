@@ -0,0 +1,174 @@
+######################載入套件######################
+"""
+模擬執行緒模組
+把模擬核心放到另一條執行緒，用固定的步調自己往前跑，不用等主執行緒畫完畫面
+- 主執行緒照常讀 pygame 事件，把輸入交給模擬執行緒
+- 模擬執行緒每跑完一批步數，就發布一份不可變的狀態快照（bytes）
+- 主執行緒畫圖時只讀最新發布的快照，畫得再慢也不會拖到物理的步調
+
+兩條執行緒之間只交換不可變的資料：
+- 快照是 capture_state() 產生的 bytes，發布後就不會再被改寫
+- 模擬執行緒寫的是下一份新的 bytes（後緩衝），主執行緒畫的是已經發布的那份（前緩衝），
+  發布只是換掉一個參照，不用鎖
+"""
+import collections
+import threading
+import time
+from config import settings
+from src.game.simulation import FrameInput
+from src.game.snapshot import capture_state
+
+
+######################物件類別######################
+class PublishedState:
+    """
+    模擬執行緒發布的一份狀態（不可變）\n
+    \n
+    屬性說明：\n
+    data: capture_state() 產生的快照\n
+    frame: 這份快照是第幾步\n
+    published_at: 發布的時間點（time.perf_counter()），畫面內插用來算距離上一步過了多久
+    """
+    __slots__ = ('data', 'frame', 'published_at')
+
+    def __init__(self, data, frame, published_at):
+        self.data = data
+        self.frame = frame
+        self.published_at = published_at
+
+
+class SimulationThread(threading.Thread):
+    """
+    用固定步調推進模擬核心的背景執行緒\n
+    \n
+    屬性說明：\n
+    sim: 模擬核心，執行緒啟動後只能由這條執行緒讀寫\n
+    advance: 跑一步的函式 advance(inputs, is_rewinding)，在這條執行緒上呼叫\n
+    fixed_dt: 每一步的時間長度（秒）\n
+    error: 模擬執行緒發生的例外，主執行緒每幀檢查，有的話在主執行緒重新拋出\n
+    \n
+    設計說明:\n
+    - 底板位置只要最新的，直接覆寫；發射、點擊和其他指令放進佇列，一個都不會漏\n
+    - 佇列用 collections.deque，append 和 popleft 本身就是執行緒安全的\n
+    - 慢了就補步（一次最多 MAX_FRAME_STEPS 步），落後太多就放棄追趕，和單執行緒的累積器一樣\n
+    \n
+    使用範例:\n
+        thread = SimulationThread(sim, engine.advance)\n
+        thread.start()\n
+        thread.post_input(inputs, is_rewinding=False)\n
+        state = thread.latest()\n
+        thread.stop()
+    """
+    def __init__(self, sim, advance, fixed_dt=settings.FIXED_DT, max_steps=settings.MAX_FRAME_STEPS):
+        """
+        建立模擬執行緒（還不會開始跑，要呼叫 start()）\n
+        \n
+        參數:\n
+        sim (Simulation): 模擬核心\n
+        advance (callable): 跑一步的函式 advance(inputs, is_rewinding)\n
+        fixed_dt (float): 每一步的時間長度（秒），範圍 > 0\n
+        max_steps (int): 落後時一次最多補幾步，範圍 > 0
+        """
+        super().__init__(name='simulation', daemon=True)
+        self.sim = sim
+        self.advance = advance
+        self.fixed_dt = fixed_dt
+        self.max_steps = max_steps
+        self.error = None
+        # 主執行緒寫、模擬執行緒讀的輸入
+        self._paddle_x = None
+        self._is_rewinding = False
+        self._events = collections.deque()
+        self._stop_event = threading.Event()
+        # 最新發布的狀態（前緩衝），一開始就先發布初始狀態
+        self._published = None
+        self.publish()
+
+    ######################主執行緒呼叫######################
+    def post_input(self, inputs, is_rewinding=False):
+        """
+        把這一幀的輸入交給模擬執行緒\n
+        \n
+        參數:\n
+        inputs (FrameInput): 主執行緒整理好的輸入（呼叫後可以直接清掉事件）\n
+        is_rewinding (bool): 是否正在倒轉
+        """
+        self._paddle_x = inputs.paddle_x
+        self._is_rewinding = is_rewinding
+        if inputs.launch:
+            self._events.append(('launch', None))
+        for pos in inputs.clicks:
+            self._events.append(('click', pos))
+
+    def call(self, function):
+        """
+        請模擬執行緒在兩步之間執行某個函式（例如快速存檔、讀檔）\n
+        function: 沒有參數的函式，會在模擬執行緒上執行
+        """
+        self._events.append(('call', function))
+
+    def latest(self):
+        """
+        取得最新發布的狀態\n
+        返回值：PublishedState（不可變，可以放心在主執行緒慢慢畫）
+        """
+        return self._published
+
+    def stop(self, timeout=1.0):
+        """
+        停止模擬執行緒並等它結束\n
+        timeout: 最多等幾秒
+        """
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    ######################模擬執行緒######################
+    def publish(self):
+        """
+        把模擬目前的狀態打包成新的快照並發布（換掉參照就好，不用鎖）
+        """
+        self._published = PublishedState(capture_state(self.sim), self.sim.frame, time.perf_counter())
+
+    def next_input(self):
+        """
+        取出下一步要用的輸入：最新的底板位置，加上佇列裡所有的發射和點擊\n
+        返回值：FrameInput
+        """
+        inputs = FrameInput(self._paddle_x)
+        events = self._events
+        while events:
+            kind, value = events.popleft()
+            if kind == 'launch':
+                inputs.launch = True
+            elif kind == 'click':
+                inputs.clicks.append(value)
+            elif kind == 'call':
+                value()
+        return inputs
+
+    def run(self):
+        """
+        執行緒主體：照固定步調推進模擬，每批步數跑完就發布一次狀態\n
+        發生例外時記在 error，讓主執行緒處理
+        """
+        fixed_dt = self.fixed_dt
+        next_time = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                now = time.perf_counter()
+                if now < next_time:
+                    # 還沒到下一步的時間，睡到那時候（被要求停止時會馬上醒來）
+                    self._stop_event.wait(next_time - now)
+                    continue
+                steps = 0
+                while now >= next_time and steps < self.max_steps:
+                    self.advance(self.next_input(), self._is_rewinding)
+                    next_time += fixed_dt
+                    steps += 1
+                # 落後太多就放棄追趕，避免越補越慢
+                if now - next_time > fixed_dt * self.max_steps:
+                    next_time = now
+                self.publish()
+        except Exception as e:
+            self.error = e
@@ -0,0 +1,545 @@
+######################載入套件######################
+"""
+遊戲模擬核心模組
+負責所有不需要畫面的遊戲規則：物理移動、碰撞、生成龍捲風和氣球
+不會開視窗、不會畫圖，可以用固定時間步長盡全力快速執行
+適合拿來跑大量幀數做測試或調整遊戲平衡
+"""
+import hashlib
+import math
+import random
+import struct
+import numpy as np
+from config import settings
+from config import colors as game_colors
+from src.entities.ball import Ball
+from src.entities.brick import Brick
+from src.entities.brick_store import BrickStore
+from src.entities.paddle import Paddle
+from src.entities.registry import EntityRegistry
+from src.entities.tornado import Tornado
+from src.entities.balloon_emitter import BalloonEmitter
+from src.game.level import Level
+from src.game.streaming import ChunkStreamer
+from src.physics.ball_system import BallSystem
+from src.physics.spatial_grid import SpatialGrid
+from src.utils.frame_timer import FrameProfiler
+
+
+######################物件類別######################
+class FrameInput:
+    """
+    單一步模擬的玩家輸入\n
+    \n
+    把滑鼠、鍵盤事件整理成單純的資料，讓模擬核心不用直接讀 pygame\n
+    \n
+    屬性說明：\n
+    paddle_x: 底板中心想要移到的 x 座標（浮點數），None 表示底板不動\n
+    launch: 這一步是否按下發射鍵（布林值）\n
+    clicks: 這一步的滑鼠點擊座標列表 [(x, y), ...]
+    """
+    def __init__(self, paddle_x=None, launch=False, clicks=()):
+        """
+        初始化輸入資料\n
+        \n
+        參數:\n
+        paddle_x (float): 底板中心的目標 x 座標，None 表示不移動\n
+        launch (bool): 是否發射球\n
+        clicks (iterable): 滑鼠點擊座標，每個元素是 (x, y)
+        """
+        self.paddle_x = paddle_x
+        self.launch = bool(launch)
+        self.clicks = list(clicks)
+
+    def clear_events(self):
+        """
+        清除只該觸發一次的事件（發射、點擊）\n
+        \n
+        底板位置會保留，因為滑鼠停在哪裡底板就該待在哪裡\n
+        發射和點擊如果不清掉，下一步模擬會被重複觸發
+        """
+        self.launch = False
+        self.clicks = []
+
+
+class Simulation:
+    """
+    無畫面的遊戲模擬核心\n
+    \n
+    這個類別只負責遊戲規則，不碰視窗和繪圖：\n
+    1. 建立磚塊牆、底板、球\n
+    2. 每次呼叫 step() 就用固定時間往前推進一步\n
+    3. 管理勝利狀態、慶祝氣球和龍捲風\n
+    \n
+    GameEngine 只是外面的一層殼：讀取玩家輸入、呼叫 step()、把結果畫出來\n
+    \n
+    使用範例:\n
+        sim = Simulation()\n
+        sim.step(FrameInput(paddle_x=400, launch=True))\n
+        sim.run_frames(1000000)
+    """
+    def __init__(self, width=settings.WIDTH, height=settings.HEIGHT, verbose=False,
+                 multiball=settings.MULTIBALL_COUNT, seed=None, ball_speed=6, tornado_interval=(5, 10),
+                 level=None):
+        """
+        初始化模擬核心\n
+        \n
+        參數:\n
+        width (int): 遊戲場地寬度，範圍 > 0\n
+        height (int): 遊戲場地高度，範圍 > 0\n
+        verbose (bool): 是否印出勝利、點擊等訊息，大量模擬時應關閉\n
+        multiball (int): 多球模式額外加入的球數，範圍 >= 0，0 表示關閉\n
+        seed (int): 亂數種子，None 表示隨機挑一個；同樣的種子加上同樣的輸入，每一步的結果都一樣\n
+        ball_speed (float): 球的初始速率，範圍 > 0\n
+        tornado_interval (tuple): 龍捲風生成間隔的範圍 (最短秒數, 最長秒數)\n
+        level (str 或 Level): 關卡檔路徑或已載入的關卡，None 表示用內建的 5 x 10 磚塊牆
+        """
+        # 龍捲風和氣球都用這個模擬自己的亂數來源，不受其他地方呼叫 random 影響
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        self.width = width
+        self.height = height
+        self.verbose = verbose
+        # 已經跑了幾步模擬，用來計算經過的遊戲時間
+        self.frame = 0
+
+        # 建立磚塊牆、底板和球
+        # 擊中狀態集中放在倉庫的位元陣列，勝利判斷和重置都不用逐塊處理
+        self.level_path = level if isinstance(level, str) else None
+        # 鏡頭上緣的 y 座標：一般關卡固定是 0，比視窗高的關卡從最下面開始往上捲
+        self.camera_y = 0
+        self.camera_start = 0
+        self.streamer = None
+        if level is None:
+            self.bricks = self.build_bricks()
+            self.brick_store = BrickStore.from_bricks(self.bricks)
+        else:
+            if isinstance(level, str):
+                level = Level.load(level)
+            if level.height > height:
+                # 捲動關卡：只替鏡頭附近的區塊建立 Brick 物件，其他的留在關卡檔裡
+                self.brick_store = BrickStore(level.x, level.y, level.length, level.height_array,
+                                              level.colors, level.hit_points)
+                self.streamer = ChunkStreamer(self.brick_store)
+                self.camera_start = self.camera_y = int(level.height - height)
+            else:
+                # 關卡檔直接建立倉庫，再由倉庫產生 Brick 物件（不用逐塊搬運）
+                self.brick_store = level.to_store()
+                self.bricks = self.brick_store.bricks
+        self.paddle = self.build_paddle()
+        if self.streamer is not None:
+            self.streamer.update(self.camera_y, height)
+            self.bricks = self.streamer.bricks
+            self.brick_grid = self.streamer.grid
+        else:
+            # 磚塊牆建好就建立空間索引，碰撞和點擊只要查附近幾格
+            self.brick_grid = SpatialGrid(self.bricks)
+        # 鏡頭要捲到哪裡，剩餘磚塊數量改變時才重算
+        self._camera_target = self.camera_y
+        self._camera_live_count = self.brick_store.live_count
+
+        # 初始位置在底板中央上方
+        initial_ball_x = self.paddle.x + self.paddle.length / 2
+        initial_ball_y = self.paddle.y - 12
+        self.ball = Ball(game_colors.WHITE, 12, initial_ball_x, initial_ball_y, speed=ball_speed)
+
+        # 多球模式的額外球用陣列批次處理，一開始都黏在底板上
+        self.balls = BallSystem(game_colors.WHITE, 12, speed=ball_speed, capacity=max(1, multiball))
+        for _ in range(multiball):
+            self.balls.add(initial_ball_x, initial_ball_y)
+
+        # 依設定選擇碰撞方式
+        self.ball.collision_mode = settings.COLLISION_MODE
+        self.balls.collision_mode = settings.COLLISION_MODE
+
+        # 遊戲狀態控制
+        self.game_won = False                    # 是否勝利
+        self.victory_balloons = BalloonEmitter(settings.BALLOON_CAP)  # 慶祝氣球（陣列式粒子）
+        self.balloon_spawn_timer = 0             # 氣球生成計時器
+        self.balloon_spawn_interval = 0.1        # 氣球生成間隔（秒）
+
+        # 會一直生成、消失的物件都放在物件池裡，消失的物件會被回收再利用
+        self.entities = EntityRegistry()
+
+        # 龍捲風系統
+        self.tornadoes = self.entities.pool(Tornado, settings.TORNADO_POOL_CAPACITY)  # 龍捲風物件池（依生成順序走訪）
+        self.tornado_spawn_timer = 0             # 龍捲風生成計時器
+        self.tornado_interval = tuple(tornado_interval)  # 生成間隔的範圍（秒）
+        self.tornado_spawn_interval = self.rng.uniform(*self.tornado_interval)  # 隨機生成間隔
+
+        # 統計資料（批次模擬用來比較不同設定的難度）
+        self.clear_frame = None                  # 第一次清空磚塊牆是第幾步，None 表示還沒清空
+        self.tornado_resets = 0                  # 被龍捲風撞到而重新開始的次數
+        self.balls_lost = 0                      # 主球掉出場地的次數（多球模式的球記在 balls.lost_count）
+
+        # 分段計時器，預設關閉（幾乎沒有成本），GameEngine 會換成它自己的計時器
+        self.profiler = FrameProfiler()
+
+    def build_bricks(self):
+        """
+        建立預設的磚塊牆\n
+        \n
+        5 排 x 10 列，每排一種顏色，整面牆水平置中\n
+        返回值：Brick 物件列表（由上到下、由左到右排列）
+        """
+        bricks = []
+
+        # 磚塊配置參數
+        brick_width = 75      # 每個磚塊的寬度
+        brick_height = 25     # 每個磚塊的高度
+        brick_spacing = 5     # 磚塊間的間距
+
+        # 計算磚塊牆的位置（置中對齊）
+        wall_width = 10 * brick_width + 9 * brick_spacing  # 10 個磚塊 + 9 個間距
+        start_x = (self.width - wall_width) // 2            # 水平置中
+        start_y = 50                                        # 距離頂部的距離
+
+        # 定義每排磚塊的顏色（由上到下）
+        colors = [
+            (255, 0, 0),    # 紅色
+            (255, 165, 0),  # 橙色
+            (255, 255, 0),  # 黃色
+            (0, 255, 0),    # 綠色
+            (0, 0, 255),    # 藍色
+        ]
+
+        # 建立 5 排 x 10 列的磚塊陣列
+        for row in range(5):
+            for col in range(10):
+                # 計算每個磚塊的位置
+                x = start_x + col * (brick_width + brick_spacing)
+                y = start_y + row * (brick_height + brick_spacing)
+                # 建立磚塊並加入陣列
+                bricks.append(Brick(x, y, brick_height, brick_width, colors[row]))
+        return bricks
+
+    def build_paddle(self):
+        """
+        建立玩家控制的底板\n
+        返回值：放在場地底部中央的 Paddle 物件
+        """
+        paddle_width = 120                           # 底板寬度
+        paddle_height = 15                           # 底板高度
+        paddle_y = self.camera_y + self.height - 50  # 距離畫面底部的距離
+        paddle_x = (self.width - paddle_width) // 2  # 水平置中
+        return Paddle(paddle_x, paddle_y, paddle_height, paddle_width, game_colors.WHITE)
+
+    def check_victory(self):
+        """
+        檢查遊戲是否勝利\n
+
+        磚塊倉庫隨時記著還剩幾塊磚，只要看剩下的數量是不是 0\n
+        返回值：True 表示所有磚塊都已被擊中（勝利），False 表示還有磚塊未被擊中
+        """
+        return self.brick_store.is_cleared()
+
+    def spawn_balloon(self):
+        """
+        生成勝利慶祝氣球\n
+
+        在場地底部隨機位置生成一個彩色氣球，加入氣球發射器\n
+        氣球具有隨機的顏色和大小\n
+        返回值：新氣球在發射器裡的編號
+        """
+        # 隨機水平位置（避免太靠近邊緣）
+        x = self.rng.randint(50, self.width - 50)
+        # 從畫面底部下方開始
+        y = self.camera_y + self.height + 50
+
+        # 隨機選擇氣球顏色
+        color = self.rng.choice([
+            (255, 100, 100),  # 淺紅色
+            (100, 255, 100),  # 淺綠色
+            (100, 100, 255),  # 淺藍色
+            (255, 255, 100),  # 淺黃色
+            (255, 100, 255),  # 淺紫色
+            (100, 255, 255),  # 淺青色
+            (255, 200, 100),  # 淺橙色
+            (200, 100, 255),  # 淺紫羅蘭色
+        ])
+
+        # 隨機氣球大小
+        size = self.rng.randint(15, 25)
+
+        return self.victory_balloons.spawn(x, y, color, size, rng=self.rng)
+
+    def spawn_tornado(self):
+        """
+        生成龍捲風障礙物\n
+
+        在場地頂部隨機位置生成一個龍捲風，放進龍捲風物件池\n
+        龍捲風會向下移動，碰到球時會重置遊戲\n
+        返回值：生成的 Tornado 物件（可能是回收再利用的）
+        """
+        # 隨機水平位置
+        x = self.rng.randint(0, self.width - 30)
+        # 從畫面頂部上方開始
+        y = self.camera_y - 80
+
+        return self.tornadoes.spawn(x, y, rng=self.rng)
+
+    def restart_game(self):
+        """
+        重新開始遊戲\n
+
+        重置所有遊戲狀態到初始狀態：\n
+        1. 清除勝利狀態和慶祝氣球\n
+        2. 恢復所有磚塊\n
+        3. 將球重置到底板上方
+        """
+        # 重置遊戲狀態
+        self.game_won = False
+        self.victory_balloons.clear()
+
+        # 一次恢復所有磚塊，捲動關卡的鏡頭回到最下面
+        self.brick_store.reset_all()
+        if self.streamer is not None:
+            self.set_camera(self.camera_start)
+            self._camera_target = self.camera_start
+            self._camera_live_count = self.brick_store.live_count
+
+        # 將球重置到底板中央上方
+        self.ball.reset_to(self.paddle.x + self.paddle.length / 2, self.paddle.y - self.ball.size)
+        self.balls.reset_all(self.paddle)
+
+    def apply_input(self, inputs):
+        """
+        套用玩家輸入：移動底板、處理點擊和發射\n
+        \n
+        參數:\n
+        inputs (FrameInput): 這一步的玩家輸入\n
+        \n
+        副作用:\n
+        - 會改變底板位置、磚塊的 is_hit 狀態和球的發射狀態
+        """
+        # 滑鼠控制底板移動，滑鼠位置為底板中心
+        if inputs.paddle_x is not None:
+            new_paddle_x = inputs.paddle_x - self.paddle.length // 2
+
+            # 限制底板不能移出場地邊界
+            if new_paddle_x < 0:
+                new_paddle_x = 0
+            elif new_paddle_x + self.paddle.length > self.width:
+                new_paddle_x = self.width - self.paddle.length
+
+            self.paddle.x = new_paddle_x
+
+        # 滑鼠點擊（用於測試，點擊磚塊可直接擊中），點擊位置是畫面座標，要加上鏡頭位置
+        for mx, screen_y in inputs.clicks:
+            my = screen_y + self.camera_y
+            for brick in self.brick_grid.query_point(mx, my):
+                if brick.check_collision(mx, my) and self.verbose:
+                    print(f"磚塊被擊中！位置: ({mx}, {my})")
+
+        # 按下發射鍵就把球射出去
+        if inputs.launch:
+            self.ball.launch()
+            # 多球模式的球呈扇形散開發射
+            self.balls.launch(spread=math.radians(90))
+
+    def update_spawns(self, dt):
+        """
+        勝利時生成和移動慶祝氣球，遊戲中定時生成龍捲風\n
+        dt: 這一步的時間長度（秒）
+        """
+        # 勝利狀態：管理慶祝氣球
+        if self.game_won:
+            # 更新氣球生成計時器
+            self.balloon_spawn_timer += dt
+
+            # 定期生成新氣球（最多 settings.BALLOON_CAP 個）
+            if (self.balloon_spawn_timer >= self.balloon_spawn_interval and
+                    len(self.victory_balloons) < settings.BALLOON_CAP):
+                self.spawn_balloon()
+                self.balloon_spawn_timer = 0
+
+            # 一次更新所有氣球，飄出場地的氣球會被移除
+            self.victory_balloons.update(dt, self.camera_y)
+
+        # 遊戲進行中：管理龍捲風障礙物
+        if not self.game_won:
+            # 更新龍捲風生成計時器
+            self.tornado_spawn_timer += dt
+
+            # 達到生成間隔時建立新龍捲風
+            if self.tornado_spawn_timer >= self.tornado_spawn_interval:
+                self.spawn_tornado()
+                self.tornado_spawn_timer = 0
+                # 設定下次生成的隨機間隔
+                self.tornado_spawn_interval = self.rng.uniform(*self.tornado_interval)
+
+    def update_tornadoes(self, dt):
+        """
+        移動所有龍捲風，撞到球就重新開始遊戲，飄出場地的就移除\n
+        dt: 這一步的時間長度（秒）
+        """
+        # 更新所有龍捲風（despawn 只做標記，迴圈中途不會改動列表，不用先複製一份）
+        for tornado in self.tornadoes:
+            tornado.update(dt)
+
+            # 檢查龍捲風與球的碰撞
+            if tornado.check_collision(self.ball):
+                # 龍捲風碰到球，重新開始遊戲
+                self.tornado_resets += 1
+                self.restart_game()
+                self.tornadoes.clear()  # 清除所有龍捲風
+                return
+
+            # 移除離開場地的龍捲風
+            if tornado.is_off_screen(self.camera_y + self.height):
+                self.tornadoes.despawn(tornado)
+
+        # 一次把這一步消失的龍捲風拿掉，其他龍捲風的順序不變
+        self.tornadoes.compact()
+
+    def set_camera(self, camera_y):
+        """
+        把鏡頭移到指定位置（只有捲動關卡會用到）\n
+        \n
+        參數:\n
+        camera_y (int): 鏡頭上緣的 y 座標（世界座標）\n
+        \n
+        副作用:\n
+        - 底板跟著鏡頭移動，永遠在畫面底部\n
+        - 換成新的參加模擬的磚塊列表和空間索引
+        """
+        self.paddle.y += camera_y - self.camera_y
+        self.camera_y = camera_y
+        if self.streamer.update(camera_y, self.height):
+            self.bricks = self.streamer.bricks
+            self.brick_grid = self.streamer.grid
+
+    def update_camera(self, dt):
+        """
+        清掉下面的磚塊之後，鏡頭慢慢往上捲，讓剩下的磚塊回到畫面上方\n
+        dt: 這一步的時間長度（秒）\n
+        \n
+        說明:\n
+        - 目標是讓最下面還有磚塊的區塊底部停在畫面的 SCROLL_WALL_BOTTOM 高度\n
+        - 鏡頭只會往上捲，每一步移動整數像素，畫面和碰撞都不會有誤差
+        """
+        store = self.brick_store
+        if store.live_count != self._camera_live_count:
+            self._camera_live_count = store.live_count
+            bottom = self.streamer.lowest_live_bottom()
+            if bottom is not None:
+                target = int(bottom) - settings.SCROLL_WALL_BOTTOM
+                self._camera_target = max(0, min(self.camera_start, target))
+        if self.camera_y > self._camera_target:
+            speed = max(1, int(settings.SCROLL_SPEED * dt))
+            self.set_camera(max(self._camera_target, self.camera_y - speed))
+
+    def step(self, inputs=None, dt=None):
+        """
+        讓整個遊戲往前推進一步\n
+        \n
+        參數:\n
+        inputs (FrameInput): 這一步的玩家輸入，None 表示沒有任何操作\n
+        dt (float): 這一步的時間長度（秒），None 表示使用 settings.FIXED_DT\n
+        \n
+        執行順序（和原本主循環相同）:\n
+        1. 檢查勝利條件\n
+        2. 套用玩家輸入\n
+        3. 勝利時生成和移動慶祝氣球\n
+        4. 遊戲中生成龍捲風\n
+        5. 移動龍捲風並檢查是否撞到球\n
+        6. 移動球並處理碰撞\n
+        7. 捲動關卡：移動鏡頭，載入和釋放附近的區塊
+        """
+        if dt is None:
+            dt = settings.FIXED_DT
+
+        profiler = self.profiler
+
+        with profiler.phase('input'):
+            # 檢查勝利條件
+            if not self.game_won and self.check_victory():
+                self.game_won = True
+                if self.clear_frame is None:
+                    self.clear_frame = self.frame
+                if self.verbose:
+                    print("恭喜！你贏了！🎉")
+
+            # 套用玩家輸入
+            if inputs is not None:
+                self.apply_input(inputs)
+
+        with profiler.phase('spawn'):
+            self.update_spawns(dt)
+
+        with profiler.phase('tornadoes'):
+            self.update_tornadoes(dt)
+
+        with profiler.phase('ball'):
+            # 更新球的位置和碰撞，發射中的球變回未發射就是掉出場地了
+            was_launched = self.ball.is_launched
+            self.ball.update(dt, self.width, self.height, self.paddle, self.bricks, self.brick_grid,
+                             self.camera_y)
+            self.balls.update(dt, self.width, self.height, self.paddle, self.bricks, self.brick_grid,
+                              self.camera_y)
+            if was_launched and not self.ball.is_launched:
+                self.balls_lost += 1
+
+        if self.streamer is not None:
+            with profiler.phase('stream'):
+                self.update_camera(dt)
+
+        self.frame += 1
+
+    def run_frames(self, count, inputs=None):
+        """
+        不間斷地連續跑很多步模擬\n
+        \n
+        參數:\n
+        count (int): 要跑幾步，範圍 >= 0\n
+        inputs (FrameInput): 每一步都使用的輸入，None 表示沒有操作\n
+        \n
+        說明:\n
+        - 不會等待、不會畫圖，CPU 多快就跑多快\n
+        - 發射和點擊事件只在第一步觸發一次
+        """
+        for _ in range(count):
+            self.step(inputs)
+            # 發射和點擊只算一次，之後的步驟只保留底板位置
+            if inputs is not None:
+                inputs.clear_events()
+
+    def state_hash(self):
+        """
+        把目前所有會影響之後結果的狀態算成一個雜湊值\n
+        \n
+        回傳:\n
+        str: 16 進位字串，兩個模擬在同一步的雜湊值相同，就表示狀態完全一樣\n
+        \n
+        包含的狀態:\n
+        - 步數、勝利狀態、各種計時器、亂數產生器的內部狀態\n
+        - 底板位置、球和多球的位置速度、每塊磚的擊中狀態和剩餘耐久度\n
+        - 每個龍捲風和慶祝氣球的位置、速度和旋轉
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(struct.pack('<q?ddd', self.frame, self.game_won, self.balloon_spawn_timer,
+                                  self.tornado_spawn_timer, self.tornado_spawn_interval))
+        digest.update(repr(self.rng.getstate()).encode())
+        digest.update(struct.pack('<dd', self.paddle.x, self.paddle.y))
+        ball = self.ball
+        digest.update(struct.pack('<dddd?', ball.x, ball.y, ball.velocity_x, ball.velocity_y, ball.is_launched))
+        balls = self.balls
+        for array in (balls.x, balls.y, balls.velocity_x, balls.velocity_y, balls.is_launched):
+            digest.update(np.ascontiguousarray(array[:balls.count]).tobytes())
+        digest.update(self.brick_store.hit_bits.tobytes())
+        # 有多次耐久度的磚塊時，剩餘耐久度也會影響之後的結果（全部都是 1 時和擊中位元重複，不用算）
+        if self.brick_store.count and self.brick_store.hit_points.max() > 1:
+            digest.update(self.brick_store.remaining.tobytes())
+        # 捲動關卡的鏡頭位置決定了天花板和底板的位置
+        if self.streamer is not None:
+            digest.update(struct.pack('<q', self.camera_y))
+        for tornado in self.tornadoes:
+            digest.update(struct.pack('<ddddd', tornado.x, tornado.y, tornado.speed,
+                                      tornado.rotation, tornado.rotation_speed))
+        balloons = self.victory_balloons
+        for array in (balloons.x, balloons.y, balloons.speed, balloons.time, balloons.size):
+            digest.update(np.ascontiguousarray(array[:balloons.count]).tobytes())
+        return digest.hexdigest()
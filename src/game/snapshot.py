@@ -0,0 +1,372 @@
+######################載入套件######################
+"""
+遊戲狀態快照模組
+把模擬核心所有會影響之後結果的狀態打包成一段緊湊的二進位資料，隨時可以載入回去
+- 快速存檔（F5 存、F9 讀）：一份完整快照
+- 倒轉（按住 Backspace）：每一步存一份和上一步的差異，記憶體用量有上限
+
+不用 pickle 整個物件：只存數字，不存 pygame 圖片、空間索引這些可以重建的東西，
+所以快照很小、打包和載入都只要幾十微秒，而且載入後的每一步都和存檔時一模一樣
+
+快照格式（全部是 little-endian）:
+- 固定長度的表頭：_HEADER（魔術字串、步數、計時器、底板、主球、各種數量）
+- 亂數產生器的內部狀態：_RNG（625 個 uint32 + 常態分佈的暫存值）
+- 磚塊：擊中位元陣列、每塊磚的剩餘耐久度（長度由關卡決定，不會變）
+- 多球：x、y、velocity_x、velocity_y、radius、speed（float64），size（int32），is_launched（bool）
+- 龍捲風：每個 7 個 float64（x、y、width、height、speed、rotation、rotation_speed）
+- 氣球顏色表：每種顏色 3 個 uint8
+- 氣球：x、y、speed、amplitude、frequency、time（float64），size、color_index（int32）
+長度固定的部分放前面，數量會變的放後面，相鄰兩步的差異大部分都是 0，壓縮後很小
+"""
+import collections
+import struct
+import zlib
+import numpy as np
+from config import settings
+
+
+######################初始化設定######################
+SNAPSHOT_MAGIC = b'BTBSNP1\n'
+
+# 魔術字串、步數、勝利、氣球計時、龍捲風計時、龍捲風間隔、清空步數（-1 表示還沒清空）、
+# 龍捲風重來次數、主球掉落次數、多球掉落次數、鏡頭位置、鏡頭目標、鏡頭記錄的剩餘磚塊數、
+# 底板 x、y、主球 x、y、velocity_x、velocity_y、speed、是否發射、大小、
+# 多球數量、龍捲風數量、氣球顏色數、氣球數量、磚塊數量
+_HEADER = struct.Struct('<8sq?dddqqqqqqqddddddd?iIIIII')
+
+# Mersenne Twister 的 624 個狀態字加上目前位置，以及 random.gauss 暫存的下一個值
+_RNG = struct.Struct('<625I?d')
+_RNG_VERSION = 3
+
+# 差異資料的表頭：前一份和後一份快照的長度
+_DELTA_HEADER = struct.Struct('<II')
+
+# 多球和氣球的陣列（名稱, 型別），順序就是快照裡的順序
+_BALL_ARRAYS = (('x', np.float64), ('y', np.float64), ('velocity_x', np.float64), ('velocity_y', np.float64),
+                ('radius', np.float64), ('speed', np.float64), ('size', np.int32), ('is_launched', np.bool_))
+_BALLOON_ARRAYS = (('x', np.float64), ('y', np.float64), ('speed', np.float64), ('amplitude', np.float64),
+                   ('frequency', np.float64), ('time', np.float64), ('size', np.int32),
+                   ('color_index', np.int32))
+_TORNADO_FIELDS = 7
+
+
+######################定義函式區######################
+def capture_state(sim):
+    """
+    把模擬目前的狀態打包成快照\n
+    \n
+    參數:\n
+    sim (Simulation): 模擬核心\n
+    \n
+    回傳:\n
+    bytes: 快照資料，可以用 restore_state() 載入回同一個關卡的模擬
+    """
+    ball = sim.ball
+    balls = sim.balls
+    balloons = sim.victory_balloons
+    store = sim.brick_store
+    tornadoes = sim.tornadoes
+    n = balls.count
+    m = balloons.count
+
+    parts = [_HEADER.pack(
+        SNAPSHOT_MAGIC, sim.frame, sim.game_won, sim.balloon_spawn_timer, sim.tornado_spawn_timer,
+        sim.tornado_spawn_interval, -1 if sim.clear_frame is None else sim.clear_frame,
+        sim.tornado_resets, sim.balls_lost, balls.lost_count,
+        sim.camera_y, sim._camera_target, sim._camera_live_count,
+        sim.paddle.x, sim.paddle.y, ball.x, ball.y, ball.velocity_x, ball.velocity_y, ball.speed,
+        ball.is_launched, ball.size, n, len(tornadoes), len(balloons.colors), m, store.count)]
+
+    _, words, gauss_next = sim.rng.getstate()
+    parts.append(_RNG.pack(*words, gauss_next is not None, gauss_next or 0.0))
+
+    parts.append(store.hit_bits.tobytes())
+    parts.append(store.remaining.tobytes())
+    for name, dtype in _BALL_ARRAYS:
+        parts.append(getattr(balls, name)[:n].astype(dtype, copy=False).tobytes())
+    for tornado in tornadoes:
+        parts.append(struct.pack('<7d', tornado.x, tornado.y, tornado.width, tornado.height,
+                                 tornado.speed, tornado.rotation, tornado.rotation_speed))
+    if balloons.colors:
+        parts.append(np.asarray(balloons.colors, dtype=np.uint8).tobytes())
+    for name, dtype in _BALLOON_ARRAYS:
+        parts.append(getattr(balloons, name)[:m].astype(dtype, copy=False).tobytes())
+    return b''.join(parts)
+
+
+def restore_state(sim, data):
+    """
+    把快照載入回模擬核心\n
+    \n
+    參數:\n
+    sim (Simulation): 模擬核心，必須是同一個關卡（磚塊數量要一樣）\n
+    data (bytes): capture_state() 產生的快照\n
+    \n
+    副作用:\n
+    - 模擬的所有狀態換成快照裡的狀態，之後的每一步都和存檔當時一模一樣\n
+    - 龍捲風數量一樣時沿用原本的物件（畫面內插靠物件對應前後的位置），不一樣時換成新的物件\n
+    - 捲動關卡會把鏡頭移到存檔的位置，空間索引和磚塊圖層會收到通知\n
+    \n
+    例外:\n
+    - ValueError: 不是快照資料，或磚塊數量和目前的關卡不同
+    """
+    if len(data) < _HEADER.size or data[:8] != SNAPSHOT_MAGIC:
+        raise ValueError('不是遊戲快照資料')
+    (_, frame, game_won, balloon_timer, tornado_timer, tornado_interval, clear_frame,
+     tornado_resets, balls_lost, balls_lost_count, camera_y, camera_target, camera_live_count,
+     paddle_x, paddle_y, ball_x, ball_y, ball_vx, ball_vy, ball_speed, ball_launched, ball_size,
+     n, tornado_count, color_count, m, brick_count) = _HEADER.unpack_from(data)
+    store = sim.brick_store
+    if brick_count != store.count:
+        raise ValueError(f'快照的磚塊數量 {brick_count} 和目前的關卡 {store.count} 不同')
+    offset = _HEADER.size
+
+    # 亂數產生器
+    rng_values = _RNG.unpack_from(data, offset)
+    offset += _RNG.size
+    gauss_next = rng_values[-1] if rng_values[-2] else None
+    sim.rng.setstate((_RNG_VERSION, rng_values[:-2], gauss_next))
+
+    # 磚塊：先換掉陣列，鏡頭移好之後再通知（新的空間索引會直接用新的狀態建立）
+    bits_size = len(store.hit_bits)
+    hit_bits = data[offset:offset + bits_size]
+    offset += bits_size
+    remaining = data[offset:offset + brick_count]
+    offset += brick_count
+
+    # 捲動關卡：鏡頭移到存檔的位置，底板的 y 下面會直接設定
+    if sim.streamer is not None and camera_y != sim.camera_y:
+        sim.set_camera(camera_y)
+    sim.camera_y = camera_y
+    sim._camera_target = camera_target
+    sim._camera_live_count = camera_live_count
+    store.load_state(hit_bits, remaining)
+
+    # 計時器和統計
+    sim.frame = frame
+    sim.game_won = game_won
+    sim.balloon_spawn_timer = balloon_timer
+    sim.tornado_spawn_timer = tornado_timer
+    sim.tornado_spawn_interval = tornado_interval
+    sim.clear_frame = None if clear_frame < 0 else clear_frame
+    sim.tornado_resets = tornado_resets
+    sim.balls_lost = balls_lost
+
+    # 底板和主球
+    sim.paddle.x = paddle_x
+    sim.paddle.y = paddle_y
+    ball = sim.ball
+    ball.x, ball.y = ball_x, ball_y
+    ball.velocity_x, ball.velocity_y = ball_vx, ball_vy
+    ball.speed = ball_speed
+    ball.is_launched = ball_launched
+    ball.size = ball_size
+
+    # 多球
+    balls = sim.balls
+    if n > balls.capacity:
+        balls._allocate(n)
+    balls.count = n
+    balls.lost_count = balls_lost_count
+    for name, dtype in _BALL_ARRAYS:
+        size = n * np.dtype(dtype).itemsize
+        getattr(balls, name)[:n] = np.frombuffer(data, dtype=dtype, count=n, offset=offset)
+        offset += size
+
+    # 龍捲風（直接給速度，不會動到亂數）
+    values = np.frombuffer(data, dtype=np.float64, count=tornado_count * _TORNADO_FIELDS, offset=offset)
+    offset += values.nbytes
+    rows = values.reshape(-1, _TORNADO_FIELDS).tolist()
+    # 前面幾個沿用原本的龍捲風（handle 不變），多的放回物件池，不夠的從物件池生成
+    pool = sim.tornadoes
+    active = pool.active
+    for tornado, (x, y, width, height, speed, rotation, rotation_speed) in zip(active, rows):
+        tornado.x, tornado.y = x, y
+        tornado.width, tornado.height = int(width), int(height)
+        tornado.speed, tornado.rotation, tornado.rotation_speed = speed, rotation, rotation_speed
+    for tornado in active[tornado_count:]:
+        pool.despawn(tornado)
+    pool.compact()
+    for x, y, width, height, speed, rotation, rotation_speed in rows[len(active):]:
+        tornado = pool.spawn(x, y, int(width), int(height), speed=speed, rotation_speed=rotation_speed)
+        tornado.rotation = rotation
+
+    # 氣球顏色表（顏色編號對應的小圖也要跟著換）
+    balloons = sim.victory_balloons
+    colors = [tuple(c) for c in np.frombuffer(data, dtype=np.uint8, count=color_count * 3,
+                                              offset=offset).reshape(-1, 3).tolist()]
+    offset += color_count * 3
+    if colors != balloons.colors:
+        # 其中一份是另一份的開頭時，共同的編號對應的顏色一樣，畫好的小圖還能用
+        common = min(len(colors), len(balloons.colors))
+        if colors[:common] != balloons.colors[:common]:
+            balloons._sprites = {}
+        balloons.colors = colors
+        balloons._color_index = {color: i for i, color in enumerate(colors)}
+
+    # 氣球
+    if m > balloons.capacity:
+        balloons._allocate(m)
+    balloons.count = m
+    for name, dtype in _BALLOON_ARRAYS:
+        getattr(balloons, name)[:m] = np.frombuffer(data, dtype=dtype, count=m, offset=offset)
+        offset += m * np.dtype(dtype).itemsize
+    if offset != len(data):
+        raise ValueError(f'快照長度不對：讀了 {offset} 位元組，資料有 {len(data)} 位元組')
+
+
+def new_delta_compressor():
+    """
+    建立 make_delta() 用的壓縮器（最快的壓縮等級、沒有檔頭的 deflate）\n
+    返回值：zlib 壓縮器，同一時間只能給一條執行緒用
+    """
+    return zlib.compressobj(1, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+
+def make_delta(previous, current, compressor=None):
+    """
+    算出兩份快照的差異（雙向都能還原）\n
+    \n
+    參數:\n
+    previous, current (bytes): 前一份和後一份快照\n
+    compressor: new_delta_compressor() 建立的壓縮器，重複使用可以省下每次約 300 KB 的壓縮狀態；None 表示臨時建一個\n
+    \n
+    回傳:\n
+    bytes: 壓縮過的差異資料\n
+    \n
+    算法說明:\n
+    - 共同長度的部分存 XOR（一樣的位元組是 0），較長那份多出來的尾巴原樣存\n
+    - XOR 是對稱的，所以拿前一份可以算出後一份，拿後一份也可以算回前一份\n
+    - 相鄰兩步大部分位元組都沒變，XOR 後幾乎全是 0，壓縮率很高\n
+    - 壓縮成沒有檔頭的 deflate 區段，每段都用 Z_FULL_FLUSH 結束，同一個壓縮器連續壓很多段，每一段還是可以單獨解開
+    """
+    common = min(len(previous), len(current))
+    xor = np.bitwise_xor(np.frombuffer(previous, dtype=np.uint8, count=common),
+                         np.frombuffer(current, dtype=np.uint8, count=common))
+    tail = previous[common:] if len(previous) > len(current) else current[common:]
+    body = _DELTA_HEADER.pack(len(previous), len(current)) + xor.tobytes() + tail
+    if compressor is None:
+        compressor = new_delta_compressor()
+    return compressor.compress(body) + compressor.flush(zlib.Z_FULL_FLUSH)
+
+
+def apply_delta(snapshot, delta, forward=True):
+    """
+    用差異資料從一份快照算出另一份\n
+    \n
+    參數:\n
+    snapshot (bytes): 已知的快照\n
+    delta (bytes): make_delta() 產生的差異\n
+    forward (bool): True 表示 snapshot 是前一份、要算後一份；False 表示反過來\n
+    \n
+    回傳:\n
+    bytes: 另一份快照
+    """
+    body = zlib.decompressobj(-zlib.MAX_WBITS).decompress(delta)
+    previous_length, current_length = _DELTA_HEADER.unpack_from(body)
+    known_length, target_length = ((previous_length, current_length) if forward
+                                   else (current_length, previous_length))
+    if len(snapshot) != known_length:
+        raise ValueError('差異資料和快照對不上')
+    common = min(previous_length, current_length)
+    start = _DELTA_HEADER.size
+    xor = np.frombuffer(body, dtype=np.uint8, count=common, offset=start)
+    head = np.bitwise_xor(np.frombuffer(snapshot, dtype=np.uint8, count=common), xor).tobytes()
+    if target_length > common:
+        # 要算的那份比較長，多出來的尾巴就存在差異裡
+        return head + body[start + common:]
+    return head
+
+
+######################物件類別######################
+class RewindBuffer:
+    """
+    倒轉用的環狀緩衝區：記住最近很多步的狀態，記憶體用量有上限\n
+    \n
+    屬性說明：\n
+    max_bytes: 所有差異資料加起來最多佔多少位元組\n
+    max_steps: 最多記住幾步\n
+    head: 最新一步的完整快照（bytes），還沒記錄任何一步時是 None\n
+    deltas: 每一步和下一步的差異（最舊的在最左邊）\n
+    nbytes: 目前所有差異資料的總大小\n
+    \n
+    設計說明:\n
+    - 只保留一份完整快照（最新的），其他每一步只存和下一步的差異\n
+    - 差異是雙向的，倒轉一步只要拿最新的快照套一次最後一個差異，不管記了多少步都一樣快\n
+    - 超過記憶體或步數上限時從最舊的差異開始丟，不需要關鍵幀\n
+    \n
+    使用範例:\n
+        rewind = RewindBuffer()\n
+        sim.step(inputs)\n
+        rewind.push(sim)\n
+        ...\n
+        rewind.rewind(sim)   # 回到上一步
+    """
+    def __init__(self, max_bytes=settings.REWIND_MAX_BYTES, max_steps=settings.REWIND_MAX_STEPS):
+        """
+        建立倒轉緩衝區\n
+        \n
+        參數:\n
+        max_bytes (int): 差異資料的記憶體上限（位元組），範圍 > 0\n
+        max_steps (int): 最多記住幾步，範圍 > 0
+        """
+        self.max_bytes = max_bytes
+        self.max_steps = max_steps
+        self.head = None
+        self.deltas = collections.deque()
+        self.nbytes = 0
+        # 每一步都要壓縮，重複使用同一個壓縮器，不用每次配置新的壓縮狀態
+        self._compressor = new_delta_compressor()
+
+    def __len__(self):
+        """
+        取得可以倒轉幾步\n
+        返回值：步數
+        """
+        return len(self.deltas)
+
+    def clear(self):
+        """
+        丟掉所有記錄
+        """
+        self.head = None
+        self.deltas.clear()
+        self.nbytes = 0
+
+    def push(self, sim):
+        """
+        記住模擬目前的狀態（每一步模擬之後呼叫）\n
+        sim: Simulation 模擬核心
+        """
+        snapshot = capture_state(sim)
+        if self.head is not None:
+            delta = make_delta(self.head, snapshot, self._compressor)
+            self.deltas.append(delta)
+            self.nbytes += len(delta)
+            # 超過上限就從最舊的開始丟
+            while self.deltas and (self.nbytes > self.max_bytes or len(self.deltas) > self.max_steps):
+                self.nbytes -= len(self.deltas.popleft())
+        self.head = snapshot
+
+    def rewind(self, sim, steps=1):
+        """
+        倒轉幾步，把模擬載入成那時候的狀態\n
+        \n
+        參數:\n
+        sim (Simulation): 模擬核心\n
+        steps (int): 要倒轉幾步，超過記錄的步數時只倒轉到最舊的那一步\n
+        \n
+        回傳:\n
+        int: 實際倒轉了幾步（0 表示沒有更早的記錄，模擬不變）
+        """
+        count = min(steps, len(self.deltas))
+        if count == 0:
+            return 0
+        snapshot = self.head
+        for _ in range(count):
+            delta = self.deltas.pop()
+            self.nbytes -= len(delta)
+            snapshot = apply_delta(snapshot, delta, forward=False)
+        self.head = snapshot
+        restore_state(sim, snapshot)
+        return count
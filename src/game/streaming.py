@@ -0,0 +1,179 @@
+######################載入套件######################
+"""
+捲動關卡的區塊串流模組
+關卡比視窗高很多時（例如十萬塊磚、幾萬像素高），不可能每一步都模擬、每一幀都畫整面牆
+這裡把關卡切成一條一條水平的區塊，只有鏡頭附近的區塊會：
+- 建立 Brick 物件、放進空間索引，參加碰撞和點擊
+- 被磚塊圖層畫出來
+
+離鏡頭很遠的區塊會把 Brick 物件丟掉，擊中狀態和耐久度還留在 BrickStore 的陣列裡，
+磚塊位置本來就在（記憶體映射的）關卡檔裡，回到附近時再建回來就和原本一模一樣
+"""
+import math
+import numpy as np
+from config import settings
+from src.physics.spatial_grid import SpatialGrid
+
+
+######################物件類別######################
+class ChunkStreamer:
+    """
+    依照鏡頭位置載入和釋放磚塊區塊\n
+    \n
+    屬性說明：\n
+    store: 整個關卡的磚塊倉庫（Brick 物件只有載入的區塊才有）\n
+    chunk_height: 每條區塊的高度（至少和最高的磚塊一樣高）\n
+    chunk_count: 區塊數量\n
+    loaded: {區塊編號: Brick 列表}，目前有建立 Brick 物件的區塊\n
+    active_range: 目前參加模擬的區塊範圍 (第一條, 最後一條)\n
+    bricks: 參加模擬的磚塊列表（依區塊由上到下）\n
+    grid: 參加模擬的磚塊的空間索引\n
+    load_count, release_count: 累計載入和釋放過幾次區塊\n
+    \n
+    設計說明:\n
+    - 磚塊依左上角分到區塊，磚塊不比區塊高，所以和某條區塊重疊的磚塊只可能屬於它或它上面那條\n
+    - 參加模擬的範圍是「和畫面重疊的區塊」往上下各多 margin 條，球不會離開畫面，碰撞一定完整\n
+    - 超出 keep 條以外才釋放，鏡頭來回小幅移動時不會一直重建\n
+    - 範圍改變時才重建磚塊列表和空間索引（每捲過一條區塊一次），平常每一步完全沒有額外成本\n
+    \n
+    使用範例:\n
+        streamer = ChunkStreamer(store)\n
+        if streamer.update(camera_y, 600):\n
+            bricks, grid = streamer.bricks, streamer.grid
+    """
+    def __init__(self, store, chunk_height=settings.CHUNK_HEIGHT, margin=settings.CHUNK_MARGIN,
+                 keep=settings.CHUNK_KEEP):
+        """
+        依照磚塊位置切出區塊（還不會建立任何 Brick 物件）\n
+        \n
+        參數:\n
+        store (BrickStore): 整個關卡的磚塊倉庫\n
+        chunk_height (int): 每條區塊的高度，比最高的磚塊矮時會自動加高\n
+        margin (int): 畫面上下各多模擬幾條區塊，範圍 >= 0\n
+        keep (int): 離畫面幾條以內的區塊保留 Brick 物件，範圍 >= margin
+        """
+        self.store = store
+        self.margin = margin
+        self.keep = max(keep, margin)
+        tallest = float(store.height.max()) if store.count else 1.0
+        self.chunk_height = max(int(chunk_height), int(math.ceil(tallest)))
+
+        # 每塊磚屬於哪一條區塊，依區塊排好後每條區塊就是連續的一段
+        self.chunk_of = np.maximum(0, np.floor(store.y / self.chunk_height)).astype(np.int64)
+        self.chunk_count = int(self.chunk_of.max()) + 1 if store.count else 1
+        self.order = np.argsort(self.chunk_of, kind='stable')
+        self.starts = np.searchsorted(self.chunk_of[self.order], np.arange(self.chunk_count + 1))
+        # 每條區塊裡最低的磚塊底部，鏡頭捲動時用來決定要捲到哪裡
+        self.chunk_bottom = np.zeros(self.chunk_count)
+        np.maximum.at(self.chunk_bottom, self.chunk_of, store.y + store.height)
+
+        # 一開始沒有任何 Brick 物件
+        store.bricks = [None] * store.count
+        self.loaded = {}
+        self.active_range = None
+        self.bricks = []
+        self.grid = SpatialGrid([])
+        self.load_count = 0
+        self.release_count = 0
+
+    ######################區塊範圍######################
+    def chunk_indices(self, chunk):
+        """
+        取得某條區塊裡的磚塊編號\n
+        chunk: 區塊編號\n
+        返回值：磚塊編號陣列（由小到大）
+        """
+        return self.order[self.starts[chunk]:self.starts[chunk + 1]]
+
+    def visible_range(self, top, bottom, extra=0):
+        """
+        算出和某段高度重疊的區塊範圍\n
+        \n
+        參數:\n
+        top, bottom (float): 範圍的上下緣（世界座標）\n
+        extra (int): 上下各多加幾條\n
+        \n
+        回傳:\n
+        tuple: (第一條, 最後一條)，已經限制在關卡範圍內
+        """
+        # 上面一條區塊的磚塊可能往下伸進這個範圍，所以多看一條
+        first = int(top // self.chunk_height) - 1 - extra
+        last = int(bottom // self.chunk_height) + extra
+        return max(0, first), min(self.chunk_count - 1, last)
+
+    ######################載入和釋放######################
+    def load_chunk(self, chunk):
+        """
+        替某條區塊建立 Brick 物件（已經載入就直接回傳）\n
+        chunk: 區塊編號\n
+        返回值：這條區塊的 Brick 列表
+        """
+        bricks = self.loaded.get(chunk)
+        if bricks is None:
+            bricks = self.store.make_bricks(self.chunk_indices(chunk))
+            self.loaded[chunk] = bricks
+            self.load_count += 1
+        return bricks
+
+    def release_chunk(self, chunk):
+        """
+        丟掉某條區塊的 Brick 物件（擊中狀態留在倉庫裡）\n
+        chunk: 區塊編號
+        """
+        if self.loaded.pop(chunk, None) is not None:
+            self.store.release_bricks(self.chunk_indices(chunk))
+            self.release_count += 1
+
+    def update(self, camera_y, view_height):
+        """
+        依照鏡頭位置更新參加模擬的區塊\n
+        \n
+        參數:\n
+        camera_y (float): 鏡頭上緣的 y 座標（世界座標）\n
+        view_height (int): 畫面高度\n
+        \n
+        回傳:\n
+        bool: True 表示參加模擬的磚塊換了，呼叫端要改用新的 bricks 和 grid\n
+        \n
+        副作用:\n
+        - 載入新進入範圍的區塊，釋放離開保留範圍的區塊\n
+        - 重建 bricks 和 grid，舊的空間索引不再接收磚塊通知
+        """
+        bottom = camera_y + view_height
+        active = self.visible_range(camera_y, bottom, self.margin)
+        if active == self.active_range:
+            return False
+        self.active_range = active
+
+        keep_first, keep_last = self.visible_range(camera_y, bottom, self.keep)
+        for chunk in [c for c in self.loaded if c < keep_first or c > keep_last]:
+            self.release_chunk(chunk)
+
+        bricks = []
+        for chunk in range(active[0], active[1] + 1):
+            bricks.extend(self.load_chunk(chunk))
+
+        # 舊的空間索引從通知名單拿掉，新的建立時會自己登記
+        listeners = self.store.listeners
+        if self.grid in listeners:
+            listeners.remove(self.grid)
+        self.bricks = bricks
+        self.grid = SpatialGrid(bricks)
+        return True
+
+    ######################統計######################
+    def lowest_live_bottom(self):
+        """
+        找出最下面一條還有磚塊的區塊的底部\n
+        返回值：y 座標，整面牆都清空時回傳 None\n
+        \n
+        說明:\n
+        - 直接看倉庫的擊中位元，不用 Brick 物件，沒載入的區塊也算得到\n
+        - 只有剩餘磚塊數量改變時才需要重算
+        """
+        alive = ~self.store.hit_mask()
+        live_per_chunk = np.bincount(self.chunk_of[alive], minlength=self.chunk_count)
+        nonempty = np.nonzero(live_per_chunk)[0]
+        if len(nonempty) == 0:
+            return None
+        return float(self.chunk_bottom[nonempty[-1]])
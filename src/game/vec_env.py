@@ -0,0 +1,375 @@
+######################載入套件######################
+"""
+向量化訓練環境模組
+同時跑 N 局不畫圖的遊戲，每一步所有環境一起前進，給自動底板控制器（例如強化學習）訓練和評估用
+介面和常見的 VecEnv 一樣：reset(seeds) 和 step(actions)，觀察值都是 NumPy 陣列
+
+- 球的規則直接使用 BallSystem 的陣列運算函式（和 Ball.update 的 point 模式完全一樣）
+- 龍捲風的移動和碰撞是 Tornado.update / Tornado.check_collision 的陣列版本
+- 每個環境各有一個 random.Random，亂數用法和 Simulation 相同：同樣的種子和操作，結果一模一樣
+- 一個行程一次跑幾千個環境，每秒可以跑幾十萬個環境步
+"""
+import math
+import random
+import numpy as np
+from config import settings
+from src.game.simulation import Simulation
+from src.physics.ball_system import (bounce_bricks, bounce_paddle, first_brick_hits,
+                                     move_balls, reflect_walls)
+
+
+######################物件類別######################
+class VecEnv:
+    """
+    N 個同步前進的打磚塊環境\n
+    \n
+    屬性說明：\n
+    num_envs: 環境數量\n
+    observation_size: 每個環境的觀察值長度\n
+    observation_slices: 觀察值每一段的位置 {名稱: slice}\n
+    ball_x, ball_y, ball_vx, ball_vy, is_launched: 每個環境的球（長度 N）\n
+    paddle_x: 每個環境的底板左上角 x（長度 N）\n
+    alive: 磚塊是否還在，形狀 (N, 磚塊數)\n
+    tornado_x, tornado_y, tornado_speed, tornado_active: 龍捲風欄位，形狀 (N, 欄位數)\n
+    \n
+    動作:\n
+    每個環境一個數字：底板中心想移到的 x 座標（和滑鼠控制一樣，超出場地會被限制）\n
+    \n
+    觀察值（float32，形狀 (N, observation_size)）:\n
+    ball: 球心 x、y、速度 x、y、是否已發射\n
+    paddle: 底板左上角 x\n
+    tornadoes: 前 max_tornadoes 個龍捲風欄位的 x、y、是否存在\n
+    bricks: 每塊磚是否還在（0 或 1）\n
+    \n
+    回合結束條件（結束的環境會自動開新的一局）:\n
+    - 清空所有磚塊（cleared）\n
+    - 被龍捲風撞到（tornado_hit）\n
+    - 步數到達 max_episode_steps（truncated）\n
+    \n
+    使用範例:\n
+        env = VecEnv(1024)\n
+        obs = env.reset(seeds=range(1024))\n
+        obs, rewards, dones, infos = env.step(obs[:, 0])  # 底板追著球跑
+    """
+    # 獎勵設定
+    REWARD_BRICK = 1.0         # 每撞碎一塊磚
+    REWARD_BALL_LOST = -1.0    # 每掉一次球
+    REWARD_TORNADO = -5.0      # 被龍捲風撞到（回合結束）
+    REWARD_CLEAR = 10.0        # 清空磚塊牆（回合結束）
+
+    # 龍捲風大小和原本的 Tornado 預設值相同
+    TORNADO_WIDTH = 30
+    TORNADO_HEIGHT = 80
+
+    def __init__(self, num_envs, width=settings.WIDTH, height=settings.HEIGHT, ball_speed=6,
+                 tornado_interval=(5, 10), max_tornadoes=4, max_episode_steps=36000):
+        """
+        初始化向量化環境（建立後要先呼叫 reset）\n
+        \n
+        參數:\n
+        num_envs (int): 環境數量，範圍 > 0\n
+        width, height (int): 場地大小\n
+        ball_speed (float): 球的初始速率\n
+        tornado_interval (tuple): 龍捲風生成間隔的範圍（秒）\n
+        max_tornadoes (int): 觀察值裡放幾個龍捲風欄位（場上更多時只放前面幾個）\n
+        max_episode_steps (int): 每局最多幾步，範圍 > 0
+        """
+        self.num_envs = int(num_envs)
+        self.width = width
+        self.height = height
+        self.ball_speed = float(ball_speed)
+        self.tornado_interval = tuple(tornado_interval)
+        self.max_tornadoes = int(max_tornadoes)
+        self.max_episode_steps = int(max_episode_steps)
+        self.dt = settings.FIXED_DT
+
+        # 磚塊牆和底板的配置直接用 Simulation 建出來，保證和遊戲完全一樣
+        template = Simulation(width, height, seed=0)
+        bricks = template.bricks
+        self.brick_x = np.array([b.x for b in bricks], dtype=np.float64)
+        self.brick_y = np.array([b.y for b in bricks], dtype=np.float64)
+        self.brick_length = np.array([b.length for b in bricks], dtype=np.float64)
+        self.brick_height = np.array([b.height for b in bricks], dtype=np.float64)
+        self.num_bricks = len(bricks)
+        paddle = template.paddle
+        self.paddle_start_x = float(paddle.x)
+        self.paddle_y = float(paddle.y)
+        self.paddle_length = paddle.length
+        self.ball_size = template.ball.size
+        self.ball_radius = float(template.ball.radius)
+        # 預設發射角度和 Ball.launch 相同（左上 60 度）
+        launch_angle = -math.radians(60)
+        self.launch_vx = self.ball_speed * math.cos(launch_angle)
+        self.launch_vy = self.ball_speed * math.sin(launch_angle)
+
+        n = self.num_envs
+        self.rngs = [random.Random() for _ in range(n)]
+        self.ball_x = np.zeros(n)
+        self.ball_y = np.zeros(n)
+        self.ball_vx = np.zeros(n)
+        self.ball_vy = np.zeros(n)
+        self.ball_r = np.full(n, self.ball_radius)
+        self.is_launched = np.zeros(n, dtype=bool)
+        self.paddle_x = np.zeros(n)
+        self.alive = np.ones((n, self.num_bricks), dtype=bool)
+        self.tornado_timer = np.zeros(n)
+        self.tornado_spawn_interval = np.zeros(n)
+        self.episode_steps = np.zeros(n, dtype=np.int64)
+        self._allocate_tornadoes(self.max_tornadoes)
+
+        # 觀察值的排列方式
+        layout = [('ball', 5), ('paddle', 1), ('tornadoes', 3 * self.max_tornadoes), ('bricks', self.num_bricks)]
+        self.observation_slices = {}
+        offset = 0
+        for name, size in layout:
+            self.observation_slices[name] = slice(offset, offset + size)
+            offset += size
+        self.observation_size = offset
+        self._obs = np.zeros((n, self.observation_size), dtype=np.float32)
+
+    def _allocate_tornadoes(self, slots):
+        """
+        配置（或擴大）龍捲風欄位，保留既有的龍捲風\n
+        slots: 每個環境最多同時有幾個龍捲風
+        """
+        def grow(old, dtype):
+            new = np.zeros((self.num_envs, slots), dtype=dtype)
+            if old is not None:
+                new[:, :old.shape[1]] = old
+            return new
+
+        self.tornado_x = grow(getattr(self, 'tornado_x', None), np.float64)
+        self.tornado_y = grow(getattr(self, 'tornado_y', None), np.float64)
+        self.tornado_speed = grow(getattr(self, 'tornado_speed', None), np.float64)
+        self.tornado_active = grow(getattr(self, 'tornado_active', None), bool)
+
+    ######################開局######################
+    def reset(self, seeds=None):
+        """
+        所有環境重新開局\n
+        \n
+        參數:\n
+        seeds (iterable): 每個環境的亂數種子，長度 num_envs；None 表示隨機\n
+        \n
+        回傳:\n
+        ndarray: 觀察值，形狀 (num_envs, observation_size)
+        """
+        if seeds is None:
+            seeds = [random.randrange(2 ** 32) for _ in range(self.num_envs)]
+        seeds = list(seeds)
+        if len(seeds) != self.num_envs:
+            raise ValueError(f"需要 {self.num_envs} 個種子，收到 {len(seeds)} 個")
+        for i, seed in enumerate(seeds):
+            self.rngs[i].seed(seed)
+        self._reset_envs(np.arange(self.num_envs))
+        return self.observe()
+
+    def _reset_envs(self, index):
+        """
+        把指定的環境恢復成剛開局的狀態（亂數來源接著用，不重新設定種子）\n
+        index: 要重置的環境編號陣列
+        """
+        self.paddle_x[index] = self.paddle_start_x
+        self.ball_x[index] = self.paddle_start_x + self.paddle_length / 2
+        self.ball_y[index] = self.paddle_y - self.ball_size
+        self.ball_vx[index] = 0.0
+        self.ball_vy[index] = 0.0
+        self.is_launched[index] = False
+        self.alive[index] = True
+        self.tornado_active[index] = False
+        self.tornado_timer[index] = 0.0
+        self.episode_steps[index] = 0
+        # 和 Simulation 建立時一樣，先抽第一次龍捲風的生成間隔
+        for i in index:
+            self.tornado_spawn_interval[i] = self.rngs[i].uniform(*self.tornado_interval)
+
+    ######################前進一步######################
+    def step(self, actions, launch=True):
+        """
+        所有環境一起前進一步\n
+        \n
+        參數:\n
+        actions (array): 每個環境的底板中心目標 x，長度 num_envs\n
+        launch (bool 或 array): 是否按下發射，可以每個環境各自指定；預設一直按著（球掉了馬上再發射）\n
+        \n
+        回傳:\n
+        tuple: (觀察值, 獎勵, 是否結束, 資訊)\n
+        - 觀察值：形狀 (num_envs, observation_size)，結束的環境已經是新一局的觀察值\n
+        - 獎勵：float32 陣列\n
+        - 是否結束：布林陣列\n
+        - 資訊：dict，每一項都是長度 num_envs 的陣列：\n
+          bricks_hit、ball_lost、tornado_hit、cleared、truncated、episode_steps，\n
+          以及 final_observation（結束的環境在重置前的最後觀察值，其他列是 0）\n
+        \n
+        執行順序和 Simulation.step 相同:\n
+        1. 移動底板、發射\n
+        2. 生成龍捲風\n
+        3. 移動龍捲風並檢查是否撞到球\n
+        4. 移動球並處理碰撞
+        """
+        dt = self.dt
+        n = self.num_envs
+
+        # 1. 套用動作：底板中心移到目標位置，不能超出場地
+        target = np.asarray(actions, dtype=np.float64) - self.paddle_length // 2
+        np.clip(target, 0, self.width - self.paddle_length, out=self.paddle_x)
+        to_launch = ~self.is_launched & np.asarray(launch, dtype=bool)
+        self.ball_vx[to_launch] = self.launch_vx
+        self.ball_vy[to_launch] = self.launch_vy
+        self.is_launched |= to_launch
+
+        # 2. 生成龍捲風（很少發生，只對需要生成的環境逐一處理，亂數用法和 Simulation 相同）
+        self.tornado_timer += dt
+        for i in np.nonzero(self.tornado_timer >= self.tornado_spawn_interval)[0]:
+            self._spawn_tornado(i)
+
+        # 3. 移動龍捲風，檢查和球的矩形是否重疊（Tornado.check_collision 的陣列版）
+        active = self.tornado_active
+        self.tornado_y += np.where(active, self.tornado_speed * (self.dt * 60.0), 0.0)
+        ball_left = (self.ball_x - self.ball_r)[:, None]
+        ball_right = (self.ball_x + self.ball_r)[:, None]
+        ball_top = (self.ball_y - self.ball_r)[:, None]
+        ball_bottom = (self.ball_y + self.ball_r)[:, None]
+        overlap = (active &
+                   (ball_right > self.tornado_x) & (ball_left < self.tornado_x + self.TORNADO_WIDTH) &
+                   (ball_bottom > self.tornado_y) & (ball_top < self.tornado_y + self.TORNADO_HEIGHT))
+        tornado_hit = overlap.any(axis=1)
+        # 離開場地的龍捲風移除
+        active &= ~(self.tornado_y > self.height)
+
+        # 4. 移動球並處理碰撞（被龍捲風撞到的環境這一局已經結束，不再移動球）
+        bricks_hit, ball_lost = self._update_balls(~tornado_hit)
+
+        self.episode_steps += 1
+        cleared = ~self.alive.any(axis=1)
+        truncated = (self.episode_steps >= self.max_episode_steps) & ~cleared & ~tornado_hit
+        dones = cleared | tornado_hit | truncated
+
+        rewards = (bricks_hit * self.REWARD_BRICK + ball_lost * self.REWARD_BALL_LOST +
+                   tornado_hit * self.REWARD_TORNADO + cleared * self.REWARD_CLEAR).astype(np.float32)
+
+        obs = self.observe()
+        final_observation = np.zeros_like(obs)
+        infos = {
+            'bricks_hit': bricks_hit,
+            'ball_lost': ball_lost,
+            'tornado_hit': tornado_hit,
+            'cleared': cleared,
+            'truncated': truncated,
+            'episode_steps': self.episode_steps.copy(),
+            'final_observation': final_observation,
+        }
+        done_index = np.nonzero(dones)[0]
+        if len(done_index):
+            final_observation[done_index] = obs[done_index]
+            self._reset_envs(done_index)
+            obs = self.observe()
+        return obs, rewards, dones, infos
+
+    def _spawn_tornado(self, i):
+        """
+        在第 i 個環境生成一個龍捲風（和 Simulation.spawn_tornado + Tornado.__init__ 相同的亂數順序）\n
+        i: 環境編號
+        """
+        rng = self.rngs[i]
+        free = np.nonzero(~self.tornado_active[i])[0]
+        if len(free) == 0:
+            # 欄位不夠就加倍（只有龍捲風間隔設得很短時才會發生）
+            slot = self.tornado_active.shape[1]
+            self._allocate_tornadoes(slot * 2)
+        else:
+            slot = free[0]
+        self.tornado_x[i, slot] = rng.randint(0, self.width - self.TORNADO_WIDTH)
+        self.tornado_y[i, slot] = -80
+        self.tornado_speed[i, slot] = rng.uniform(1, 3)
+        rng.uniform(5, 10)  # 旋轉速度只影響畫面，這裡不需要，但要照樣抽一次讓亂數順序一致
+        self.tornado_active[i, slot] = True
+        self.tornado_timer[i] = 0.0
+        self.tornado_spawn_interval[i] = rng.uniform(*self.tornado_interval)
+
+    def _update_balls(self, movable):
+        """
+        移動所有環境的球並處理碰撞，規則和 Ball.update 的 point 模式相同\n
+        \n
+        參數:\n
+        movable (ndarray): 布林陣列，False 的環境這一步不移動球\n
+        \n
+        回傳:\n
+        tuple: (每個環境撞碎幾塊磚, 每個環境是否掉球)，都是長度 num_envs 的陣列
+        """
+        n = self.num_envs
+        bricks_hit = np.zeros(n, dtype=np.int64)
+        ball_lost = np.zeros(n, dtype=bool)
+        paddle_center = self.paddle_x + self.paddle_length / 2
+
+        # 還沒發射的球跟著底板走
+        waiting = ~self.is_launched
+        self.ball_x[waiting] = paddle_center[waiting]
+        self.ball_y[waiting] = self.paddle_y - self.ball_r[waiting] - 1
+
+        index = np.nonzero(self.is_launched & movable)[0]
+        if len(index) == 0:
+            return bricks_hit, ball_lost
+        x = self.ball_x[index]
+        y = self.ball_y[index]
+        vx = self.ball_vx[index]
+        vy = self.ball_vy[index]
+        r = self.ball_r[index]
+        paddle_x = self.paddle_x[index]
+
+        move_balls(x, y, vx, vy, self.dt)
+        reflect_walls(x, y, vx, vy, r, self.width)
+        bounce_paddle(x, y, vx, vy, r, paddle_x, self.paddle_y, self.paddle_length)
+
+        # 每個環境有自己的一面牆，不會互相搶磚塊
+        hit_index = first_brick_hits(x, y, self.brick_x, self.brick_y, self.brick_length,
+                                     self.brick_height, self.alive[index])
+        winners = hit_index >= 0
+        if winners.any():
+            bounce_bricks(vx, vy, winners)
+            self.alive[index[winners], hit_index[winners]] = False
+            bricks_hit[index[winners]] = 1
+
+        # 掉到場地底部的球放回底板中央上方並標記為未發射
+        lost = y - r > self.height
+        if lost.any():
+            x[lost] = paddle_x[lost] + self.paddle_length / 2
+            y[lost] = self.paddle_y - r[lost] - 1
+            vx[lost] = 0.0
+            vy[lost] = 0.0
+            self.is_launched[index[lost]] = False
+            ball_lost[index[lost]] = True
+
+        self.ball_x[index] = x
+        self.ball_y[index] = y
+        self.ball_vx[index] = vx
+        self.ball_vy[index] = vy
+        return bricks_hit, ball_lost
+
+    ######################觀察值######################
+    def observe(self):
+        """
+        把目前的狀態排成觀察值陣列\n
+        返回值：float32 陣列，形狀 (num_envs, observation_size)（每次都是新的陣列，可以放心保存）
+        """
+        obs = self._obs
+        s = self.observation_slices
+        ball = obs[:, s['ball']]
+        ball[:, 0] = self.ball_x
+        ball[:, 1] = self.ball_y
+        ball[:, 2] = self.ball_vx
+        ball[:, 3] = self.ball_vy
+        ball[:, 4] = self.is_launched
+        obs[:, s['paddle']] = self.paddle_x[:, None]
+
+        k = self.max_tornadoes
+        tornadoes = obs[:, s['tornadoes']].reshape(self.num_envs, k, 3)
+        slots = min(k, self.tornado_active.shape[1])
+        active = self.tornado_active[:, :slots]
+        tornadoes[:, :slots, 0] = np.where(active, self.tornado_x[:, :slots], 0.0)
+        tornadoes[:, :slots, 1] = np.where(active, self.tornado_y[:, :slots], 0.0)
+        tornadoes[:, :slots, 2] = active
+        obs[:, s['tornadoes']] = tornadoes.reshape(self.num_envs, 3 * k)
+
+        obs[:, s['bricks']] = self.alive
+        return obs.copy()
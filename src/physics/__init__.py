@@ -0,0 +1,10 @@
+"""
+物理運算模組\n
+
+包含大量物件同時運算時使用的工具：\n
+- ball_system: 用 NumPy 陣列一次處理很多顆球的移動和碰撞\n
+- spatial_grid: 磚塊的均勻網格索引，點和圓的查詢不受磚塊數量影響\n
+- swept: 掃掠碰撞，算出碰撞時間和碰撞面，高速的球也不會穿牆\n
+
+這些工具和 src/entities 裡的單一物件規則保持一致，只是換成批次運算\n
+"""
@@ -0,0 +1,658 @@
+######################載入套件######################
+"""
+批次球體物理模組
+用 NumPy 陣列同時記錄很多顆球的位置和速度，一次算完所有球的移動和碰撞
+規則和 Ball.update 完全一樣：牆壁反彈、底板反彈（含撞擊位置轉向）、磚塊反彈加速
+適合多球模式，幾百到幾千顆球也能維持 60 FPS
+"""
+import math
+import numpy as np
+import pygame
+from src.physics.swept import (MAX_CONTACTS_PER_STEP, reflect, sweep_circle_rect,
+                               sweep_circles_rects, sweep_walls_batch)
+from src.rendering.sprite_cache import sprite_cache
+
+
+######################定義函式區######################
+def move_balls(x, y, velocity_x, velocity_y, dt):
+    """
+    依照速度移動所有球（直接修改傳入的陣列）\n
+    \n
+    參數:\n
+    x, y (ndarray): 球心座標陣列\n
+    velocity_x, velocity_y (ndarray): 速度陣列，單位是「每 1/60 秒移動的像素」\n
+    dt (float): 這一步的時間長度（秒）
+    """
+    # 和 Ball.update 一樣把速度縮放到與幀率無關
+    x += velocity_x * (dt * 60.0)
+    y += velocity_y * (dt * 60.0)
+
+
+def reflect_walls(x, y, velocity_x, velocity_y, radius, width, top=0.0):
+    """
+    處理左右牆和天花板的反彈（直接修改傳入的陣列）\n
+    \n
+    參數:\n
+    x, y (ndarray): 球心座標陣列\n
+    velocity_x, velocity_y (ndarray): 速度陣列\n
+    radius (ndarray): 每顆球的半徑\n
+    width (int): 場地寬度，範圍 > 0\n
+    top (float): 天花板的 y 座標（捲動關卡是鏡頭的上緣）\n
+    \n
+    規則和 Ball.update 相同：左牆優先，沒撞左牆才檢查右牆
+    """
+    # 撞到左牆，限制位置並反彈
+    hit_left = x - radius <= 0
+    x[hit_left] = radius[hit_left]
+    velocity_x[hit_left] = -velocity_x[hit_left]
+
+    # 撞到右牆（已經撞左牆的球不再檢查），限制位置並反彈
+    hit_right = ~hit_left & (x + radius >= width)
+    x[hit_right] = width - radius[hit_right]
+    velocity_x[hit_right] = -velocity_x[hit_right]
+
+    # 撞到天花板，限制位置並反彈
+    hit_top = y - radius <= top
+    y[hit_top] = top + radius[hit_top]
+    velocity_y[hit_top] = -velocity_y[hit_top]
+
+
+def bounce_paddle(x, y, velocity_x, velocity_y, radius, paddle_x, paddle_y, paddle_length):
+    """
+    處理底板反彈和撞擊位置轉向（直接修改傳入的陣列）\n
+    \n
+    參數:\n
+    x, y (ndarray): 球心座標陣列\n
+    velocity_x, velocity_y (ndarray): 速度陣列\n
+    radius (ndarray): 每顆球的半徑\n
+    paddle_x, paddle_y (float 或 ndarray): 底板左上角座標，可以每顆球各自一塊底板\n
+    paddle_length (float 或 ndarray): 底板寬度\n
+    \n
+    回傳:\n
+    ndarray: 布林陣列，True 表示這顆球這一步撞到底板\n
+    \n
+    算法說明:\n
+    - 球心在底板左右範圍內、球底碰到底板、而且正在往下掉，才算撞到\n
+    - relative_hit 是撞到底板的哪個位置（-1 最左邊，1 最右邊）\n
+    - 撞越邊邊，水平速度改變越多
+    """
+    hit = ((paddle_x <= x) & (x <= paddle_x + paddle_length) &
+           (y + radius >= paddle_y) & (velocity_y > 0))
+    if not hit.any():
+        return hit
+
+    # 底板位置可能是單一數值，也可能是每顆球各一個，統一成陣列方便挑選
+    paddle_x = np.broadcast_to(paddle_x, x.shape)
+    paddle_y = np.broadcast_to(paddle_y, x.shape)
+    paddle_length = np.broadcast_to(paddle_length, x.shape)
+
+    # 把球放回底板頂部，並讓它往上彈
+    y[hit] = paddle_y[hit] - radius[hit] - 1
+    velocity_y[hit] = -np.abs(velocity_y[hit])
+
+    # 根據撞擊底板的位置調整水平速度
+    half_length = paddle_length[hit] / 2
+    relative_hit = (x[hit] - (paddle_x[hit] + half_length)) / half_length
+    velocity_x[hit] += relative_hit * 2.5
+    return hit
+
+
+def first_brick_hits(x, y, brick_x, brick_y, brick_length, brick_height, alive, chunk_cells=1 << 22):
+    """
+    找出每顆球球心所在的第一個磚塊\n
+    \n
+    參數:\n
+    x, y (ndarray): 球心座標陣列，長度 N\n
+    brick_x, brick_y (ndarray): 磚塊左上角座標，長度 M\n
+    brick_length, brick_height (ndarray): 磚塊寬高，長度 M\n
+    alive (ndarray): 磚塊是否還在，長度 M 或形狀 (N, M)（每顆球各自一面牆）\n
+    chunk_cells (int): 一次最多比對幾組「球 x 磚塊」，避免大牆一次吃掉太多記憶體\n
+    \n
+    回傳:\n
+    ndarray: 每顆球撞到的磚塊編號（依磚塊列表順序取第一個），-1 表示沒撞到\n
+    \n
+    說明:\n
+    - 和 Ball.update 一樣只看球心是否落在磚塊範圍內（邊界也算）\n
+    - 球很多、磚塊也很多時會分批比對
+    """
+    ball_count = len(x)
+    brick_count = len(brick_x)
+    result = np.full(ball_count, -1, dtype=np.int64)
+    if ball_count == 0 or brick_count == 0:
+        return result
+
+    # 每批處理幾顆球，讓「球 x 磚塊」的比對表不要太大
+    batch = max(1, chunk_cells // brick_count)
+    per_ball_alive = alive.ndim == 2
+    for start in range(0, ball_count, batch):
+        stop = min(start + batch, ball_count)
+        bx = x[start:stop, None]
+        by = y[start:stop, None]
+        inside = ((brick_x <= bx) & (bx <= brick_x + brick_length) &
+                  (brick_y <= by) & (by <= brick_y + brick_height))
+        inside &= alive[start:stop] if per_ball_alive else alive
+        # argmax 會找到每一列第一個 True，整列都是 False 時要改成 -1
+        first = inside.argmax(axis=1)
+        has_hit = inside[np.arange(stop - start), first]
+        result[start:stop] = np.where(has_hit, first, -1)
+    return result
+
+
+def first_candidate_hits(x, y, candidates, brick_x, brick_y, brick_length, brick_height):
+    """
+    只在空間索引給的候選磚塊裡，找出每顆球球心所在的第一個磚塊\n
+    \n
+    參數:\n
+    x, y (ndarray): 球心座標陣列，長度 N\n
+    candidates (ndarray): 形狀 (N, K) 的候選磚塊編號，-1 表示空位\n
+    brick_x, brick_y (ndarray): 全部磚塊的左上角座標\n
+    brick_length, brick_height (ndarray): 全部磚塊的寬高\n
+    \n
+    回傳:\n
+    ndarray: 每顆球撞到的磚塊編號，-1 表示沒撞到\n
+    \n
+    說明:\n
+    - 候選編號已經由小到大排好，第一個命中的就是列表順序的第一個\n
+    - 被擊中的磚塊已經從索引移除，不用再另外檢查是否還在
+    """
+    valid = candidates >= 0
+    index = np.where(valid, candidates, 0)
+    bx = x[:, None]
+    by = y[:, None]
+    inside = (valid &
+              (brick_x[index] <= bx) & (bx <= brick_x[index] + brick_length[index]) &
+              (brick_y[index] <= by) & (by <= brick_y[index] + brick_height[index]))
+    first = inside.argmax(axis=1)
+    rows = np.arange(len(x))
+    return np.where(inside[rows, first], candidates[rows, first], -1).astype(np.int64)
+
+
+def resolve_brick_conflicts(hit_index):
+    """
+    同一個磚塊被好幾顆球同時撞到時，只算編號最小的那顆球\n
+    \n
+    參數:\n
+    hit_index (ndarray): first_brick_hits 的結果\n
+    \n
+    回傳:\n
+    ndarray: 布林陣列，True 表示這顆球真的撞碎了磚塊\n
+    \n
+    說明:\n
+    - 一顆一顆更新時，前面的球會先把磚塊打掉，後面的球就撞不到了\n
+    - 這裡用同樣的順序決定誰先撞到；沒搶到的球這一步不反彈，下一步再檢查
+    """
+    winners = np.zeros(len(hit_index), dtype=bool)
+    hitters = np.nonzero(hit_index >= 0)[0]
+    if len(hitters) == 0:
+        return winners
+    # np.unique 回傳每個磚塊第一次出現的位置，也就是編號最小的球
+    _, first_seen = np.unique(hit_index[hitters], return_index=True)
+    winners[hitters[first_seen]] = True
+    return winners
+
+
+def bounce_bricks(velocity_x, velocity_y, winners):
+    """
+    撞到磚塊的球反轉垂直速度並小幅加速（直接修改傳入的陣列）\n
+    \n
+    參數:\n
+    velocity_x, velocity_y (ndarray): 速度陣列\n
+    winners (ndarray): 布林陣列，True 表示這顆球撞到磚塊
+    """
+    # 簡單反應：反轉 y 方向速度，並小幅增加速度以增加挑戰性
+    velocity_y[winners] = -velocity_y[winners] * 1.02
+    velocity_x[winners] *= 1.02
+
+
+######################物件類別######################
+class BallSystem:
+    """
+    批次球體系統：用 NumPy 陣列管理很多顆球\n
+    \n
+    屬性說明：\n
+    count: 目前有幾顆球（整數）\n
+    x, y: 球心座標陣列（只有前 count 個有效）\n
+    velocity_x, velocity_y: 速度陣列\n
+    radius: 每顆球的半徑（和 Ball.radius 一樣是直徑整除 2）\n
+    size: 每顆球的直徑\n
+    speed: 每顆球發射時的速率\n
+    is_launched: 每顆球是否已發射\n
+    color: 沒有圖片時畫圓形用的顏色\n
+    image: 球的圖片物件（可選）\n
+    collision_mode: 碰撞方式，'point' 只檢查球心，'swept' 沿著移動路線找碰撞點\n
+    lost_count: 從建立到現在總共掉出場地的球數\n
+    \n
+    使用範例:\n
+        balls = BallSystem((255, 255, 255))\n
+        for _ in range(500):\n
+            balls.add(400, 500)\n
+        balls.launch()\n
+        balls.update(dt, 800, 600, paddle, bricks)
+    """
+    def __init__(self, color, size=12, speed=6, capacity=64):
+        """
+        初始化批次球體系統\n
+        \n
+        參數:\n
+        color (tuple): 球的顏色 (r,g,b)\n
+        size (int): 新增球時預設的直徑，範圍 > 0\n
+        speed (float): 新增球時預設的速率，範圍 > 0\n
+        capacity (int): 一開始預留幾顆球的空間，不夠時會自動加倍
+        """
+        self.color = color
+        self.default_size = int(size)
+        self.default_speed = float(speed)
+        self.image = None
+        # 碰撞方式：'point' 是原本的球心檢查，'swept' 是不會穿牆的掃掠碰撞
+        self.collision_mode = 'point'
+        self.count = 0
+        # 從建立到現在總共掉了幾顆球（統計用）
+        self.lost_count = 0
+        self._allocate(max(1, int(capacity)))
+        # 磚塊位置陣列的快取：磚塊列表沒換就不用重建
+        # 留著列表本身（不是 id），列表被釋放後 id 被別的列表重複使用也不會拿到舊的陣列
+        self._brick_cache_list = None
+        self._brick_cache_len = -1
+        self._brick_arrays = None
+
+    def _allocate(self, capacity):
+        """
+        配置（或擴大）所有狀態陣列，保留既有的球\n
+        capacity: 新的容量
+        """
+        def grow(old, dtype):
+            new = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                new[:self.count] = old[:self.count]
+            return new
+
+        self.x = grow(getattr(self, 'x', None), np.float64)
+        self.y = grow(getattr(self, 'y', None), np.float64)
+        self.velocity_x = grow(getattr(self, 'velocity_x', None), np.float64)
+        self.velocity_y = grow(getattr(self, 'velocity_y', None), np.float64)
+        self.radius = grow(getattr(self, 'radius', None), np.float64)
+        self.size = grow(getattr(self, 'size', None), np.int32)
+        self.speed = grow(getattr(self, 'speed', None), np.float64)
+        self.is_launched = grow(getattr(self, 'is_launched', None), bool)
+        self.capacity = capacity
+
+    ######################新增和發射######################
+    def add(self, x, y, size=None, speed=None):
+        """
+        新增一顆還沒發射的球\n
+        \n
+        參數:\n
+        x, y (float): 球心座標\n
+        size (int): 直徑，None 表示使用預設值\n
+        speed (float): 速率，None 表示使用預設值\n
+        \n
+        回傳:\n
+        int: 新球的編號
+        """
+        # 空間不夠就加倍，避免每加一顆就重新配置一次
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        index = self.count
+        size = self.default_size if size is None else int(size)
+        self.x[index] = x
+        self.y[index] = y
+        self.velocity_x[index] = 0.0
+        self.velocity_y[index] = 0.0
+        self.size[index] = size
+        self.radius[index] = size // 2
+        self.speed[index] = self.default_speed if speed is None else float(speed)
+        self.is_launched[index] = False
+        self.count += 1
+        return index
+
+    def clear(self):
+        """
+        移除所有球（保留已配置的空間）
+        """
+        self.count = 0
+
+    def launch(self, angle=None, spread=0.0):
+        """
+        發射所有還沒發射的球\n
+        \n
+        參數:\n
+        angle (float): 中心發射角度（弧度），None 表示和 Ball.launch 一樣朝 -60 度\n
+        spread (float): 角度散開的總範圍（弧度），0 表示全部同方向\n
+        \n
+        說明:\n
+        - 多顆球會平均分散在 angle ± spread/2 之間，看起來像散彈
+        """
+        n = self.count
+        waiting = np.nonzero(~self.is_launched[:n])[0]
+        if len(waiting) == 0:
+            return
+        if angle is None:
+            angle = -math.radians(60)
+        # 只有一顆球時就照中心角度發射
+        if len(waiting) > 1 and spread:
+            angles = angle + np.linspace(-spread / 2, spread / 2, len(waiting))
+        else:
+            angles = np.full(len(waiting), angle)
+        self.velocity_x[waiting] = self.speed[waiting] * np.cos(angles)
+        self.velocity_y[waiting] = self.speed[waiting] * np.sin(angles)
+        self.is_launched[waiting] = True
+
+    def reset_all(self, paddle):
+        """
+        把所有球放回底板上方並設為未發射\n
+        paddle: 底板物件
+        """
+        n = self.count
+        self.is_launched[:n] = False
+        self.velocity_x[:n] = 0.0
+        self.velocity_y[:n] = 0.0
+        self.x[:n] = paddle.x + paddle.length / 2
+        self.y[:n] = paddle.y - self.radius[:n] - 1
+
+    ######################物理更新######################
+    def brick_arrays(self, bricks):
+        """
+        取得磚塊位置和大小的陣列（有快取）\n
+        \n
+        參數:\n
+        bricks (list): 磚塊列表\n
+        \n
+        回傳:\n
+        tuple: (brick_x, brick_y, brick_length, brick_height)\n
+        \n
+        說明:\n
+        - 磚塊位置在遊戲中不會變，只有換了一個列表（用 is 比較）或長度變了才重建陣列\n
+        - 直接修改同一個列表裡的磚塊（長度不變）時，要先呼叫 invalidate_bricks()
+        """
+        if bricks is not self._brick_cache_list or len(bricks) != self._brick_cache_len:
+            self._brick_arrays = (
+                np.array([b.x for b in bricks], dtype=np.float64),
+                np.array([b.y for b in bricks], dtype=np.float64),
+                np.array([b.length for b in bricks], dtype=np.float64),
+                np.array([b.height for b in bricks], dtype=np.float64),
+            )
+            self._brick_cache_list = bricks
+            self._brick_cache_len = len(bricks)
+        return self._brick_arrays
+
+    def invalidate_bricks(self):
+        """
+        丟掉磚塊位置陣列的快取，下次更新時重建（磚塊列表被原地修改時呼叫）
+        """
+        self._brick_cache_list = None
+        self._brick_cache_len = -1
+        self._brick_arrays = None
+
+    def update(self, dt, width, height, paddle, bricks, brick_grid=None, top=0.0):
+        """
+        一次更新所有球的位置並處理碰撞\n
+        \n
+        參數:\n
+        dt (float): 這一步的時間長度（秒）\n
+        width (int): 場地寬度，範圍 > 0\n
+        height (int): 場地高度，範圍 > 0\n
+        paddle (Paddle): 底板物件\n
+        bricks (list): 磚塊列表\n
+        brick_grid (SpatialGrid): 磚塊的空間索引（可選），有的話每顆球只比對附近的磚塊\n
+        top (float): 場地上緣的 y 座標，捲動關卡是鏡頭的位置；場地範圍是 top 到 top + height\n
+        \n
+        回傳:\n
+        int: 這一步被撞碎的磚塊數量\n
+        \n
+        更新邏輯（和 Ball.update 同順序）:\n
+        1. 未發射的球黏在底板上方\n
+        2. 已發射的球移動、撞牆、撞底板、撞磚塊\n
+        3. 掉出場地底部的球放回底板上方
+        """
+        n = self.count
+        if n == 0:
+            return 0
+        x = self.x[:n]
+        y = self.y[:n]
+        velocity_x = self.velocity_x[:n]
+        velocity_y = self.velocity_y[:n]
+        radius = self.radius[:n]
+        launched = self.is_launched[:n]
+        paddle_center = paddle.x + paddle.length / 2
+
+        # 還沒發射的球跟著底板走
+        waiting = ~launched
+        x[waiting] = paddle_center
+        y[waiting] = paddle.y - radius[waiting] - 1
+
+        active = np.nonzero(launched)[0]
+        if len(active) == 0:
+            return 0
+
+        # 把已發射的球拿出來一起算，算完再寫回去
+        ax = x[active]
+        ay = y[active]
+        avx = velocity_x[active]
+        avy = velocity_y[active]
+        ar = radius[active]
+
+        if self.collision_mode == 'swept':
+            bricks_hit = self.sweep_active(ax, ay, avx, avy, ar, dt, width, paddle, bricks, brick_grid, top)
+        else:
+            move_balls(ax, ay, avx, avy, dt)
+            reflect_walls(ax, ay, avx, avy, ar, width, top)
+            bounce_paddle(ax, ay, avx, avy, ar, paddle.x, paddle.y, paddle.length)
+
+            # 磚塊碰撞：找出每顆球第一個撞到的磚塊，同一塊只讓一顆球撞碎
+            bricks_hit = 0
+            if len(bricks):
+                brick_x, brick_y, brick_length, brick_height = self.brick_arrays(bricks)
+                if brick_grid is not None:
+                    # 有空間索引：每顆球只看自己那一格的幾個磚塊
+                    candidates = brick_grid.candidates_for_points(ax, ay)
+                    hit_index = first_candidate_hits(ax, ay, candidates, brick_x, brick_y,
+                                                     brick_length, brick_height)
+                else:
+                    alive = np.fromiter((not b.is_hit for b in bricks), dtype=bool, count=len(bricks))
+                    hit_index = first_brick_hits(ax, ay, brick_x, brick_y, brick_length, brick_height, alive)
+                winners = resolve_brick_conflicts(hit_index)
+                if winners.any():
+                    bounce_bricks(avx, avy, winners)
+                    # 有耐久度的磚塊撞一下不一定會碎，只算真的撞碎的
+                    bricks_hit = sum(bricks[index].hit() for index in hit_index[winners])
+
+        x[active] = ax
+        y[active] = ay
+        velocity_x[active] = avx
+        velocity_y[active] = avy
+
+        # 掉到場地底部的球放回底板中央上方並標記為未發射
+        lost = active[ay - ar > top + height]
+        if len(lost):
+            x[lost] = paddle_center
+            y[lost] = paddle.y - radius[lost] - 1
+            velocity_x[lost] = 0.0
+            velocity_y[lost] = 0.0
+            launched[lost] = False
+            self.lost_count += len(lost)
+        return bricks_hit
+
+    def sweep_active(self, x, y, velocity_x, velocity_y, radius, dt, width, paddle, bricks, brick_grid=None,
+                     ceiling=0.0):
+        """
+        用掃掠碰撞一次移動很多顆已發射的球（直接修改傳入的陣列）\n
+        \n
+        參數:\n
+        x, y, velocity_x, velocity_y, radius (ndarray): 已發射球的狀態\n
+        dt (float): 這一步的時間長度（秒）\n
+        width (int): 場地寬度\n
+        paddle (Paddle): 底板物件\n
+        bricks (list): 磚塊列表\n
+        brick_grid (SpatialGrid): 磚塊空間索引（可選）\n
+        ceiling (float): 天花板的 y 座標\n
+        \n
+        回傳:\n
+        int: 這一步被撞碎的磚塊數量\n
+        \n
+        處理流程和 sweep_ball 相同，只是每一輪把所有還在移動的球一起算：\n
+        1. 找出每顆球最先碰到的牆、底板或磚塊\n
+        2. 移到碰撞點並反彈，用剩下的時間進入下一輪\n
+        3. 沒碰到東西的球直接走完，不再參加下一輪\n
+        \n
+        注意:\n
+        - 同一輪有好幾顆球碰到同一個磚塊時，每顆都會反彈，但磚塊只算一次
+        """
+        if len(bricks):
+            brick_x, brick_y, brick_length, brick_height = self.brick_arrays(bricks)
+        scale = dt * 60.0
+        remaining = np.ones(len(x))
+        moving = np.arange(len(x))
+        bricks_hit = 0
+        for _ in range(MAX_CONTACTS_PER_STEP):
+            if len(moving) == 0:
+                break
+            px = x[moving]
+            py = y[moving]
+            pr = radius[moving]
+            dx = velocity_x[moving] * scale * remaining[moving]
+            dy = velocity_y[moving] * scale * remaining[moving]
+
+            # 先看牆，再看底板，誰比較早碰到就用誰
+            t, normal_x, normal_y = sweep_walls_batch(px, py, dx, dy, pr, width, ceiling)
+            on_paddle = np.zeros(len(moving), dtype=bool)
+            paddle_t, paddle_nx, paddle_ny = sweep_circles_rects(
+                px, py, dx, dy, pr, paddle.x, paddle.y, paddle.x + paddle.length, paddle.y + paddle.height)
+            better = paddle_t < t
+            t = np.where(better, paddle_t, t)
+            normal_x = np.where(better, paddle_nx, normal_x)
+            normal_y = np.where(better, paddle_ny, normal_y)
+            on_paddle |= better
+
+            # 再看磚塊：只比對移動路線範圍裡的候選磚塊
+            brick_index = np.full(len(moving), -1, dtype=np.int64)
+            if len(bricks):
+                left = np.minimum(px, px + dx) - pr
+                top = np.minimum(py, py + dy) - pr
+                right = np.maximum(px, px + dx) + pr
+                bottom = np.maximum(py, py + dy) + pr
+                if brick_grid is not None:
+                    candidates, overflow = brick_grid.candidates_for_boxes(left, top, right, bottom)
+                else:
+                    alive = np.nonzero(np.fromiter((not b.is_hit for b in bricks), dtype=bool,
+                                                   count=len(bricks)))[0]
+                    candidates = np.broadcast_to(alive, (len(moving), len(alive)))
+                    overflow = np.zeros(len(moving), dtype=bool)
+                # 只拿有效的「球 x 候選磚塊」組合來算，離磚塊很遠的球幾乎不花時間
+                pair_ball, pair_slot = np.nonzero(candidates >= 0)
+                if len(pair_ball):
+                    index = candidates[pair_ball, pair_slot]
+                    brick_t, brick_nx, brick_ny = sweep_circles_rects(
+                        px[pair_ball], py[pair_ball], dx[pair_ball], dy[pair_ball], pr[pair_ball],
+                        brick_x[index], brick_y[index],
+                        brick_x[index] + brick_length[index], brick_y[index] + brick_height[index])
+                    # 每顆球取最早碰到的磚塊，時間一樣就取列表前面的磚塊
+                    order = np.lexsort((index, brick_t, pair_ball))
+                    sorted_ball = pair_ball[order]
+                    first = order[np.r_[True, sorted_ball[1:] != sorted_ball[:-1]]]
+                    rows = pair_ball[first]
+                    better = brick_t[first] < t[rows]
+                    rows = rows[better]
+                    first = first[better]
+                    t[rows] = brick_t[first]
+                    normal_x[rows] = brick_nx[first]
+                    normal_y[rows] = brick_ny[first]
+                    brick_index[rows] = index[first]
+                    on_paddle[rows] = False
+                # 走太遠、超出表格範圍的球，改成一顆一顆查
+                for row in np.nonzero(overflow)[0].tolist():
+                    for brick in brick_grid.query_rect(left[row], top[row], right[row], bottom[row]):
+                        hit = sweep_circle_rect(px[row], py[row], dx[row], dy[row], pr[row], brick.x, brick.y,
+                                                brick.x + brick.length, brick.y + brick.height)
+                        if hit is not None and hit[0] < t[row]:
+                            t[row], normal_x[row], normal_y[row] = hit
+                            brick_index[row] = brick_grid.index_of(brick)
+                            on_paddle[row] = False
+
+            # 沒碰到任何東西的球直接走完這一步
+            free = np.isinf(t)
+            done = moving[free]
+            x[done] += dx[free]
+            y[done] += dy[free]
+
+            hit = ~free
+            if not hit.any():
+                break
+            idx = moving[hit]
+            th = t[hit]
+            x[idx] += dx[hit] * th
+            y[idx] += dy[hit] * th
+            nx = normal_x[hit]
+            ny = normal_y[hit]
+            velocity_x[idx], velocity_y[idx] = reflect(velocity_x[idx], velocity_y[idx], nx, ny)
+
+            # 撞到底板正面：依撞擊位置調整水平速度（和原本規則相同）
+            top_face = on_paddle[hit] & (ny < 0) & (nx == 0)
+            steer = idx[top_face]
+            half_length = paddle.length / 2
+            velocity_x[steer] += (x[steer] - (paddle.x + half_length)) / half_length * 2.5
+
+            # 撞到磚塊：標記擊中並小幅加速
+            hit_bricks = brick_index[hit]
+            on_brick = hit_bricks >= 0
+            if on_brick.any():
+                faster = idx[on_brick]
+                velocity_x[faster] *= 1.02
+                velocity_y[faster] *= 1.02
+                for index in np.unique(hit_bricks[on_brick]).tolist():
+                    # 有耐久度的磚塊撞一下不一定會碎，只算真的撞碎的
+                    if bricks[index].hit():
+                        bricks_hit += 1
+
+            remaining[idx] *= 1.0 - th
+            moving = idx
+        return bricks_hit
+
+    ######################繪製######################
+    def get_rects(self, camera_y=0):
+        """
+        取得每顆球在畫面上佔用的矩形範圍\n
+        camera_y: 鏡頭的 y 座標，畫在畫面上的位置是 y - camera_y（捲動關卡用，預設 0）\n
+        返回值：pygame.Rect 列表
+        """
+        n = self.count
+        left = (self.x[:n].astype(np.int64) - self.radius[:n].astype(np.int64) - 1).tolist()
+        top = ((self.y[:n] - camera_y).astype(np.int64) - self.radius[:n].astype(np.int64) - 1).tolist()
+        sizes = (self.size[:n] + 3).tolist()
+        return [pygame.Rect(left[i], top[i], sizes[i], sizes[i]) for i in range(n)]
+
+    def draw(self, screen, camera_y=0, smooth=True):
+        """
+        繪製所有球\n
+        \n
+        參數:\n
+        screen (pygame.Surface): pygame 螢幕物件\n
+        camera_y (int): 鏡頭的 y 座標，捲動關卡用（預設 0）\n
+        smooth (bool): 圖片用 smoothscale（比較平滑）還是 scale（比較快）縮放\n
+        \n
+        繪製邏輯:\n
+        - 有圖片時，每種直徑的縮放圖片從共用快取拿，再用 blits 一次畫完\n
+        - 沒有圖片時畫純色圓形
+        """
+        n = self.count
+        if n == 0:
+            return
+        left = (self.x[:n] - self.radius[:n]).astype(np.int64).tolist()
+        top = (self.y[:n] - camera_y - self.radius[:n]).astype(np.int64).tolist()
+        sizes = self.size[:n].tolist()
+        if self.image:
+            scaled = {}
+            blit_list = []
+            for i in range(n):
+                size = sizes[i]
+                # 同樣大小的球共用同一張縮放好的圖片，而且跨幀都從共用快取拿
+                img = scaled.get(size)
+                if img is None:
+                    img = sprite_cache.get_scaled(self.image, (size, size), smooth)
+                    scaled[size] = img
+                blit_list.append((img, (left[i], top[i])))
+            screen.blits(blit_list, False)
+        else:
+            centers_x = self.x[:n].astype(np.int64).tolist()
+            centers_y = (self.y[:n] - camera_y).astype(np.int64).tolist()
+            for i in range(n):
+                pygame.draw.circle(screen, self.color, (centers_x[i], centers_y[i]), sizes[i] // 2)
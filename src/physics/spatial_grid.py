@@ -0,0 +1,314 @@
+######################載入套件######################
+"""
+磚塊空間索引模組
+把場地切成一格一格的網格，每格記錄落在裡面、還沒被擊中的磚塊
+找「某個點或某個圓附近有哪些磚塊」時只要看幾格，不用掃過整面牆
+"""
+import numpy as np
+
+
+######################物件類別######################
+class SpatialGrid:
+    """
+    磚塊的均勻網格索引\n
+    \n
+    屬性說明：\n
+    bricks: 建立索引時的磚塊列表（順序就是磚塊編號）\n
+    origin_x, origin_y: 網格左上角的座標\n
+    cell_width, cell_height: 每一格的寬高（像素）\n
+    cols, rows: 網格有幾欄、幾列\n
+    cells: 形狀 (rows, cols, K) 的整數陣列，每格最多 K 個磚塊編號，空位是 -1\n
+    \n
+    設計說明:\n
+    - 每格的磚塊編號由小到大排好，查詢結果的順序和原本掃整個列表一樣\n
+    - 磚塊被擊中時會透過 Brick.listeners 通知網格，把它從所在的格子拿掉\n
+    - 磚塊恢復時放回原本的位置，所以重新開始遊戲也不用重建網格\n
+    - 格子大小預設等於最大磚塊的大小，每個磚塊最多佔 4 格，每格也只有少數磚塊\n
+    \n
+    使用範例:\n
+        grid = SpatialGrid(bricks)\n
+        for brick in grid.query_point(mx, my):\n
+            brick.check_collision(mx, my)
+    """
+    def __init__(self, bricks, cell_width=None, cell_height=None):
+        """
+        建立網格索引\n
+        \n
+        參數:\n
+        bricks (list): 磚塊列表，建立後磚塊位置不能再改變\n
+        cell_width (float): 每格寬度，None 表示用最寬磚塊的寬度\n
+        cell_height (float): 每格高度，None 表示用最高磚塊的高度
+        """
+        self.bricks = bricks
+        count = len(bricks)
+        left = np.array([b.x for b in bricks], dtype=np.float64)
+        top = np.array([b.y for b in bricks], dtype=np.float64)
+        right = left + np.array([b.length for b in bricks], dtype=np.float64)
+        bottom = top + np.array([b.height for b in bricks], dtype=np.float64)
+
+        # 沒有磚塊時給一個 1x1 的空網格，查詢一律回傳空結果
+        if count == 0:
+            self.origin_x = self.origin_y = 0.0
+            self.cell_width = self.cell_height = 1.0
+            self.cols = self.rows = 1
+            self.cells = np.full((1, 1, 1), -1, dtype=np.int32)
+            self._index_of = {}
+            return
+
+        self.origin_x = float(left.min())
+        self.origin_y = float(top.min())
+        self.cell_width = float(cell_width or max(1.0, float((right - left).max())))
+        self.cell_height = float(cell_height or max(1.0, float((bottom - top).max())))
+
+        # 每個磚塊佔到的格子範圍（邊界也算，和 check_collision 的 <= 一致）
+        col_start = self._col(left)
+        col_stop = self._col(right)
+        row_start = self._row(top)
+        row_stop = self._row(bottom)
+        self.cols = int(col_stop.max()) + 1
+        self.rows = int(row_stop.max()) + 1
+
+        # 列出每個磚塊佔到的每一格：(磚塊編號, 列, 欄)，全部用陣列一次算完
+        span_cols = col_stop - col_start + 1
+        span_rows = row_stop - row_start + 1
+        per_brick = span_cols * span_rows
+        pair_brick = np.repeat(np.arange(count), per_brick)
+        # 每一組在自己磚塊裡是第幾格，再換算成列、欄
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(per_brick, out=offsets[1:])
+        local = np.arange(offsets[-1]) - offsets[pair_brick]
+        pair_row = row_start[pair_brick] + local // span_cols[pair_brick]
+        pair_col = col_start[pair_brick] + local % span_cols[pair_brick]
+
+        # 算出每一組在自己那格排第幾個：同一格內依磚塊編號由小到大
+        cell_id = pair_row * self.cols + pair_col
+        order = np.lexsort((pair_brick, cell_id))
+        sorted_cells = cell_id[order]
+        group_start = np.searchsorted(sorted_cells, sorted_cells, side='left')
+        pair_k = np.empty_like(order)
+        pair_k[order] = np.arange(len(order)) - group_start
+        depth = max(1, int(pair_k.max()) + 1)
+
+        self.cells = np.full((self.rows, self.cols, depth), -1, dtype=np.int32)
+        # 記下每個磚塊放在哪些格子的哪個位置，擊中和恢復時直接改那幾格
+        self._slot_offsets = offsets
+        self._slot_rows = pair_row
+        self._slot_cols = pair_col
+        self._slot_depths = pair_k
+        self._slot_bricks = pair_brick.astype(np.int32)
+        alive = np.fromiter((not b.is_hit for b in bricks), dtype=bool, count=count)
+        live_pairs = alive[pair_brick]
+        self.cells[pair_row[live_pairs], pair_col[live_pairs], pair_k[live_pairs]] = pair_brick[live_pairs]
+
+        # 磚塊物件對應到編號，並請磚塊在狀態改變時通知網格
+        # （磚塊倉庫裡的磚塊共用同一份 listeners，只要登記一次）
+        self._index_of = {}
+        for i, brick in enumerate(bricks):
+            self._index_of[brick] = i
+            if self not in brick.listeners:
+                brick.listeners.append(self)
+        # 磚塊都在同一個倉庫時記下倉庫編號，整面牆改變時直接從位元陣列同步
+        store = getattr(bricks[0], '_store', None)
+        if store is not None and all(b._store is store for b in bricks):
+            self._store = store
+            self._store_indices = np.fromiter((b._index for b in bricks), dtype=np.int64, count=count)
+        else:
+            self._store = None
+            self._store_indices = None
+
+    ######################座標轉換######################
+    def _col(self, x):
+        """
+        把 x 座標轉成欄號（可傳入數值或陣列）
+        """
+        return np.floor((np.asarray(x, dtype=np.float64) - self.origin_x) / self.cell_width).astype(np.int64)
+
+    def _row(self, y):
+        """
+        把 y 座標轉成列號（可傳入數值或陣列）
+        """
+        return np.floor((np.asarray(y, dtype=np.float64) - self.origin_y) / self.cell_height).astype(np.int64)
+
+    def cell_of(self, x, y):
+        """
+        找出某個點落在哪一格\n
+        \n
+        參數:\n
+        x, y (float): 座標\n
+        \n
+        回傳:\n
+        tuple: (row, col)，點在網格外面時回傳 None
+        """
+        col = int((x - self.origin_x) // self.cell_width)
+        row = int((y - self.origin_y) // self.cell_height)
+        # 網格外面不會有任何磚塊
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row, col
+        return None
+
+    ######################查詢######################
+    def index_of(self, brick):
+        """
+        取得磚塊在列表中的編號\n
+        brick: 磚塊物件\n
+        返回值：編號（整數），不在這個網格裡時回傳 None
+        """
+        return self._index_of.get(brick)
+
+    def query_point(self, x, y):
+        """
+        找出可能包含這個點、還沒被擊中的磚塊\n
+        \n
+        參數:\n
+        x, y (float): 座標\n
+        \n
+        回傳:\n
+        list: 候選磚塊列表（依磚塊編號排序），呼叫端仍要自己做精確檢查\n
+        \n
+        說明:\n
+        - 只看一格，不管牆上有多少磚塊，花的時間都一樣
+        """
+        cell = self.cell_of(x, y)
+        if cell is None:
+            return []
+        bricks = self.bricks
+        return [bricks[i] for i in self.cells[cell].tolist() if i >= 0]
+
+    def query_rect(self, left, top, right, bottom):
+        """
+        找出和這個矩形範圍重疊的格子裡、還沒被擊中的磚塊\n
+        \n
+        參數:\n
+        left, top, right, bottom (float): 矩形的四個邊\n
+        \n
+        回傳:\n
+        list: 候選磚塊列表（依磚塊編號排序、不重複）
+        """
+        col_start = max(0, int((left - self.origin_x) // self.cell_width))
+        col_stop = min(self.cols - 1, int((right - self.origin_x) // self.cell_width))
+        row_start = max(0, int((top - self.origin_y) // self.cell_height))
+        row_stop = min(self.rows - 1, int((bottom - self.origin_y) // self.cell_height))
+        # 矩形完全在網格外面
+        if col_start > col_stop or row_start > row_stop:
+            return []
+        block = self.cells[row_start:row_stop + 1, col_start:col_stop + 1].ravel()
+        # 同一個磚塊可能橫跨好幾格，要去掉重複並照編號排好
+        indices = np.unique(block[block >= 0])
+        bricks = self.bricks
+        return [bricks[i] for i in indices.tolist()]
+
+    def query_circle(self, x, y, radius):
+        """
+        找出可能和這個圓重疊、還沒被擊中的磚塊\n
+        \n
+        參數:\n
+        x, y (float): 圓心座標\n
+        radius (float): 半徑，範圍 >= 0\n
+        \n
+        回傳:\n
+        list: 候選磚塊列表（依磚塊編號排序、不重複）
+        """
+        return self.query_rect(x - radius, y - radius, x + radius, y + radius)
+
+    def candidates_for_points(self, x, y):
+        """
+        一次查很多個點所在格子的磚塊編號（給批次球體系統用）\n
+        \n
+        參數:\n
+        x, y (ndarray): 座標陣列，長度 N\n
+        \n
+        回傳:\n
+        ndarray: 形狀 (N, K) 的磚塊編號，-1 表示空位或點在網格外面
+        """
+        col = self._col(x)
+        row = self._row(y)
+        inside = (col >= 0) & (col < self.cols) & (row >= 0) & (row < self.rows)
+        result = np.full((len(col), self.cells.shape[2]), -1, dtype=np.int32)
+        result[inside] = self.cells[row[inside], col[inside]]
+        return result
+
+    def candidates_for_boxes(self, left, top, right, bottom, max_span=3):
+        """
+        一次查很多個矩形範圍裡的磚塊編號（給批次掃掠碰撞用）\n
+        \n
+        參數:\n
+        left, top, right, bottom (ndarray): 每個矩形的四個邊，長度 N\n
+        max_span (int): 每個矩形在每個方向最多看幾格\n
+        \n
+        回傳:\n
+        tuple: (candidates, overflow)\n
+        - candidates: 形狀 (N, max_span * max_span * K) 的磚塊編號，-1 表示空位，可能有重複\n
+        - overflow: 布林陣列，True 表示範圍太大超過 max_span，要改用 query_rect 一個一個查\n
+        \n
+        說明:\n
+        - 球一步通常只走幾個像素，絕大多數只會碰到 1 到 4 格，用固定大小的表格就能一次算完
+        """
+        raw_col_start = self._col(left)
+        raw_col_stop = self._col(right)
+        raw_row_start = self._row(top)
+        raw_row_stop = self._row(bottom)
+        # 整個範圍都在網格外面的，不會有任何磚塊
+        outside = ((raw_col_stop < 0) | (raw_col_start >= self.cols) |
+                   (raw_row_stop < 0) | (raw_row_start >= self.rows))
+        col_start = np.clip(raw_col_start, 0, self.cols - 1)
+        col_stop = np.clip(raw_col_stop, 0, self.cols - 1)
+        row_start = np.clip(raw_row_start, 0, self.rows - 1)
+        row_stop = np.clip(raw_row_stop, 0, self.rows - 1)
+        span_cols = col_stop - col_start + 1
+        span_rows = row_stop - row_start + 1
+        overflow = ~outside & ((span_cols > max_span) | (span_rows > max_span))
+
+        # 每個矩形從左上角開始，取 max_span x max_span 格，超出範圍的格子之後遮掉
+        steps = np.arange(max_span)
+        cols = np.minimum(col_start[:, None] + steps, self.cols - 1)
+        rows = np.minimum(row_start[:, None] + steps, self.rows - 1)
+        use_col = steps < span_cols[:, None]
+        use_row = steps < span_rows[:, None]
+        block = self.cells[rows[:, :, None], cols[:, None, :]]
+        use = use_row[:, :, None, None] & use_col[:, None, :, None]
+        use &= ~(outside | overflow)[:, None, None, None]
+        block = np.where(use, block, -1)
+        return block.reshape(len(block), -1), overflow
+
+    ######################狀態同步######################
+    def on_brick_changed(self, brick):
+        """
+        磚塊被擊中或恢復時由 Brick 呼叫\n
+        \n
+        參數:\n
+        brick (Brick): 狀態改變的磚塊\n
+        \n
+        副作用:\n
+        - 被擊中：從所在的每一格移除\n
+        - 恢復：放回原本的每一格
+        """
+        index = self._index_of.get(brick)
+        if index is None:
+            return
+        value = -1 if brick.is_hit else index
+        start = self._slot_offsets[index]
+        stop = self._slot_offsets[index + 1]
+        # 一個磚塊最多佔幾格，逐格改比用陣列切片快
+        for j in range(start, stop):
+            self.cells[self._slot_rows[j], self._slot_cols[j], self._slot_depths[j]] = value
+
+    def on_wall_reset(self):
+        """
+        整面牆一起恢復（或載入存檔）時由磚塊倉庫呼叫\n
+        \n
+        副作用:\n
+        - 所有磚塊一次放回原本的格子，不用一塊一塊處理\n
+        - 載入存檔後有些磚塊還是擊中狀態，那些格子填 -1
+        """
+        if len(self._index_of) == 0:
+            return
+        store = self._store
+        if store is not None and store.live_count == store.count:
+            self.cells[self._slot_rows, self._slot_cols, self._slot_depths] = self._slot_bricks
+            return
+        if store is not None:
+            alive = ~store.hit_mask()[self._store_indices]
+        else:
+            alive = np.fromiter((not b.is_hit for b in self.bricks), dtype=bool, count=len(self.bricks))
+        self.cells[self._slot_rows, self._slot_cols, self._slot_depths] = np.where(
+            alive[self._slot_bricks], self._slot_bricks, -1)
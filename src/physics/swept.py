@@ -0,0 +1,383 @@
+######################載入套件######################
+"""
+連續碰撞偵測模組（掃掠碰撞）
+原本的碰撞是「先移動、再看球心有沒有在磚塊裡」，球跑太快時會直接穿過薄磚塊和底板
+這裡改成沿著球這一步的移動路線，算出「第幾分之幾的時間會碰到哪一面」
+碰到後照那一面的方向反彈，剩下的時間繼續移動，一步內可以連續碰好幾次
+"""
+import math
+import numpy as np
+
+
+# 一步模擬裡最多處理幾次碰撞，避免球卡在夾縫裡無限反彈
+MAX_CONTACTS_PER_STEP = 4
+
+# 碰撞種類代碼（批次運算用）
+CONTACT_NONE = 0
+CONTACT_WALL = 1
+CONTACT_PADDLE = 2
+CONTACT_BRICK = 3
+
+
+######################定義函式區######################
+def sweep_circle_rect(x, y, dx, dy, radius, left, top, right, bottom):
+    """
+    計算移動中的圓第一次碰到矩形的時間和碰撞面\n
+    \n
+    參數:\n
+    x, y (float): 圓心起點\n
+    dx, dy (float): 這一步的位移（像素）\n
+    radius (float): 圓的半徑，範圍 > 0\n
+    left, top, right, bottom (float): 矩形的四個邊\n
+    \n
+    回傳:\n
+    tuple: (t, normal_x, normal_y)，t 在 0 到 1 之間，表示走到位移的幾分之幾會碰到\n
+    None: 這一步不會碰到（或正在離開矩形）\n
+    \n
+    算法說明:\n
+    - 把矩形每邊往外擴大一個半徑，圓心就可以當成一個點來看\n
+    - 先算點什麼時候進入擴大後的矩形（左右、上下各算一次，取比較晚的）\n
+    - 碰到的位置如果在某一面的正前方，法線就是那一面的方向\n
+    - 如果在角落，改成和以角為圓心的圓比較，法線從角指向圓心\n
+    - 一開始就已經貼著或卡進矩形時，只有在往裡面走才算碰到（t = 0）
+    """
+    # 找出矩形上離圓心最近的點，判斷一開始有沒有貼著或重疊
+    near_x = min(max(x, left), right)
+    near_y = min(max(y, top), bottom)
+    gap_x = x - near_x
+    gap_y = y - near_y
+    gap2 = gap_x * gap_x + gap_y * gap_y
+    if gap2 <= radius * radius:
+        if gap2 > 1e-12:
+            # 圓心在矩形外面：法線從最近點指向圓心
+            gap = math.sqrt(gap2)
+            normal_x = gap_x / gap
+            normal_y = gap_y / gap
+        else:
+            # 圓心已經跑進矩形裡：從最淺的那一面推出去
+            normal_x, normal_y = _shallowest_face(x, y, left, top, right, bottom)
+        # 往裡面走才算碰到，往外走就讓它離開
+        if dx * normal_x + dy * normal_y < 0:
+            return 0.0, normal_x, normal_y
+        return None
+
+    # 擴大後的矩形：左右、上下各算進入和離開的時間
+    if dx == 0:
+        if not (left - radius <= x <= right + radius):
+            return None
+        enter_x, exit_x = -math.inf, math.inf
+    else:
+        t1 = (left - radius - x) / dx
+        t2 = (right + radius - x) / dx
+        enter_x, exit_x = (t1, t2) if t1 < t2 else (t2, t1)
+    if dy == 0:
+        if not (top - radius <= y <= bottom + radius):
+            return None
+        enter_y, exit_y = -math.inf, math.inf
+    else:
+        t1 = (top - radius - y) / dy
+        t2 = (bottom + radius - y) / dy
+        enter_y, exit_y = (t1, t2) if t1 < t2 else (t2, t1)
+
+    enter = max(enter_x, enter_y)
+    leave = min(exit_x, exit_y)
+    # 進去之前就已經出來、或這一步走不到，就是沒碰到
+    if enter > leave or leave < 0 or enter > 1:
+        return None
+    enter = max(enter, 0.0)
+
+    hit_x = x + dx * enter
+    hit_y = y + dy * enter
+    if left <= hit_x <= right or top <= hit_y <= bottom:
+        # 碰到某一面的正前方：看是左右先碰到還是上下先碰到
+        if enter_x > enter_y:
+            return enter, (-1.0 if dx > 0 else 1.0), 0.0
+        return enter, 0.0, (-1.0 if dy > 0 else 1.0)
+
+    # 碰到的地方在角落：改算和角落圓弧的碰撞
+    corner_x = left if hit_x < left else right
+    corner_y = top if hit_y < top else bottom
+    return _sweep_point_circle(x, y, dx, dy, corner_x, corner_y, radius)
+
+
+def _shallowest_face(x, y, left, top, right, bottom):
+    """
+    圓心在矩形裡面時，找出離圓心最近的那一面\n
+    返回值：(normal_x, normal_y) 往那一面推出去的方向
+    """
+    distances = (
+        (x - left, -1.0, 0.0),
+        (right - x, 1.0, 0.0),
+        (y - top, 0.0, -1.0),
+        (bottom - y, 0.0, 1.0),
+    )
+    _, normal_x, normal_y = min(distances)
+    return normal_x, normal_y
+
+
+def _sweep_point_circle(x, y, dx, dy, center_x, center_y, radius):
+    """
+    計算移動中的點第一次碰到圓的時間（用於矩形角落）\n
+    返回值：(t, normal_x, normal_y) 或 None
+    """
+    # 解「點走到離圓心剛好一個半徑」的二次方程式，取比較早的那個解
+    offset_x = x - center_x
+    offset_y = y - center_y
+    a = dx * dx + dy * dy
+    if a == 0:
+        return None
+    b = offset_x * dx + offset_y * dy
+    c = offset_x * offset_x + offset_y * offset_y - radius * radius
+    discriminant = b * b - a * c
+    # 判別式小於 0 表示路線完全擦不到角落
+    if discriminant < 0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / a
+    if t < 0 or t > 1:
+        return None
+    normal_x = (offset_x + dx * t) / radius
+    normal_y = (offset_y + dy * t) / radius
+    return t, normal_x, normal_y
+
+
+def sweep_circles_rects(x, y, dx, dy, radius, left, top, right, bottom):
+    """
+    sweep_circle_rect 的批次版本：一次算很多組「圓 x 矩形」\n
+    \n
+    參數:\n
+    x, y, dx, dy, radius (ndarray): 圓的起點、位移和半徑\n
+    left, top, right, bottom (ndarray): 矩形的四個邊\n
+    （所有參數會照 NumPy 規則自動對齊形狀，例如 (N, 1) 對 (N, K)）\n
+    \n
+    回傳:\n
+    tuple: (t, normal_x, normal_y) 三個陣列，沒碰到的地方 t 是 inf\n
+    \n
+    說明:\n
+    - 算法和 sweep_circle_rect 完全一樣，只是把 if 換成陣列遮罩
+    """
+    x, y, dx, dy, radius, left, top, right, bottom = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (x, y, dx, dy, radius, left, top, right, bottom)))
+    t = np.full(x.shape, np.inf)
+    normal_x = np.zeros(x.shape)
+    normal_y = np.zeros(x.shape)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 一開始就貼著或重疊的情況
+        gap_x = x - np.clip(x, left, right)
+        gap_y = y - np.clip(y, top, bottom)
+        gap2 = gap_x * gap_x + gap_y * gap_y
+        touching = gap2 <= radius * radius
+        gap = np.sqrt(gap2)
+        outside = gap2 > 1e-12
+        touch_nx = np.where(outside, gap_x / gap, 0.0)
+        touch_ny = np.where(outside, gap_y / gap, 0.0)
+        # 圓心在矩形裡面的，從最淺的那一面推出去
+        depth = np.stack((x - left, right - x, y - top, bottom - y))
+        face = depth.argmin(axis=0)
+        touch_nx = np.where(outside, touch_nx, np.select([face == 0, face == 1], [-1.0, 1.0], 0.0))
+        touch_ny = np.where(outside, touch_ny, np.select([face == 2, face == 3], [-1.0, 1.0], 0.0))
+        moving_in = dx * touch_nx + dy * touch_ny < 0
+        start_hit = touching & moving_in
+        t[start_hit] = 0.0
+        normal_x[start_hit] = touch_nx[start_hit]
+        normal_y[start_hit] = touch_ny[start_hit]
+
+        # 擴大矩形的進出時間（位移為 0 的軸只要起點在範圍內就一直算在裡面）
+        t1 = (left - radius - x) / dx
+        t2 = (right + radius - x) / dx
+        inside_x = (left - radius <= x) & (x <= right + radius)
+        enter_x = np.where(dx == 0, np.where(inside_x, -np.inf, np.inf), np.minimum(t1, t2))
+        exit_x = np.where(dx == 0, np.where(inside_x, np.inf, -np.inf), np.maximum(t1, t2))
+        t1 = (top - radius - y) / dy
+        t2 = (bottom + radius - y) / dy
+        inside_y = (top - radius <= y) & (y <= bottom + radius)
+        enter_y = np.where(dy == 0, np.where(inside_y, -np.inf, np.inf), np.minimum(t1, t2))
+        exit_y = np.where(dy == 0, np.where(inside_y, np.inf, -np.inf), np.maximum(t1, t2))
+
+        enter = np.maximum(enter_x, enter_y)
+        leave = np.minimum(exit_x, exit_y)
+        candidate = ~touching & (enter <= leave) & (leave >= 0) & (enter <= 1)
+        enter = np.maximum(enter, 0.0)
+        hit_x = x + dx * enter
+        hit_y = y + dy * enter
+        in_face = ((left <= hit_x) & (hit_x <= right)) | ((top <= hit_y) & (hit_y <= bottom))
+
+        # 碰到某一面的正前方
+        face_hit = candidate & in_face
+        x_first = enter_x > enter_y
+        t = np.where(face_hit, enter, t)
+        normal_x = np.where(face_hit & x_first, np.where(dx > 0, -1.0, 1.0), normal_x)
+        normal_y = np.where(face_hit & ~x_first, np.where(dy > 0, -1.0, 1.0), normal_y)
+        normal_x = np.where(face_hit & ~x_first, 0.0, normal_x)
+        normal_y = np.where(face_hit & x_first, 0.0, normal_y)
+
+        # 碰到角落：和角落的圓弧算二次方程式
+        corner = candidate & ~in_face
+        corner_x = np.where(hit_x < left, left, right)
+        corner_y = np.where(hit_y < top, top, bottom)
+        offset_x = x - corner_x
+        offset_y = y - corner_y
+        a = dx * dx + dy * dy
+        b = offset_x * dx + offset_y * dy
+        c = offset_x * offset_x + offset_y * offset_y - radius * radius
+        discriminant = b * b - a * c
+        corner_t = (-b - np.sqrt(np.maximum(discriminant, 0.0))) / a
+        corner_hit = corner & (a > 0) & (discriminant >= 0) & (corner_t >= 0) & (corner_t <= 1)
+        t = np.where(corner_hit, corner_t, t)
+        normal_x = np.where(corner_hit, (offset_x + dx * corner_t) / radius, normal_x)
+        normal_y = np.where(corner_hit, (offset_y + dy * corner_t) / radius, normal_y)
+    return t, normal_x, normal_y
+
+
+def reflect(velocity_x, velocity_y, normal_x, normal_y):
+    """
+    讓速度照著碰撞面反彈\n
+    \n
+    參數:\n
+    velocity_x, velocity_y: 速度（數值或陣列）\n
+    normal_x, normal_y: 碰撞面的法線（長度 1，指向球）\n
+    \n
+    回傳:\n
+    tuple: 反彈後的 (velocity_x, velocity_y)\n
+    \n
+    公式:\n
+    - 反彈速度 = 速度 - 2 ×（速度 · 法線）× 法線，只有貼著法線的那部分會反向
+    """
+    dot = velocity_x * normal_x + velocity_y * normal_y
+    return velocity_x - 2 * dot * normal_x, velocity_y - 2 * dot * normal_y
+
+
+def sweep_walls(x, y, dx, dy, radius, width, top=0.0):
+    """
+    計算圓第一次碰到左牆、右牆或天花板的時間\n
+    \n
+    參數:\n
+    x, y (float): 圓心起點\n
+    dx, dy (float): 這一步的位移\n
+    radius (float): 半徑\n
+    width (int): 場地寬度\n
+    top (float): 天花板的 y 座標\n
+    \n
+    回傳:\n
+    tuple: (t, normal_x, normal_y)，不會碰到時回傳 None
+    """
+    best = None
+    # 往左走才可能撞左牆，已經貼著牆的就是馬上撞到（t = 0）
+    if dx < 0:
+        t = max(0.0, (radius - x) / dx)
+        if t <= 1:
+            best = (t, 1.0, 0.0)
+    elif dx > 0:
+        t = max(0.0, (width - radius - x) / dx)
+        if t <= 1:
+            best = (t, -1.0, 0.0)
+    # 往上走才可能撞天花板
+    if dy < 0:
+        t = max(0.0, (top + radius - y) / dy)
+        if t <= 1 and (best is None or t < best[0]):
+            best = (t, 0.0, 1.0)
+    return best
+
+
+def sweep_ball(ball, dt, width, paddle, bricks, brick_grid=None, top=0.0):
+    """
+    用掃掠碰撞移動一顆球（直接修改球的位置和速度）\n
+    \n
+    參數:\n
+    ball (Ball): 已發射的球\n
+    dt (float): 這一步的時間長度（秒）\n
+    width (int): 場地寬度\n
+    paddle (Paddle): 底板物件\n
+    bricks (list): 磚塊列表\n
+    brick_grid (SpatialGrid): 磚塊空間索引（可選），有的話只看移動路線附近的磚塊\n
+    top (float): 天花板的 y 座標（捲動關卡是鏡頭的上緣）\n
+    \n
+    回傳:\n
+    int: 這一步撞碎幾個磚塊\n
+    \n
+    處理流程（最多重複 MAX_CONTACTS_PER_STEP 次）:\n
+    1. 算出這段剩下的位移會先碰到牆、底板還是哪個磚塊\n
+    2. 把球移到碰到的位置，照碰撞面反彈\n
+    3. 底板正面：和原本一樣依撞擊位置調整水平速度\n
+    4. 磚塊：標記擊中，速度增加 1.02 倍\n
+    5. 用剩下的時間繼續移動；都沒碰到就走完整段
+    """
+    radius = ball.radius
+    remaining = 1.0
+    bricks_hit = 0
+    for _ in range(MAX_CONTACTS_PER_STEP):
+        dx = ball.velocity_x * dt * 60.0 * remaining
+        dy = ball.velocity_y * dt * 60.0 * remaining
+
+        best = sweep_walls(ball.x, ball.y, dx, dy, radius, width, top)
+        best_kind = CONTACT_WALL
+        best_brick = None
+
+        hit = sweep_circle_rect(ball.x, ball.y, dx, dy, radius, paddle.x, paddle.y,
+                                paddle.x + paddle.length, paddle.y + paddle.height)
+        if hit is not None and (best is None or hit[0] < best[0]):
+            best, best_kind = hit, CONTACT_PADDLE
+
+        # 只檢查移動路線經過的範圍裡的磚塊
+        if brick_grid is not None:
+            candidates = brick_grid.query_rect(min(ball.x, ball.x + dx) - radius,
+                                               min(ball.y, ball.y + dy) - radius,
+                                               max(ball.x, ball.x + dx) + radius,
+                                               max(ball.y, ball.y + dy) + radius)
+        else:
+            candidates = bricks
+        for brick in candidates:
+            if brick.is_hit:
+                continue
+            hit = sweep_circle_rect(ball.x, ball.y, dx, dy, radius, brick.x, brick.y,
+                                    brick.x + brick.length, brick.y + brick.height)
+            # 時間一樣時保留列表前面的磚塊，和原本的順序一致
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best, best_kind, best_brick = hit, CONTACT_BRICK, brick
+
+        # 這段路上什麼都沒碰到，直接走完
+        if best is None:
+            ball.x += dx
+            ball.y += dy
+            return bricks_hit
+
+        t, normal_x, normal_y = best
+        ball.x += dx * t
+        ball.y += dy * t
+        ball.velocity_x, ball.velocity_y = reflect(ball.velocity_x, ball.velocity_y, normal_x, normal_y)
+
+        if best_kind == CONTACT_PADDLE and normal_y < 0 and normal_x == 0:
+            # 撞到底板正面：依撞擊位置調整水平速度（和原本規則相同）
+            paddle_center = paddle.x + paddle.length / 2
+            relative_hit = (ball.x - paddle_center) / (paddle.length / 2)
+            ball.velocity_x += relative_hit * 2.5
+        elif best_kind == CONTACT_BRICK:
+            # 有耐久度的磚塊撞一下不一定會碎，只算真的撞碎的
+            if best_brick.hit():
+                bricks_hit += 1
+            # 小幅增加速度以增加挑戰性
+            ball.velocity_x *= 1.02
+            ball.velocity_y *= 1.02
+
+        remaining *= 1.0 - t
+    # 碰撞次數用完還沒走完的部分直接放棄，寧可少走一點也不要穿牆
+    return bricks_hit
+
+
+def sweep_walls_batch(x, y, dx, dy, radius, width, top=0.0):
+    """
+    sweep_walls 的批次版本\n
+    返回值：(t, normal_x, normal_y) 三個陣列，沒碰到的地方 t 是 inf
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_left = np.where(dx < 0, np.maximum(0.0, (radius - x) / dx), np.inf)
+        t_right = np.where(dx > 0, np.maximum(0.0, (width - radius - x) / dx), np.inf)
+        t_top = np.where(dy < 0, np.maximum(0.0, (top + radius - y) / dy), np.inf)
+    t_side = np.minimum(t_left, t_right)
+    normal_x = np.where(t_left < t_right, 1.0, -1.0)
+    use_top = t_top < t_side
+    t = np.where(use_top, t_top, t_side)
+    t = np.where(t <= 1, t, np.inf)
+    normal_x = np.where(use_top, 0.0, normal_x)
+    normal_y = np.where(use_top, 1.0, 0.0)
+    return t, normal_x, normal_y
@@ -0,0 +1,12 @@
+"""
+繪圖模組\n
+
+包含讓畫面畫得更快的工具：\n
+- brick_layer: 把整面磚塊牆先畫在一張離屏畫布上，每幀只要貼一次\n
+- dirty_renderer: 只更新有變動的矩形，不用每幀送出整個畫面\n
+- sprite_cache: 縮放後圖片的共用 LRU 快取\n
+- interpolation: 畫面幀率和物理步數對不齊時，把物件畫在兩步之間的內插位置\n
+- quality: 依照每幀耗時自動調整畫面品質（龍捲風層數、氣球、球的縮放方式）\n
+
+遊戲規則不放在這裡，這些工具只負責把模擬核心的狀態畫出來\n
+"""
@@ -0,0 +1,196 @@
+######################載入套件######################
+"""
+磚塊圖層模組
+把整面磚塊牆預先畫在一張看不見的畫布上，每幀只要把這張畫布貼到螢幕一次
+磚塊被擊中或恢復時，只重畫那一塊磚塊的位置，不用整面重畫
+捲動關卡的圖層只畫鏡頭看得到的範圍，鏡頭移動時把畫布捲過去，只補畫新露出來的那一條
+"""
+import pygame
+from config import colors as game_colors
+
+
+######################物件類別######################
+class BrickLayer:
+    """
+    快取好的磚塊牆圖層\n
+    \n
+    屬性說明：\n
+    bricks: 要畫的磚塊列表\n
+    surface: 已經畫好背景和所有磚塊的離屏畫布\n
+    background: 背景顏色，沒有磚塊的地方就是這個顏色\n
+    changed_rects: 上次取出之後有重畫過的矩形（給只更新部分畫面的繪圖方式使用）\n
+    is_tracking_changes: 是否要記下 changed_rects，只有 DirtyRectRenderer 會取出，沒人取出時不記，清單才不會一直變長\n
+    camera_y: 畫布目前對應的鏡頭位置（世界座標的 y），畫布上的 y = 世界的 y - camera_y\n
+    \n
+    設計說明:\n
+    - 圖層本身就包含黑色背景，貼上去就等於「清空螢幕 + 畫所有磚塊」\n
+    - 透過 Brick.listeners 得知哪個磚塊改變，只重畫那一小塊\n
+    - 每幀的繪圖成本固定是一次貼圖，不會因為磚塊變多而變慢\n
+    - 有空間索引時只畫和畫布範圍重疊的磚塊，關卡再大也只畫看得到的部分\n
+    \n
+    使用範例:\n
+        layer = BrickLayer(bricks, (800, 600))\n
+        layer.draw(screen)
+    """
+    def __init__(self, bricks, size, brick_grid=None, background=game_colors.BLACK):
+        """
+        建立磚塊圖層並畫好整面牆\n
+        \n
+        參數:\n
+        bricks (list): 磚塊列表\n
+        size (tuple): 畫布大小 (寬, 高)，通常等於視窗大小\n
+        brick_grid (SpatialGrid): 磚塊空間索引（可選），重畫時用來找重疊的鄰居磚塊\n
+        background (tuple): 背景顏色 (r,g,b)
+        """
+        self.bricks = bricks
+        self.brick_grid = brick_grid
+        self.background = background
+        self.surface = pygame.Surface(size)
+        # 已經有視窗時轉成和螢幕一樣的像素格式，貼圖會快很多
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        self.changed_rects = []
+        self.is_tracking_changes = False
+        self.camera_y = 0
+        self.repaint_all()
+        # 請每個磚塊在被擊中或恢復時通知圖層
+        # （磚塊倉庫裡的磚塊共用同一份 listeners，只要登記一次）
+        for brick in bricks:
+            if self not in brick.listeners:
+                brick.listeners.append(self)
+
+    def visible_bricks(self, rect):
+        """
+        找出可能和畫布上某個範圍重疊的磚塊\n
+        rect: 畫布座標的 pygame.Rect\n
+        返回值：磚塊列表（依磚塊編號排序），沒有空間索引時是全部的磚塊
+        """
+        if self.brick_grid is None:
+            return self.bricks
+        top = rect.top + self.camera_y
+        return self.brick_grid.query_rect(rect.left, top, rect.right, top + rect.height)
+
+    def repaint_rect(self, rect):
+        """
+        重畫畫布上的一塊範圍：塗回背景色，再畫上和它重疊的磚塊\n
+        rect: 畫布座標的 pygame.Rect
+        """
+        surface = self.surface
+        surface.set_clip(rect)
+        surface.fill(self.background, rect)
+        for brick in self.visible_bricks(rect):
+            brick.draw(surface, self.camera_y)
+        surface.set_clip(None)
+
+    def repaint_all(self):
+        """
+        整面重畫：先塗滿背景，再畫所有看得到、還在的磚塊\n
+        只在建立圖層、整面牆一起重置或鏡頭一次移動太遠時使用
+        """
+        self.repaint_rect(self.surface.get_rect())
+        self.mark_changed(self.surface.get_rect())
+
+    def mark_changed(self, rect):
+        """
+        記下畫布上有一塊重畫過了\n
+        rect: 畫布座標的 pygame.Rect，只有 is_tracking_changes 時才放進 changed_rects
+        """
+        if self.is_tracking_changes:
+            self.changed_rects.append(rect)
+
+    def set_bricks(self, bricks, brick_grid):
+        """
+        換成另一組磚塊和空間索引（捲動關卡載入或釋放區塊之後）\n
+        \n
+        參數:\n
+        bricks (list): 新的磚塊列表\n
+        brick_grid (SpatialGrid): 新的空間索引\n
+        \n
+        說明:\n
+        - 看得到的磚塊在換之前和換之後都一樣，畫布不用重畫
+        """
+        self.bricks = bricks
+        self.brick_grid = brick_grid
+        for brick in bricks:
+            if self not in brick.listeners:
+                brick.listeners.append(self)
+
+    def scroll_to(self, camera_y):
+        """
+        把畫布捲到新的鏡頭位置\n
+        \n
+        參數:\n
+        camera_y (int): 鏡頭上緣的 y 座標\n
+        \n
+        副作用:\n
+        - 畫布整塊往下（或往上）移動，只重畫新露出來的那一條\n
+        - 移動的距離超過畫布高度時直接整面重畫\n
+        - 整個畫布都算有改變（畫面上每個位置的內容都不一樣了）
+        """
+        camera_y = int(camera_y)
+        shift = self.camera_y - camera_y
+        if shift == 0:
+            return
+        self.camera_y = camera_y
+        width, height = self.surface.get_size()
+        if abs(shift) >= height:
+            self.repaint_all()
+            return
+        self.surface.scroll(0, shift)
+        # 鏡頭往上（shift > 0）時畫布往下移，上面露出新的一條；反過來就是下面
+        if shift > 0:
+            exposed = pygame.Rect(0, 0, width, shift)
+        else:
+            exposed = pygame.Rect(0, height + shift, width, -shift)
+        self.repaint_rect(exposed)
+        self.mark_changed(self.surface.get_rect())
+
+    def on_brick_changed(self, brick):
+        """
+        磚塊被擊中或恢復時由 Brick 呼叫，只重畫那一塊\n
+        \n
+        參數:\n
+        brick (Brick): 狀態改變的磚塊\n
+        \n
+        副作用:\n
+        - 把磚塊的位置塗回背景色，如果磚塊還在就重新畫上\n
+        - 如果有空間索引，順便把和這塊重疊的鄰居磚塊補畫回來
+        """
+        # 捲動關卡裡已經釋放的磚塊（不在畫面附近）不用畫
+        if brick is None:
+            return
+        rect = pygame.Rect(brick.x, brick.y - self.camera_y, brick.length, brick.height)
+        if not rect.colliderect(self.surface.get_rect()):
+            return
+        self.surface.fill(self.background, rect)
+        brick.draw(self.surface, self.camera_y)
+        # 鄰居磚塊如果和這塊有重疊，剛剛塗背景時會被蓋掉一角，要補畫
+        if self.brick_grid is not None:
+            top = rect.top + self.camera_y
+            for other in self.brick_grid.query_rect(rect.left, top, rect.right, top + rect.height):
+                if other is not brick:
+                    other.draw(self.surface, self.camera_y)
+        self.mark_changed(rect)
+
+    def on_wall_reset(self):
+        """
+        整面牆一起恢復時由磚塊倉庫呼叫，直接整面重畫一次
+        """
+        self.repaint_all()
+
+    def pop_changed_rects(self):
+        """
+        取出並清空有重畫過的矩形列表\n
+        返回值：pygame.Rect 列表
+        """
+        rects = self.changed_rects
+        self.changed_rects = []
+        return rects
+
+    def draw(self, screen):
+        """
+        把整面磚塊牆（含背景）一次貼到螢幕上\n
+        screen: pygame 螢幕物件
+        """
+        screen.blit(self.surface, (0, 0))
+
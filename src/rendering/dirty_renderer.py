@@ -0,0 +1,145 @@
+######################載入套件######################
+"""
+局部更新繪圖模組（髒矩形）
+原本每幀都把整個 800x600 畫面清空、重畫、再整個送到螢幕
+這裡只記錄「這幀有東西移動或改變的矩形」，只修補和送出那幾塊
+在沒有顯示卡加速的電腦上，可以省下大部分貼圖和送出畫面的時間
+"""
+import pygame
+
+
+######################物件類別######################
+class DirtyRectRenderer:
+    """
+    只更新有變動區域的繪圖器\n
+    \n
+    屬性說明：\n
+    screen: 視窗畫面\n
+    brick_layer: 磚塊圖層，擦掉舊位置時用它當「乾淨的背景」\n
+    max_rects: 變動矩形的數量上限，超過就改成整個畫面更新\n
+    previous_rects: 上一幀會動的物件所在的矩形\n
+    \n
+    每幀的流程:\n
+    1. 用磚塊圖層蓋掉上一幀物件的位置（等於擦掉）\n
+    2. 用磚塊圖層補上這幀被擊中或恢復的磚塊\n
+    3. 照原本的順序重畫所有會動的物件\n
+    4. 只把「舊位置 + 新位置 + 改變的磚塊」送到螢幕\n
+    \n
+    使用範例:\n
+        renderer = DirtyRectRenderer(screen, brick_layer)\n
+        renderer.render(sim, engine.draw_sprites)
+    """
+    def __init__(self, screen, brick_layer, max_rects=200):
+        """
+        初始化局部更新繪圖器\n
+        \n
+        參數:\n
+        screen (pygame.Surface): 視窗畫面\n
+        brick_layer (BrickLayer): 磚塊圖層\n
+        max_rects (int): 變動矩形的數量上限，範圍 > 0
+        """
+        self.screen = screen
+        self.brick_layer = brick_layer
+        # 請磚塊圖層開始記下重畫過的矩形，每幀由 compose() 取出（第一幀本來就整個重畫，之前的不用留）
+        self.brick_layer.is_tracking_changes = True
+        self.brick_layer.pop_changed_rects()
+        self.max_rects = max_rects
+        self.previous_rects = []
+        # 這一幀要送到螢幕的矩形，None 表示整個畫面
+        self.pending_updates = None
+        # 第一幀畫面上什麼都沒有，一定要整個畫一次
+        self.is_full_redraw = True
+
+    def request_full_redraw(self):
+        """
+        要求下一幀整個畫面重畫（例如視窗被蓋住後恢復）
+        """
+        self.is_full_redraw = True
+
+    def sprite_rects(self, sim):
+        """
+        收集這幀所有會動的物件所在的矩形\n
+        \n
+        參數:\n
+        sim (Simulation): 模擬核心\n
+        \n
+        回傳:\n
+        list: pygame.Rect 列表（畫面座標），包含底板、球、多球、龍捲風和勝利氣球
+        """
+        camera_y = sim.camera_y
+        rects = [sim.paddle.get_rect(camera_y), sim.ball.get_rect(camera_y)]
+        rects.extend(sim.balls.get_rects(camera_y))
+        for tornado in sim.tornadoes:
+            rects.append(tornado.get_rect(camera_y))
+        if sim.game_won:
+            rects.extend(sim.victory_balloons.get_rects(camera_y))
+        return rects
+
+    def render(self, sim, draw_sprites):
+        """
+        畫出這一幀，只把有變動的地方送到螢幕\n
+        \n
+        參數:\n
+        sim (Simulation): 模擬核心\n
+        draw_sprites (callable): 畫所有會動的物件的函式，參數是要畫上去的畫面\n
+        \n
+        副作用:\n
+        - 呼叫 pygame.display.update，只更新變動的矩形或整個畫面
+        """
+        self.compose(sim, draw_sprites)
+        self.present()
+
+    def compose(self, sim, draw_sprites):
+        """
+        在畫面上修補這一幀的內容，但還不送到螢幕\n
+        要送出的矩形記在 pending_updates，之後呼叫 present() 才真的送出\n
+        \n
+        參數:\n
+        sim (Simulation): 模擬核心\n
+        draw_sprites (callable): 畫所有會動的物件的函式，參數是要畫上去的畫面
+        """
+        layer_surface = self.brick_layer.surface
+        changed = self.brick_layer.pop_changed_rects()
+        current = self.sprite_rects(sim)
+
+        # 變動太多或需要整個重畫時，直接走原本的整頁更新比較快
+        is_full = (self.is_full_redraw or
+                   len(self.previous_rects) + len(current) + len(changed) > self.max_rects)
+        if is_full:
+            self.brick_layer.draw(self.screen)
+            draw_sprites(self.screen)
+            self.pending_updates = None
+            self.previous_rects = current
+            self.is_full_redraw = False
+            return
+
+        # 1. 用乾淨的磚塊圖層蓋掉上一幀物件的位置
+        # 2. 被擊中或恢復的磚塊也用圖層補上
+        screen_rect = self.screen.get_rect()
+        restore = [rect.clip(screen_rect) for rect in self.previous_rects + changed]
+        restore = [rect for rect in restore if rect.width and rect.height]
+        self.screen.blits([(layer_surface, rect, rect) for rect in restore], False)
+
+        # 3. 重畫所有會動的物件（順序和整頁重畫一樣）
+        draw_sprites(self.screen)
+
+        # 4. 只把舊位置、新位置和改變的磚塊送到螢幕
+        self.pending_updates = restore + current
+        self.previous_rects = current
+
+    def add_update_rect(self, rect):
+        """
+        額外要求把某個矩形送到螢幕（例如疊在畫面上的統計框）\n
+        rect: pygame.Rect，None 表示沒有東西要加
+        """
+        if rect is not None and self.pending_updates is not None:
+            self.pending_updates.append(rect)
+
+    def present(self):
+        """
+        把 compose() 準備好的內容送到螢幕
+        """
+        if self.pending_updates is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(self.pending_updates)
@@ -0,0 +1,148 @@
+######################載入套件######################
+"""
+畫面內插模組
+物理固定每秒跑 PHYSICS_HZ 步，畫面可能每秒畫 30、144 或 240 次，兩者對不齊
+直接畫最新一步的位置，畫面幀率比物理高時同一個位置會畫好幾次，看起來一頓一頓的
+這裡記住上一步的位置，畫圖時暫時把物件移到「上一步和這一步之間」的位置，畫完再放回去
+模擬核心完全不知道有這件事，遊戲結果和沒有內插時一模一樣
+"""
+import contextlib
+import numpy as np
+
+
+######################初始化設定######################
+# 一步之內移動超過這麼多像素就當作瞬間移動（球重新放回底板、遊戲重來），不內插
+MAX_LERP_DISTANCE = 100.0
+
+
+######################定義函式區######################
+def lerp(previous, current, alpha):
+    """
+    在上一步和這一步的位置之間內插\n
+    \n
+    參數:\n
+    previous, current (float): 上一步和這一步的值\n
+    alpha (float): 0 是上一步，1 是這一步\n
+    \n
+    回傳:\n
+    float: 內插後的值；移動距離超過 MAX_LERP_DISTANCE 時直接回傳這一步的值
+    """
+    if abs(current - previous) > MAX_LERP_DISTANCE:
+        return current
+    return previous + (current - previous) * alpha
+
+
+def lerp_arrays(previous, current, alpha):
+    """
+    lerp 的陣列版本，每個元素各自判斷是不是瞬間移動\n
+    返回值：新的陣列（不修改傳入的陣列）
+    """
+    blended = previous + (current - previous) * alpha
+    return np.where(np.abs(current - previous) > MAX_LERP_DISTANCE, current, blended)
+
+
+######################物件類別######################
+class RenderInterpolator:
+    """
+    記住模擬上一步的位置，畫圖時把物件暫時移到內插位置\n
+    \n
+    屬性說明：\n
+    is_enabled: False 時 apply() 什麼都不做\n
+    \n
+    內插的物件:\n
+    - 底板的 x（y 跟著鏡頭走，不內插）\n
+    - 主球和多球模式的球（球數改變時多球不內插）\n
+    - 龍捲風的位置和旋轉角度（用物件池的 handle 對應，回收再利用的龍捲風 handle 會變，新生成的不內插）\n
+    - 勝利氣球（數量改變時陣列順序會變，那一步不內插）\n
+    \n
+    鏡頭不內插：捲動關卡的鏡頭每一步移動整數像素，磚塊圖層也只能捲整數像素\n
+    \n
+    使用範例:\n
+        interpolator.capture(sim)\n
+        sim.step(inputs, fixed_dt)\n
+        with interpolator.apply(sim, accumulator / fixed_dt):\n
+            draw(sim)
+    """
+    def __init__(self, enabled=True):
+        """
+        建立內插器\n
+        enabled (bool): 是否啟用內插
+        """
+        self.is_enabled = enabled
+        self._paddle_x = None
+        self._ball = None
+        self._balls = None
+        self._tornadoes = {}
+        self._balloons = None
+
+    def capture(self, sim):
+        """
+        記住模擬目前的位置，每一步模擬之前呼叫\n
+        sim: Simulation 模擬核心
+        """
+        if not self.is_enabled:
+            return
+        self._paddle_x = sim.paddle.x
+        self._ball = (sim.ball.x, sim.ball.y)
+        n = sim.balls.count
+        self._balls = (sim.balls.x[:n].copy(), sim.balls.y[:n].copy())
+        self._tornadoes = {t.handle: (t, t.x, t.y, t.rotation) for t in sim.tornadoes}
+        m = sim.victory_balloons.count
+        self._balloons = (sim.victory_balloons.x[:m].copy(), sim.victory_balloons.y[:m].copy())
+
+    @contextlib.contextmanager
+    def apply(self, sim, alpha):
+        """
+        在 with 區塊裡把物件移到內插位置，離開時放回模擬的真正位置\n
+        \n
+        參數:\n
+        sim: Simulation 模擬核心\n
+        alpha (float): 0 到 1，距離上一步過了幾分之一步
+        """
+        if not self.is_enabled or self._ball is None:
+            yield
+            return
+        alpha = min(max(alpha, 0.0), 1.0)
+
+        # 先記下真正的位置，畫完要放回去
+        paddle = sim.paddle
+        ball = sim.ball
+        balls = sim.balls
+        balloons = sim.victory_balloons
+        saved_paddle_x = paddle.x
+        saved_ball = (ball.x, ball.y)
+        n = balls.count
+        saved_balls = (balls.x[:n].copy(), balls.y[:n].copy())
+        saved_tornadoes = [(t, t.x, t.y, t.rotation) for t in sim.tornadoes]
+        m = balloons.count
+        saved_balloons = (balloons.x[:m].copy(), balloons.y[:m].copy())
+
+        try:
+            paddle.x = lerp(self._paddle_x, paddle.x, alpha)
+            ball.x = lerp(self._ball[0], ball.x, alpha)
+            ball.y = lerp(self._ball[1], ball.y, alpha)
+            if len(self._balls[0]) == n:
+                balls.x[:n] = lerp_arrays(self._balls[0], saved_balls[0], alpha)
+                balls.y[:n] = lerp_arrays(self._balls[1], saved_balls[1], alpha)
+            for tornado in sim.tornadoes:
+                previous = self._tornadoes.get(tornado.handle)
+                if previous is None or previous[0] is not tornado:
+                    continue
+                tornado.x = lerp(previous[1], tornado.x, alpha)
+                tornado.y = lerp(previous[2], tornado.y, alpha)
+                # 轉滿一圈會歸零，那一步直接用新的角度
+                if tornado.rotation >= previous[3]:
+                    tornado.rotation = previous[3] + (tornado.rotation - previous[3]) * alpha
+            if len(self._balloons[0]) == m:
+                balloons.x[:m] = lerp_arrays(self._balloons[0], saved_balloons[0], alpha)
+                balloons.y[:m] = lerp_arrays(self._balloons[1], saved_balloons[1], alpha)
+            yield
+        finally:
+            paddle.x = saved_paddle_x
+            ball.x, ball.y = saved_ball
+            balls.x[:n] = saved_balls[0]
+            balls.y[:n] = saved_balls[1]
+            for tornado, x, y, rotation in saved_tornadoes:
+                tornado.x, tornado.y, tornado.rotation = x, y, rotation
+            balloons.x[:m] = saved_balloons[0]
+            balloons.y[:m] = saved_balloons[1]
@@ -0,0 +1,212 @@
+######################載入套件######################
+"""
+畫面品質調整模組
+電腦跟不上時讓畫面一級一級變簡單，而不是開始掉幀；變快了再慢慢調回來
+- 每一幀量「開始做事到畫完」花了多久（不含等待幀率和送出畫面，開垂直同步時送出畫面會等螢幕）
+- 最近幾幀耗時的 p95 超過一幀的預算就降一級，一直很快才升一級
+- 每一級是 settings.QUALITY_PRESETS 裡的一組設定：龍捲風層數、氣球數量和高光、球的縮放方式
+
+只影響畫面，不會動到模擬核心，同樣的種子和輸入在任何畫面品質下遊戲結果都一樣
+"""
+import time
+import numpy as np
+from config import settings
+
+
+######################物件類別######################
+class QualityController:
+    """
+    依照每幀耗時自動調整畫面品質\n
+    \n
+    屬性說明：\n
+    presets: {名稱: 設定 dict}，由好到差排列\n
+    names: 等級名稱的 tuple，順序和 presets 一樣\n
+    index: 目前等級在 names 裡的位置（0 是最好的）\n
+    is_adaptive: 是否自動調整，False 時固定在目前的等級\n
+    budget_ms: 一幀的時間預算（毫秒）\n
+    window: 環狀陣列保留最近幾幀的耗時\n
+    last_p95: 最近一次判斷時的耗時 p95（毫秒）\n
+    upgrade_frames: 目前要連續幾幀夠快才升一級（升級後馬上又降級會加倍）\n
+    changes: 總共換了幾次等級\n
+    \n
+    設計說明:\n
+    - 降級和升級用不同的門檻（QUALITY_DOWNGRADE_RATIO、QUALITY_UPGRADE_RATIO），中間的耗時不會換等級\n
+    - 換等級之後把耗時記錄清掉，要收集滿一整個 window 的新資料才會再判斷，不會拿舊等級的數字來決定\n
+    - 升級要連續 upgrade_frames 幀都夠快；升上去之後沒多久又降下來，表示這台電腦撐不住那一級，下次要等更久才再試\n
+    \n
+    使用範例:\n
+        quality = QualityController(budget_ms=1000 / 60)\n
+        quality.begin_frame()\n
+        ...（讀輸入、跑模擬、畫圖）\n
+        if quality.end_frame():\n
+            print(quality.describe())\n
+        preset = quality.preset
+    """
+    def __init__(self, presets=settings.QUALITY_PRESETS, level=settings.QUALITY_LEVEL,
+                 adaptive=settings.ADAPTIVE_QUALITY, budget_ms=1000.0 / settings.FPS,
+                 window=settings.QUALITY_WINDOW, check_interval=settings.QUALITY_CHECK_INTERVAL,
+                 downgrade_ratio=settings.QUALITY_DOWNGRADE_RATIO, upgrade_ratio=settings.QUALITY_UPGRADE_RATIO,
+                 upgrade_frames=settings.QUALITY_UPGRADE_FRAMES):
+        """
+        建立畫面品質控制器\n
+        \n
+        參數:\n
+        presets (dict): {名稱: 設定 dict}，由好到差排列\n
+        level (str): 一開始的等級名稱，必須在 presets 裡\n
+        adaptive (bool): 是否依照耗時自動調整\n
+        budget_ms (float): 一幀的時間預算（毫秒），範圍 > 0\n
+        window (int): 看最近幾幀的耗時，範圍 > 0\n
+        check_interval (int): 每隔幾幀判斷一次，範圍 > 0\n
+        downgrade_ratio (float): p95 超過預算的這個比例就降一級\n
+        upgrade_ratio (float): p95 低於預算的這個比例才算夠快，應該比 downgrade_ratio 小\n
+        upgrade_frames (int): 要連續幾幀夠快才升一級
+        """
+        if level not in presets:
+            raise ValueError(f'沒有這個畫面品質等級: {level}（可用的有 {", ".join(presets)}）')
+        if budget_ms <= 0:
+            raise ValueError(f'一幀的時間預算必須大於 0: {budget_ms}')
+        self.presets = presets
+        self.names = tuple(presets)
+        self.index = self.names.index(level)
+        self.is_adaptive = bool(adaptive)
+        self.budget_ms = budget_ms
+        self.window = max(1, int(window))
+        self.check_interval = max(1, int(check_interval))
+        self.downgrade_ratio = downgrade_ratio
+        self.upgrade_ratio = upgrade_ratio
+        self.base_upgrade_frames = max(1, int(upgrade_frames))
+        self.upgrade_frames = self.base_upgrade_frames
+        self.samples = np.zeros(self.window, dtype=np.float64)
+        self.last_p95 = 0.0
+        self.changes = 0
+        # 換等級之後記了幾幀、總共記了幾幀、已經連續幾幀夠快、上次升級是第幾幀
+        self.frame_count = 0
+        self.total_frames = 0
+        self.calm_frames = 0
+        self.upgraded_at = None
+        self._frame_start = None
+
+    ######################目前的等級######################
+    @property
+    def name(self):
+        """
+        目前的等級名稱\n
+        返回值：字串，例如 'high'
+        """
+        return self.names[self.index]
+
+    @property
+    def preset(self):
+        """
+        目前等級的設定\n
+        返回值：dict，欄位見 settings.QUALITY_PRESETS
+        """
+        return self.presets[self.names[self.index]]
+
+    def set_level(self, level):
+        """
+        換到指定的等級，並清掉耗時記錄重新收集\n
+        \n
+        參數:\n
+        level (str 或 int): 等級名稱或在 names 裡的位置\n
+        \n
+        回傳:\n
+        bool: 等級有沒有改變
+        """
+        index = self.names.index(level) if isinstance(level, str) else int(level)
+        index = min(max(index, 0), len(self.names) - 1)
+        self.frame_count = 0
+        self.calm_frames = 0
+        if index == self.index:
+            return False
+        self.index = index
+        self.changes += 1
+        return True
+
+    def cycle(self):
+        """
+        手動切換（F7）：自動 → 每個固定等級由好到差 → 回到自動\n
+        回到自動時從目前的等級開始重新判斷\n
+        返回值：切換後是否自動調整
+        """
+        if self.is_adaptive:
+            self.is_adaptive = False
+            self.set_level(0)
+        elif self.index < len(self.names) - 1:
+            self.set_level(self.index + 1)
+        else:
+            self.is_adaptive = True
+            self.upgrade_frames = self.base_upgrade_frames
+            self.set_level(self.index)
+        return self.is_adaptive
+
+    ######################每幀記錄######################
+    def begin_frame(self):
+        """
+        開始新的一幀（在等待幀率之後呼叫）
+        """
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """
+        這一幀畫完了（在送出畫面之前呼叫）：記下耗時，每 check_interval 幀判斷一次要不要換等級\n
+        沒有先呼叫 begin_frame() 的話什麼都不做（例如工具程式直接呼叫 GameEngine.draw）\n
+        返回值：這一幀有沒有換等級
+        """
+        if self._frame_start is None:
+            return False
+        elapsed_ms = (time.perf_counter() - self._frame_start) * 1000.0
+        self._frame_start = None
+        if not self.is_adaptive:
+            return False
+        self.samples[self.frame_count % self.window] = elapsed_ms
+        self.frame_count += 1
+        self.total_frames += 1
+        if self.frame_count < self.window or self.frame_count % self.check_interval != 0:
+            return False
+        return self.evaluate()
+
+    def evaluate(self):
+        """
+        用最近 window 幀的耗時 p95 決定要不要換等級\n
+        返回值：有沒有換等級
+        """
+        filled = min(self.frame_count, self.window)
+        if filled == 0:
+            return False
+        p95 = float(np.percentile(self.samples[:filled], 95))
+        self.last_p95 = p95
+        if p95 > self.budget_ms * self.downgrade_ratio:
+            if self.index == len(self.names) - 1:
+                self.calm_frames = 0
+                return False
+            # 剛升級沒多久就撐不住，下次要等久一點再試
+            if self.upgraded_at is not None and self.total_frames - self.upgraded_at <= self.window * 2:
+                self.upgrade_frames = min(self.upgrade_frames * 2, self.base_upgrade_frames * 8)
+            self.upgraded_at = None
+            return self.set_level(self.index + 1)
+        if p95 < self.budget_ms * self.upgrade_ratio:
+            self.calm_frames += self.check_interval
+            if self.calm_frames >= self.upgrade_frames and self.index > 0:
+                self.upgraded_at = self.total_frames
+                return self.set_level(self.index - 1)
+            return False
+        self.calm_frames = 0
+        return False
+
+    ######################報告######################
+    def describe(self):
+        """
+        目前等級的文字說明（換等級時印在終端機）\n
+        返回值：字串
+        """
+        mode = '自動' if self.is_adaptive else '固定'
+        return (f'畫面品質：{self.name}（{mode}，耗時 p95 {self.last_p95:.1f} ms / '
+                f'預算 {self.budget_ms:.1f} ms，已換 {self.changes} 次）')
+
+    def status_line(self):
+        """
+        分段計時 HUD 最下面顯示的一行\n
+        返回值：字串，例如 'quality   high (auto)'
+        """
+        return f'{"quality":<10}{self.name} ({"auto" if self.is_adaptive else "fixed"})'
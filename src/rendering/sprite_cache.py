@@ -0,0 +1,90 @@
+######################載入套件######################
+"""
+縮放圖片快取模組
+同一張圖片縮放成同樣大小的結果只算一次，之後每幀直接拿來貼
+快取有數量上限，滿了就丟掉最久沒用到的那張（LRU）
+所有需要畫縮放圖片的物件共用同一個快取
+"""
+from collections import OrderedDict
+import pygame
+from config import settings
+
+
+######################物件類別######################
+class SpriteCache:
+    """
+    縮放後圖片的 LRU 快取\n
+    \n
+    屬性說明：\n
+    max_entries: 最多保留幾張縮放後的圖片\n
+    hits, misses: 快取命中和沒命中的次數（用來觀察快取效果）\n
+    \n
+    設計說明:\n
+    - 用原圖物件的 id 加上目標大小和縮放方式當作鑰匙\n
+    - 快取裡同時保留原圖，確保原圖不會被回收後 id 被別的圖片重複使用\n
+    - OrderedDict 記錄使用順序，每次用到就移到最後，滿了就刪最前面的\n
+    \n
+    使用範例:\n
+        img = sprite_cache.get_scaled(ball_image, (12, 12))\n
+        screen.blit(img, pos)
+    """
+    def __init__(self, max_entries=256):
+        """
+        初始化快取\n
+        \n
+        參數:\n
+        max_entries (int): 最多保留幾張圖片，範圍 > 0
+        """
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_scaled(self, image, size, smooth=True):
+        """
+        取得縮放到指定大小的圖片，沒有快取時才真的縮放\n
+        \n
+        參數:\n
+        image (pygame.Surface): 原始圖片\n
+        size (tuple): 目標大小 (寬, 高)\n
+        smooth (bool): True 用 smoothscale（比較平滑），False 用 scale（比較快）\n
+        \n
+        回傳:\n
+        pygame.Surface: 縮放後的圖片（請不要直接修改它，其他物件也在用）
+        """
+        key = (id(image), size[0], size[1], smooth)
+        entry = self._entries.get(key)
+        # 有快取而且原圖還是同一張，就直接拿來用
+        if entry is not None and entry[0] is image:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        if smooth:
+            scaled = pygame.transform.smoothscale(image, size)
+        else:
+            scaled = pygame.transform.scale(image, size)
+        self._entries[key] = (image, scaled)
+        self._entries.move_to_end(key)
+        # 超過上限就丟掉最久沒用到的圖片
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return scaled
+
+    def clear(self):
+        """
+        清空快取（例如換了一批新圖片之後）
+        """
+        self._entries.clear()
+
+    def __len__(self):
+        """
+        返回值：目前快取了幾張圖片
+        """
+        return len(self._entries)
+
+
+######################初始化設定######################
+# 全遊戲共用的縮放圖片快取
+sprite_cache = SpriteCache(settings.SPRITE_CACHE_SIZE)
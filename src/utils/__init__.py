@@ -3,6 +3,11 @@
 
 包含遊戲所需的各種工具函數：\n
 - resource_loader: 資源載入工具，處理圖片、音效等檔案的載入\n
+- asset_manager: 資源管理器，負責路徑解析、圖片快取、預先載入和圖集\n
+- frame_timer: 每幀分段計時\n
+- sampling_profiler: 背景執行緒取樣呼叫堆疊，輸出火焰圖用的 collapsed stack 檔\n
+- alloc_tracker: 每幀記憶體配置追蹤（tracemalloc 快照和 gc callback）\n
+- frame_pacer: 畫面節奏控制（目標幀率、垂直同步、不限速）\n
 
 這些工具函數可以在整個專案中被重複使用\n
 """
\ No newline at end of file
@@ -0,0 +1,291 @@
+######################載入套件######################
+"""
+記憶體配置追蹤模組
+找出主循環裡每一幀配置了多少記憶體、是哪幾行程式配置的，用來把穩定狀態壓到「每幀零配置」
+- 每一幀記下淨增加的位元組（留下來沒釋放的）和暫時用掉的最高量（幀內配置又釋放的也算）
+- 用 gc 的 callback 記下每一幀發生幾次垃圾回收、暫停了多久
+- 每隔一段時間拍一張 tracemalloc 快照，和上一張比較，算出每個程式位置平均每幀淨增加多少
+
+tracemalloc 本身會讓程式變慢不少（每次配置都要記呼叫位置），只在要找問題或跑耐久測試時打開
+"""
+import gc
+import os
+import time
+import tracemalloc
+import numpy as np
+from config import settings
+
+
+######################初始化設定######################
+# 每一幀記錄的欄位
+ALLOC_COLUMNS = ('net_bytes', 'peak_bytes', 'gc_collections', 'gc_pause_ms')
+
+# 專案根目錄，報告裡的位置用相對路徑顯示比較短
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 快照比較時排除的檔案（追蹤器自己和 tracemalloc 的配置不算）
+_EXCLUDED_FILES = (tracemalloc.__file__, os.path.abspath(__file__), '<frozen importlib._bootstrap>',
+                   '<frozen importlib._bootstrap_external>', '<unknown>')
+
+
+######################物件類別######################
+class AllocationSite:
+    """
+    一個程式位置平均每幀淨增加的記憶體\n
+    \n
+    屬性說明：\n
+    location: 'src/entities/ball.py:120' 這樣的位置\n
+    bytes_per_frame: 平均每幀淨增加幾個位元組（負數表示在釋放）\n
+    blocks_per_frame: 平均每幀淨增加幾個記憶體區塊（大約等於物件數）
+    """
+    __slots__ = ('location', 'bytes_per_frame', 'blocks_per_frame')
+
+    def __init__(self, location, bytes_per_frame, blocks_per_frame):
+        self.location = location
+        self.bytes_per_frame = bytes_per_frame
+        self.blocks_per_frame = blocks_per_frame
+
+
+class AllocationTracker:
+    """
+    每幀記憶體配置追蹤器\n
+    \n
+    屬性說明：\n
+    is_enabled: 是否正在追蹤\n
+    window: 環狀陣列保留最近幾幀的資料\n
+    samples: 每幀資料 (window, len(ALLOC_COLUMNS))，欄位是淨增加、暫時最高量、垃圾回收次數、回收暫停毫秒\n
+    frame_count: 開始追蹤後總共記錄了幾幀\n
+    net_total: 開始追蹤後所有幀的淨增加總和（位元組），除以 frame_count 就是平均每幀洩漏多少\n
+    collections: 每一代垃圾回收各發生幾次 [第 0 代, 第 1 代, 第 2 代]\n
+    sites: 最近一次快照比較的結果，AllocationSite 列表，依每幀淨增加由多到少排列\n
+    \n
+    設計說明:\n
+    - 幀開始時 tracemalloc.reset_peak()，幀結束時的目前用量減開始時是淨增加，最高量減開始時是暫時用掉的\n
+    - 拍快照很慢，而且快照本身也要記憶體，所以每 snapshot_interval 幀才拍一次，而且是在兩幀之間拍，不算進任何一幀\n
+    - 快照只能看到留下來的記憶體，幀內配置又釋放的只會出現在暫時最高量裡，看不到是哪一行\n
+    - tracemalloc 開始之前配置的記憶體，之後被釋放不會扣掉，剛開始追蹤時被換掉的舊資料（例如倒轉記錄）會看起來像在增加；\n
+      要量穩定狀態就先打開 tracemalloc 再暖身（tools/soak_test.py 就是這樣做）\n
+    \n
+    使用範例:\n
+        tracker = AllocationTracker()\n
+        tracker.start()\n
+        tracker.begin_frame()\n
+        sim.step(inputs)\n
+        tracker.end_frame()\n
+        print(tracker.report())
+    """
+    def __init__(self, window=settings.PROFILE_WINDOW, snapshot_interval=settings.ALLOC_SNAPSHOT_INTERVAL,
+                 trace_depth=settings.ALLOC_TRACE_DEPTH, top=10):
+        """
+        建立追蹤器（還不會開始追蹤，要呼叫 start()）\n
+        \n
+        參數:\n
+        window (int): 保留最近幾幀的資料來算百分位數，範圍 > 0\n
+        snapshot_interval (int): 每隔幾幀拍一次快照比較程式位置，範圍 > 0\n
+        trace_depth (int): tracemalloc 每次配置記幾層呼叫位置（1 最快）\n
+        top (int): 報告裡列出幾個淨增加最多的位置
+        """
+        self.window = max(1, int(window))
+        self.snapshot_interval = max(1, int(snapshot_interval))
+        self.trace_depth = max(1, int(trace_depth))
+        self.top = top
+        self.samples = np.zeros((self.window, len(ALLOC_COLUMNS)), dtype=np.float64)
+        self.is_enabled = False
+        self.frame_count = 0
+        self.net_total = 0
+        self.collections = [0, 0, 0]
+        self.sites = []
+        self.started_at = None
+        self._is_own_tracemalloc = False
+        self._filters = [tracemalloc.Filter(False, name) for name in _EXCLUDED_FILES]
+        self._snapshot = None
+        self._snapshot_frame = 0
+        self._frame_start = 0
+        self._frame_collections = 0
+        self._frame_pause = 0.0
+        self._gc_start = 0.0
+
+    ######################開關######################
+    def start(self):
+        """
+        開始追蹤（已經在追蹤的話什麼都不做），之前的資料會清掉\n
+        tracemalloc 沒開的話會幫忙打開，stop() 時再關掉
+        """
+        if self.is_enabled:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_depth)
+            self._is_own_tracemalloc = True
+        self.frame_count = 0
+        self.net_total = 0
+        self.collections = [0, 0, 0]
+        self.sites = []
+        self.samples[:] = 0.0
+        self.started_at = time.perf_counter()
+        # 第一次過濾快照時 fnmatch 會編譯並快取比對規則，先拍一次丟掉，這些配置才不會算進第一次比較
+        self._take_snapshot()
+        self._snapshot = self._take_snapshot()
+        self._snapshot_frame = 0
+        gc.callbacks.append(self._on_gc)
+        self.is_enabled = True
+
+    def stop(self):
+        """
+        停止追蹤，最後再比較一次快照，資料保留到下次 start()
+        """
+        if not self.is_enabled:
+            return
+        self.is_enabled = False
+        gc.callbacks.remove(self._on_gc)
+        if self.frame_count > self._snapshot_frame:
+            self._update_sites()
+        self._snapshot = None
+        if self._is_own_tracemalloc:
+            tracemalloc.stop()
+            self._is_own_tracemalloc = False
+
+    def toggle(self):
+        """
+        切換追蹤\n
+        返回值：切換後是否正在追蹤
+        """
+        if self.is_enabled:
+            self.stop()
+        else:
+            self.start()
+        return self.is_enabled
+
+    ######################每幀記錄######################
+    def begin_frame(self):
+        """
+        開始新的一幀：記下目前用量，清掉最高量
+        """
+        if not self.is_enabled:
+            return
+        tracemalloc.reset_peak()
+        self._frame_start = tracemalloc.get_traced_memory()[0]
+        self._frame_collections = 0
+        self._frame_pause = 0.0
+
+    def end_frame(self):
+        """
+        結束這一幀：把淨增加、暫時最高量和垃圾回收寫進環狀陣列\n
+        每 snapshot_interval 幀比較一次快照（在這一幀記完之後才拍，不算進這一幀）
+        """
+        if not self.is_enabled:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        net = current - self._frame_start
+        row = self.samples[self.frame_count % self.window]
+        row[0] = net
+        row[1] = peak - self._frame_start
+        row[2] = self._frame_collections
+        row[3] = self._frame_pause * 1000.0
+        self.net_total += net
+        self.frame_count += 1
+        if self.frame_count - self._snapshot_frame >= self.snapshot_interval:
+            self._update_sites()
+
+    def _on_gc(self, phase, info):
+        """
+        gc 的 callback：記下每一代回收的次數和暫停時間
+        """
+        if phase == 'start':
+            self._gc_start = time.perf_counter()
+        else:
+            self._frame_pause += time.perf_counter() - self._gc_start
+            self._frame_collections += 1
+            self.collections[info['generation']] += 1
+
+    ######################快照比較######################
+    def _take_snapshot(self):
+        """
+        拍一張排除追蹤器自己的快照
+        """
+        return tracemalloc.take_snapshot().filter_traces(self._filters)
+
+    def _update_sites(self):
+        """
+        拍新的快照和上一張比較，算出每個程式位置平均每幀淨增加多少
+        """
+        frames = self.frame_count - self._snapshot_frame
+        snapshot = self._take_snapshot()
+        stats = snapshot.compare_to(self._snapshot, 'lineno')
+        self._snapshot = snapshot
+        self._snapshot_frame = self.frame_count
+        if frames <= 0:
+            return
+        sites = []
+        for stat in stats:
+            if stat.size_diff == 0 and stat.count_diff == 0:
+                continue
+            frame = stat.traceback[0]
+            filename = frame.filename
+            if filename.startswith(PACKAGE_ROOT):
+                filename = os.path.relpath(filename, PACKAGE_ROOT).replace(os.sep, '/')
+            else:
+                filename = os.path.basename(filename)
+            location = f'{filename}:{frame.lineno}'
+            sites.append(AllocationSite(location, stat.size_diff / frames, stat.count_diff / frames))
+        sites.sort(key=lambda site: site.bytes_per_frame, reverse=True)
+        self.sites = sites[:self.top]
+
+    ######################統計######################
+    def percentiles(self, column, q=(50, 95, 99)):
+        """
+        計算某個欄位最近幾幀的百分位數\n
+        \n
+        參數:\n
+        column (str): ALLOC_COLUMNS 裡的欄位名稱\n
+        q (tuple): 要算哪些百分位數\n
+        \n
+        回傳:\n
+        tuple: 各百分位數，還沒有資料時全部是 0
+        """
+        filled = min(self.frame_count, self.window)
+        if filled == 0:
+            return tuple(0.0 for _ in q)
+        values = self.samples[:filled, ALLOC_COLUMNS.index(column)]
+        return tuple(float(v) for v in np.percentile(values, q))
+
+    def net_bytes_per_frame(self):
+        """
+        開始追蹤後平均每幀淨增加幾個位元組（穩定狀態應該接近 0，一直大於 0 就是有東西越積越多）\n
+        返回值：位元組數
+        """
+        return self.net_total / max(1, self.frame_count)
+
+    def summary(self):
+        """
+        追蹤結果的統計數字\n
+        返回值：dict，包含 frames、net_bytes_per_frame、peak_bytes（p50/p95/p99）、
+                gc_per_1000_frames（三代各幾次）、gc_pause_ms（p50/p95/p99）
+        """
+        frames = max(1, self.frame_count)
+        return {
+            'frames': self.frame_count,
+            'net_bytes_per_frame': self.net_bytes_per_frame(),
+            'peak_bytes': self.percentiles('peak_bytes'),
+            'gc_per_1000_frames': [count * 1000.0 / frames for count in self.collections],
+            'gc_pause_ms': self.percentiles('gc_pause_ms', (50, 99, 100)),
+        }
+
+    def report(self):
+        """
+        追蹤結果的文字報告（結束遊戲或耐久測試時印出）\n
+        返回值：多行字串
+        """
+        stats = self.summary()
+        p50, p95, p99 = stats['peak_bytes']
+        gen0, gen1, gen2 = stats['gc_per_1000_frames']
+        lines = [
+            f'記憶體配置：{stats["frames"]} 幀，平均每幀淨增加 {stats["net_bytes_per_frame"]:,.1f} 位元組',
+            f'  每幀暫時用掉 p50 {p50:,.0f} / p95 {p95:,.0f} / p99 {p99:,.0f} 位元組',
+            f'  每 1000 幀垃圾回收 第 0 代 {gen0:.1f} / 第 1 代 {gen1:.1f} / 第 2 代 {gen2:.1f} 次，'
+            f'最長暫停 {stats["gc_pause_ms"][2]:.2f} ms',
+        ]
+        if self.sites:
+            lines.append(f'  每幀淨增加最多的位置（最近 {self.snapshot_interval} 幀內）:')
+            for site in self.sites:
+                lines.append(f'    {site.bytes_per_frame:10,.1f} B {site.blocks_per_frame:8.2f} 個  {site.location}')
+        return '\n'.join(lines)
@@ -0,0 +1,258 @@
+######################載入套件######################
+"""
+資源管理模組
+負責找到、載入並快取遊戲用到的圖片
+- 路徑一律相對於專案根目錄，不管從哪個資料夾執行遊戲都找得到
+- 同一張圖片只讀一次硬碟，之後直接拿快取
+- 遊戲開始前先把清單上的圖片全部載入，遊戲進行中不用再讀檔
+- 可以把很多張小圖打包成一張圖集，啟動時只要讀一個檔案
+"""
+import json
+import os
+import pygame
+
+
+######################初始化設定######################
+# 專案根目錄（這個檔案在 src/utils/ 底下，往上兩層）
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+######################物件類別######################
+class AssetManager:
+    """
+    圖片資源管理器\n
+    \n
+    屬性說明：\n
+    root: 相對路徑的起點（預設是專案根目錄）\n
+    manifest: 名稱對應候選路徑的清單 {名稱: [路徑, ...]}\n
+    \n
+    設計說明:\n
+    - 檔案快取：同一個路徑只讀一次硬碟\n
+    - 找不到的檔案也會記住，不會每次都重新找硬碟\n
+    - 圖集：載入圖集後，清單上的名稱優先從圖集切出來，不用再讀個別檔案\n
+    - 還沒開視窗時無法轉換像素格式，會先存原圖，開視窗後第一次使用時再轉換\n
+    \n
+    使用範例:\n
+        assets = AssetManager(manifest=settings.ASSET_MANIFEST)\n
+        assets.preload()\n
+        ball_img = assets.get('ball')
+    """
+    def __init__(self, root=PACKAGE_ROOT, manifest=None):
+        """
+        初始化資源管理器\n
+        \n
+        參數:\n
+        root (str): 相對路徑的起點，預設是專案根目錄\n
+        manifest (dict): {名稱: [候選路徑, ...]}，None 表示空清單
+        """
+        self.root = root
+        self.manifest = dict(manifest or {})
+        self._files = {}        # {(絕對路徑, colorkey): (Surface 或 None, 是否已轉換)}
+        self._named = {}        # {名稱: 從圖集切出來的 Surface}
+        self._atlas = None      # 圖集整張大圖
+        self._atlas_rects = {}  # {名稱: (x, y, 寬, 高)}
+        self._warned = set()
+
+    ######################路徑######################
+    def resolve(self, path):
+        """
+        把相對路徑換成以專案根目錄為起點的絕對路徑\n
+        path: 相對或絕對路徑\n
+        返回值：絕對路徑字串
+        """
+        if os.path.isabs(path):
+            return path
+        return os.path.join(self.root, path)
+
+    ######################載入######################
+    def _prepare(self, surface, colorkey):
+        """
+        把圖片轉成和螢幕相同的像素格式，貼圖會快很多\n
+        還沒開視窗時無法轉換，回傳 (原圖, False)，之後再轉
+        """
+        if pygame.display.get_surface() is None:
+            return surface, False
+        if colorkey is None:
+            return surface.convert_alpha(), True
+        # 有指定透明色的圖片不需要每個像素的透明度，轉成一般格式再設定透明色
+        surface = surface.convert()
+        if colorkey == -1:
+            # -1 表示用左上角那個像素的顏色當透明色
+            colorkey = surface.get_at((0, 0))
+        surface.set_colorkey(colorkey, pygame.RLEACCEL)
+        return surface, True
+
+    def load_image(self, path, colorkey=None):
+        """
+        載入圖片檔案（有快取，同一個檔案只讀一次）\n
+        \n
+        參數:\n
+        path (str): 圖片路徑，相對路徑以專案根目錄為起點\n
+        colorkey (tuple 或 int): 透明色，-1 表示用左上角像素的顏色，None 表示使用圖片本身的透明度\n
+        \n
+        回傳:\n
+        pygame.Surface: 載入成功\n
+        None: 檔案不存在或格式不支援
+        """
+        key = (self.resolve(path), colorkey)
+        cached = self._files.get(key)
+        if cached is not None:
+            surface, is_converted = cached
+            # 之前還沒開視窗所以沒轉換，現在有視窗了就補轉換
+            if surface is not None and not is_converted:
+                surface, is_converted = self._prepare(surface, colorkey)
+                self._files[key] = (surface, is_converted)
+            return surface
+
+        if not os.path.isfile(key[0]):
+            # 檔案不存在是正常的（候選路徑本來就可能不存在），記住結果不要再找
+            self._files[key] = (None, True)
+            return None
+        try:
+            surface = pygame.image.load(key[0])
+        except pygame.error as e:
+            # 檔案壞掉或格式不支援，提醒一次就好，遊戲繼續用替代畫法
+            self._warn(key[0], f"載入圖片失敗: {key[0]} ({e})")
+            self._files[key] = (None, True)
+            return None
+        self._files[key] = self._prepare(surface, colorkey)
+        return self._files[key][0]
+
+    def get(self, name):
+        """
+        依名稱取得圖片\n
+        \n
+        參數:\n
+        name (str): 清單上的名稱，例如 'ball'\n
+        \n
+        回傳:\n
+        pygame.Surface: 找到的圖片\n
+        None: 圖集和所有候選路徑都沒有這張圖\n
+        \n
+        尋找順序:\n
+        1. 已載入的圖集\n
+        2. 清單上的候選路徑，依序嘗試
+        """
+        rect = self._atlas_rects.get(name)
+        if rect is not None and self._atlas is not None:
+            # 從圖集切出來（共用同一塊記憶體，不用複製），切一次就記住
+            if name not in self._named:
+                self._named[name] = self._atlas.subsurface(rect)
+            return self._named[name]
+        # 個別檔案都有快取，依序嘗試候選路徑不會重複讀硬碟
+        for path in self.manifest.get(name, []):
+            surface = self.load_image(path)
+            if surface is not None:
+                return surface
+        return None
+
+    def preload(self, names=None):
+        """
+        預先載入清單上的圖片，遊戲進行中就不用再讀檔\n
+        \n
+        參數:\n
+        names (iterable): 要載入的名稱，None 表示清單上全部\n
+        \n
+        回傳:\n
+        dict: {名稱: 是否成功找到圖片}
+        """
+        if names is None:
+            names = list(self.manifest)
+        return {name: self.get(name) is not None for name in names}
+
+    ######################圖集######################
+    def load_atlas(self, index_path):
+        """
+        載入打包好的圖集\n
+        \n
+        參數:\n
+        index_path (str): 圖集索引檔（JSON）路徑\n
+        \n
+        回傳:\n
+        bool: True 表示載入成功\n
+        \n
+        索引檔格式:\n
+            {"image": "atlas.png", "sprites": {"ball": [x, y, 寬, 高], ...}}\n
+        image 是相對於索引檔所在資料夾的路徑
+        """
+        full_index = self.resolve(index_path)
+        if not os.path.isfile(full_index):
+            return False
+        try:
+            with open(full_index, encoding='utf-8') as f:
+                index = json.load(f)
+            image_path = os.path.join(os.path.dirname(full_index), index['image'])
+            atlas = self.load_image(image_path)
+            sprites = {name: tuple(rect) for name, rect in index['sprites'].items()}
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # 索引檔壞掉就當作沒有圖集，改用個別檔案
+            self._warn(full_index, f"圖集索引讀取失敗: {full_index} ({e})")
+            return False
+        if atlas is None:
+            return False
+        self._atlas = atlas
+        self._atlas_rects = sprites
+        self._named = {}
+        return True
+
+    def _warn(self, key, message):
+        """
+        同一個問題只印一次警告，避免洗版
+        """
+        if key not in self._warned:
+            self._warned.add(key)
+            print(message)
+
+
+######################定義函式區######################
+def pack_atlas(images, image_path, index_path, padding=1):
+    """
+    把很多張小圖打包成一張圖集，並寫出索引檔\n
+    \n
+    參數:\n
+    images (dict): {名稱: pygame.Surface}\n
+    image_path (str): 圖集圖片要存到哪裡（PNG）\n
+    index_path (str): 索引檔要存到哪裡（JSON）\n
+    padding (int): 每張小圖之間留幾個像素的空隙，避免縮放時顏色互相滲透\n
+    \n
+    回傳:\n
+    dict: {名稱: (x, y, 寬, 高)} 每張小圖在圖集裡的位置\n
+    \n
+    算法說明（層架式排列）:\n
+    - 先把小圖從高到矮排好\n
+    - 從左到右一張張放，放不下就換到下一層，每層高度是該層最高那張\n
+    - 圖集寬度取所有小圖面積總和開根號（至少要放得下最寬那張），排起來接近正方形
+    """
+    order = sorted(images, key=lambda name: images[name].get_height(), reverse=True)
+    total_area = sum((s.get_width() + padding) * (s.get_height() + padding) for s in images.values())
+    widest = max((s.get_width() + padding for s in images.values()), default=1)
+    atlas_width = max(widest, int(total_area ** 0.5) + 1)
+
+    rects = {}
+    cursor_x = cursor_y = shelf_height = 0
+    for name in order:
+        width, height = images[name].get_size()
+        # 這一層放不下了，換到下一層
+        if cursor_x + width > atlas_width:
+            cursor_x = 0
+            cursor_y += shelf_height + padding
+            shelf_height = 0
+        rects[name] = (cursor_x, cursor_y, width, height)
+        cursor_x += width + padding
+        shelf_height = max(shelf_height, height)
+
+    atlas_height = max(1, cursor_y + shelf_height)
+    atlas = pygame.Surface((atlas_width, atlas_height), pygame.SRCALPHA)
+    atlas.fill((0, 0, 0, 0))
+    for name, rect in rects.items():
+        atlas.blit(images[name], rect[:2])
+
+    os.makedirs(os.path.dirname(os.path.abspath(image_path)), exist_ok=True)
+    pygame.image.save(atlas, image_path)
+    index = {
+        'image': os.path.relpath(os.path.abspath(image_path), os.path.dirname(os.path.abspath(index_path))),
+        'sprites': {name: list(rect) for name, rect in rects.items()},
+    }
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    return rects
@@ -0,0 +1,82 @@
+######################載入套件######################
+"""
+畫面節奏模組
+控制主循環多久畫一次畫面，和物理模擬一步多長完全分開
+- 'target': 照目標幀率限速（可以用忙碌等待換取更穩定的幀間隔）
+- 'vsync': 不自己限速，送出畫面時等螢幕垂直同步
+- 'uncapped': 不限速，能畫多快就畫多快（測效能用）
+"""
+import time
+import pygame
+from config import settings
+
+
+######################初始化設定######################
+# 可以用的節奏模式
+PACING_MODES = ('target', 'vsync', 'uncapped')
+
+
+######################物件類別######################
+class FramePacer:
+    """
+    主循環的節奏控制\n
+    \n
+    屬性說明：\n
+    mode: 節奏模式，'target'、'vsync' 或 'uncapped'\n
+    fps: 'target' 模式的目標幀率\n
+    is_busy_loop: 是否用 clock.tick_busy_loop 忙碌等待\n
+    clock: pygame 的時鐘\n
+    \n
+    設計說明:\n
+    - clock.tick 回傳的是整數毫秒，240 FPS 時一幀只有 4 ms，誤差高達 1/8\n
+    - 所以等待交給 pygame，經過的時間改用 time.perf_counter 量，累積器拿到的時間才準\n
+    - tick 只負責睡覺，sleep 的精度受作業系統影響；tick_busy_loop 會空轉到時間剛好，幀間隔抖動小很多\n
+    \n
+    使用範例:\n
+        pacer = FramePacer('target', 144, busy_loop=True)\n
+        while True:\n
+            dt = pacer.tick()
+    """
+    def __init__(self, mode=settings.FRAME_PACING, fps=settings.FPS, busy_loop=settings.BUSY_LOOP_PACING):
+        """
+        建立節奏控制\n
+        \n
+        參數:\n
+        mode (str): 'target'、'vsync' 或 'uncapped'\n
+        fps (int): 'target' 模式的目標幀率，範圍 > 0\n
+        busy_loop (bool): True 用忙碌等待，幀間隔比較穩定但會吃滿一個核心
+        """
+        if mode not in PACING_MODES:
+            raise ValueError(f'不支援的節奏模式: {mode!r}（可以用 {", ".join(PACING_MODES)}）')
+        if fps <= 0:
+            raise ValueError(f'目標幀率必須大於 0: {fps}')
+        self.mode = mode
+        self.fps = fps
+        self.is_busy_loop = bool(busy_loop)
+        self.clock = pygame.time.Clock()
+        self._last = time.perf_counter()
+
+    def tick(self):
+        """
+        等到下一幀該開始的時間，回傳和上一幀相隔多久\n
+        返回值：經過的時間（秒）
+        """
+        if self.mode == 'target':
+            if self.is_busy_loop:
+                self.clock.tick_busy_loop(self.fps)
+            else:
+                self.clock.tick(self.fps)
+        else:
+            # vsync 在送出畫面時已經等過了，uncapped 不等；兩種都只更新時鐘的統計
+            self.clock.tick()
+        now = time.perf_counter()
+        dt = now - self._last
+        self._last = now
+        return dt
+
+    def get_fps(self):
+        """
+        取得最近幾幀的平均幀率\n
+        返回值：每秒幀數
+        """
+        return self.clock.get_fps()
@@ -0,0 +1,253 @@
+######################載入套件######################
+"""
+每幀分段計時模組
+掉幀時用來找出是哪一段變慢：讀輸入、生成物件、龍捲風、球的物理、捲動關卡的區塊串流、倒轉記錄、畫圖，還是送出畫面
+- 每一段的耗時記在固定長度的環狀陣列裡，隨時可以算 p50 / p95 / p99
+- 可以在畫面左上角顯示統計（按 F3 切換）
+- 可以把每一幀的耗時寫到 CSV 檔，事後用試算表或 pandas 分析
+- 關閉時 phase() 回傳共用的空計時器，幾乎沒有額外成本
+- 取樣分析器（sampling_profiler.py）靠 active_phase 知道每次取樣落在哪個階段
+"""
+import contextlib
+import csv
+import time
+import numpy as np
+import pygame
+from config import settings
+
+
+######################初始化設定######################
+# 主循環裡的各個階段（依照執行順序），HUD 和 CSV 都用這個順序
+PHASES = ('input', 'spawn', 'tornadoes', 'ball', 'stream', 'rewind', 'draw', 'display')
+
+# 關閉計時時共用的空計時器，with 它什麼事都不做
+_NULL_PHASE = contextlib.nullcontext()
+
+
+######################物件類別######################
+class _PhaseTimer:
+    """
+    計算單一階段耗時的計時器（with 區塊開始時記時間，結束時把經過的時間加到這一幀）\n
+    同一幀同一階段可以進入很多次（例如一幀跑了好幾步模擬），時間會加總\n
+    進入時把 profiler.active_phase 設成這個階段，離開時換回外層的階段
+    """
+    __slots__ = ('profiler', 'index', 'name', 'start', 'previous')
+
+    def __init__(self, profiler, index, name):
+        self.profiler = profiler
+        self.index = index
+        self.name = name
+        self.start = 0.0
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = self.profiler.active_phase
+        self.profiler.active_phase = self.name
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.current[self.index] += time.perf_counter() - self.start
+        self.profiler.active_phase = self.previous
+        return False
+
+
+class FrameProfiler:
+    """
+    每幀分段計時器\n
+    \n
+    屬性說明：\n
+    is_enabled: 是否正在計時，False 時 phase() 完全不計時\n
+    is_hud_visible: 是否在畫面上顯示統計\n
+    is_tracking_phase: 取樣分析器正在取樣，就算沒有開計時也要記住目前在哪個階段\n
+    active_phase: 目前所在的階段名稱，不在任何階段時是 None\n
+    hud_status: 統計框最下面多顯示的一行（例如目前的畫面品質），None 表示不顯示\n
+    window: 環狀陣列保留最近幾幀的資料\n
+    samples: 耗時陣列 (window, 階段數 + 1)，單位毫秒，最後一欄是整幀耗時\n
+    frame_count: 總共記錄了幾幀\n
+    \n
+    使用範例:\n
+        profiler = FrameProfiler(enabled=True)\n
+        profiler.begin_frame()\n
+        with profiler.phase('ball'):\n
+            ball.update(...)\n
+        profiler.end_frame()\n
+        p50, p95, p99 = profiler.percentiles('ball')
+    """
+    def __init__(self, enabled=False, window=settings.PROFILE_WINDOW, phases=PHASES):
+        """
+        初始化計時器\n
+        \n
+        參數:\n
+        enabled (bool): 一開始是否就要計時\n
+        window (int): 保留最近幾幀的資料來算百分位數，範圍 > 0\n
+        phases (tuple): 階段名稱，依照執行順序
+        """
+        self.phases = tuple(phases)
+        self.window = max(1, int(window))
+        self.samples = np.zeros((self.window, len(self.phases) + 1), dtype=np.float64)
+        self.current = [0.0] * len(self.phases)
+        self.frame_count = 0
+        self.frame_start = 0.0
+        self.is_enabled = enabled
+        self.is_hud_visible = False
+        self.is_tracking_phase = False
+        self.active_phase = None
+        self.hud_status = None
+        # 每個階段共用一個計時器物件，不用每次 with 都建立新物件
+        self._timers = {name: _PhaseTimer(self, i, name) for i, name in enumerate(self.phases)}
+        self._csv_file = None
+        self._csv_writer = None
+        self._hud_font = None
+        self._hud_surface = None
+        self._hud_refresh_frame = -1
+
+    ######################開關######################
+    def set_enabled(self, enabled):
+        """
+        開始或停止計時\n
+        enabled: True 開始計時，False 停止（已記錄的資料保留）
+        """
+        self.is_enabled = bool(enabled)
+
+    def toggle_hud(self):
+        """
+        切換畫面上的統計顯示，打開顯示時會順便開始計時\n
+        返回值：切換後是否顯示
+        """
+        self.is_hud_visible = not self.is_hud_visible
+        if self.is_hud_visible:
+            self.is_enabled = True
+        return self.is_hud_visible
+
+    ######################計時######################
+    def phase(self, name):
+        """
+        取得某個階段的計時器，用在 with 區塊\n
+        \n
+        參數:\n
+        name (str): 階段名稱，必須在 phases 裡\n
+        \n
+        回傳:\n
+        計時器：開啟（或取樣分析器需要階段）時回傳會計時的物件，關閉時回傳什麼都不做的空計時器
+        """
+        if not (self.is_enabled or self.is_tracking_phase):
+            return _NULL_PHASE
+        return self._timers[name]
+
+    def begin_frame(self):
+        """
+        開始新的一幀，清空這一幀的分段時間
+        """
+        if not self.is_enabled:
+            return
+        self.current = [0.0] * len(self.phases)
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """
+        結束這一幀：把分段時間寫進環狀陣列，有開 CSV 的話也寫一行
+        """
+        if not self.is_enabled:
+            return
+        total = time.perf_counter() - self.frame_start
+        row = self.samples[self.frame_count % self.window]
+        row[:-1] = self.current
+        row[-1] = total
+        row *= 1000.0  # 換成毫秒比較好讀
+        if self._csv_writer is not None:
+            self._csv_writer.writerow([self.frame_count] + [f'{value:.4f}' for value in row])
+        self.frame_count += 1
+
+    ######################統計######################
+    def percentiles(self, name='total', q=(50, 95, 99)):
+        """
+        計算某個階段最近幾幀的耗時百分位數\n
+        \n
+        參數:\n
+        name (str): 階段名稱，'total' 表示整幀\n
+        q (tuple): 要算哪些百分位數\n
+        \n
+        回傳:\n
+        tuple: 各百分位數的耗時（毫秒），還沒有資料時全部是 0
+        """
+        filled = min(self.frame_count, self.window)
+        if filled == 0:
+            return tuple(0.0 for _ in q)
+        column = len(self.phases) if name == 'total' else self.phases.index(name)
+        return tuple(float(v) for v in np.percentile(self.samples[:filled, column], q))
+
+    def summary(self):
+        """
+        所有階段的 p50 / p95 / p99\n
+        返回值：{階段名稱: (p50, p95, p99)}，最後一項是 'total'
+        """
+        return {name: self.percentiles(name) for name in self.phases + ('total',)}
+
+    ######################CSV 輸出######################
+    def open_csv(self, path):
+        """
+        開始把每一幀的耗時寫到 CSV 檔（會順便開始計時）\n
+        \n
+        參數:\n
+        path (str): CSV 檔案路徑，已存在的檔案會被覆蓋\n
+        \n
+        欄位:\n
+        frame, 各階段耗時..., total（單位毫秒）
+        """
+        self.close_csv()
+        self._csv_file = open(path, 'w', newline='', encoding='utf-8')
+        self._csv_writer = csv.writer(self._csv_file)
+        self._csv_writer.writerow(('frame',) + self.phases + ('total',))
+        self.is_enabled = True
+
+    def close_csv(self):
+        """
+        關閉 CSV 檔（沒有開的話什麼都不做）
+        """
+        if self._csv_file is not None:
+            self._csv_file.close()
+        self._csv_file = None
+        self._csv_writer = None
+
+    ######################畫面顯示######################
+    def draw_hud(self, surface, refresh_frames=15):
+        """
+        在畫面左上角畫出各階段的 p50 / p95 / p99\n
+        \n
+        參數:\n
+        surface (pygame.Surface): 要畫上去的畫面\n
+        refresh_frames (int): 每隔幾幀重新計算一次文字，避免數字跳太快又省時間\n
+        \n
+        回傳:\n
+        pygame.Rect: 統計框佔用的範圍（局部更新時要一起送到螢幕），沒顯示時回傳 None
+        """
+        if not self.is_hud_visible:
+            return None
+        if self._hud_surface is None or self.frame_count - self._hud_refresh_frame >= refresh_frames:
+            self._hud_surface = self.render_hud()
+            self._hud_refresh_frame = self.frame_count
+        return surface.blit(self._hud_surface, (4, 4))
+
+    def render_hud(self):
+        """
+        把統計數字畫成一張半透明底色的小圖\n
+        返回值：pygame.Surface
+        """
+        if self._hud_font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            self._hud_font = pygame.font.SysFont('monospace', 13)
+        lines = [f'{"phase":<10}{"p50":>7}{"p95":>7}{"p99":>7}']
+        for name, (p50, p95, p99) in self.summary().items():
+            lines.append(f'{name:<10}{p50:7.2f}{p95:7.2f}{p99:7.2f}')
+        if self.hud_status:
+            lines.append(self.hud_status)
+
+        line_height = self._hud_font.get_linesize()
+        width = max(self._hud_font.size(line)[0] for line in lines) + 8
+        hud = pygame.Surface((width, line_height * len(lines) + 8))
+        hud.fill((20, 20, 20))
+        for i, line in enumerate(lines):
+            hud.blit(self._hud_font.render(line, True, (0, 255, 0)), (4, 4 + i * line_height))
+        return hud
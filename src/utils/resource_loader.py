@@ -3,8 +3,12 @@
 資源載入工具模組
 負責處理遊戲資源（如圖片、音效等）的載入
 """
-import os
-import pygame
+from src.utils.asset_manager import AssetManager
+
+
+######################初始化設定######################
+# 共用的資源管理器，整個遊戲的圖片都從這裡載入，同一張圖只讀一次
+assets = AssetManager()
 
 
 ######################定義函式區######################
@@ -15,18 +19,11 @@ def load_image(path, colorkey=None):
     支援所有 pygame 支援的圖片格式（PNG、JPG、GIF 等）\n
     
     參數說明：\n
-    path: 圖片檔案的路徑（相對或絕對路徑）\n
-    colorkey: 可選的透明色設定，用於處理沒有 alpha 通道的圖片\n
+    path: 圖片檔案的路徑（相對路徑以專案根目錄為起點，不受執行位置影響）\n
+    colorkey: 可選的透明色設定，用於處理沒有 alpha 通道的圖片（-1 表示用左上角像素的顏色）\n
     
     返回值：\n
-    成功時返回 pygame.Surface 物件\n
+    成功時返回 pygame.Surface 物件（有快取，重複載入同一個檔案不會再讀硬碟）\n
     失敗時返回 None（檔案不存在或格式不支援）
     """
-    try:
-        # 載入圖片檔案
-        img = pygame.image.load(path)
-        # 轉換為帶 alpha 通道的格式，提升效能並支援透明度
-        return img.convert_alpha()
-    except Exception:
-        # 如果載入失敗（檔案不存在、格式錯誤等），返回 None
-        return None
+    return assets.load_image(path, colorkey)
@@ -0,0 +1,281 @@
+######################載入套件######################
+"""
+取樣分析模組
+不用重開遊戲、不用 cProfile，玩到一半按 F4 就能開始分析
+- 背景執行緒每秒固定看幾次主執行緒（和模擬執行緒）正在執行哪些函式
+- 每次取樣會記下當時所在的遊戲階段（FrameProfiler 的 input、tornadoes、ball、draw...）
+- 停止時寫出 collapsed stack 格式的文字檔，flamegraph.pl、speedscope、inferno 都能直接讀
+
+只是「偷看」呼叫堆疊，不會在每個函式呼叫時插入計時，被分析的程式幾乎不會變慢，
+試玩時一直開著也沒問題
+
+取樣執行緒要拿到 GIL 才能取樣，被取樣的執行緒不放開 GIL 就只能等：
+- 預設要等到執行緒切換間隔（5 ms）才會輪到，取樣會擠在 display.update、zlib 這些會放開 GIL 的地方
+- 所以取樣期間把切換間隔調短（SAMPLE_PROFILE_SWITCH_INTERVAL），停止時換回原本的值
+- 一個 C 函式本身執行很久又不放開 GIL（例如大張圖的 blit）時還是沒辦法中途取樣，summary() 會印出平均延遲供參考
+"""
+import collections
+import os
+import sys
+import threading
+import time
+from config import settings
+
+
+######################初始化設定######################
+# 專案根目錄，堆疊裡的檔名用相對路徑顯示比較短
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 沒有在任何分段計時裡的取樣，階段記成這個名稱
+OTHER_PHASE = 'other'
+
+
+######################定義函式區######################
+def frame_label(code):
+    """
+    把函式的 code 物件轉成火焰圖上顯示的名稱\n
+    \n
+    參數:\n
+    code: 函式的 code 物件（frame.f_code）\n
+    \n
+    回傳:\n
+    str: 例如 'Ball.update (src/entities/ball.py:120)'，不會包含分號（collapsed 格式的分隔符號）
+    """
+    filename = code.co_filename
+    if filename.startswith(PACKAGE_ROOT):
+        filename = os.path.relpath(filename, PACKAGE_ROOT).replace(os.sep, '/')
+    else:
+        filename = os.path.basename(filename)
+    # Python 3.11 以後有 co_qualname，可以看到是哪個類別的方法
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f'{name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+
+
+######################物件類別######################
+class SamplingProfiler:
+    """
+    取樣分析器：背景執行緒定時取樣其他執行緒的呼叫堆疊\n
+    \n
+    屬性說明：\n
+    hz: 每秒取樣幾次\n
+    max_depth: 每次取樣最多記錄幾層呼叫（從最內層往外算）\n
+    counts: {(執行緒名稱, 階段, code 物件的 tuple（最外層在前）): 次數}\n
+    sample_count: 總共取樣了幾次（每個執行緒各算一次）\n
+    switch_interval: 取樣期間的執行緒切換間隔（秒），None 表示不調整\n
+    lag_total: 每次取樣比預定時間晚了多久的總和（秒），除以取樣輪數就是平均延遲\n
+    \n
+    設計說明:\n
+    - sys._current_frames() 一次拿到所有執行緒目前的 frame，取樣時 GIL 在分析器手上，被取樣的執行緒剛好停在某一行\n
+    - 階段直接讀 FrameProfiler.active_phase，比從函式名稱猜準確；取樣期間會打開 FrameProfiler 的階段追蹤\n
+    - 取樣時只記 code 物件，轉成文字留到寫檔時才做，每次取樣的成本只有走訪一次堆疊\n
+    - 落後太多（例如電腦卡住）就跳過錯過的取樣，不會事後補一堆同樣的堆疊\n
+    \n
+    使用範例:\n
+        sampler = SamplingProfiler(hz=200)\n
+        sampler.add_thread('main', threading.current_thread(), engine.profiler)\n
+        sampler.start()\n
+        ...\n
+        sampler.stop()\n
+        sampler.write_collapsed('profiles/session.folded')
+    """
+    def __init__(self, hz=settings.SAMPLE_PROFILE_HZ, max_depth=settings.SAMPLE_PROFILE_MAX_DEPTH,
+                 switch_interval=settings.SAMPLE_PROFILE_SWITCH_INTERVAL):
+        """
+        建立取樣分析器（還不會開始取樣，要呼叫 start()）\n
+        \n
+        參數:\n
+        hz (float): 每秒取樣幾次，範圍 > 0\n
+        max_depth (int): 每次取樣最多記錄幾層呼叫，範圍 > 0\n
+        switch_interval (float): 取樣期間的執行緒切換間隔（秒），None 表示不調整
+        """
+        if hz <= 0:
+            raise ValueError(f'取樣頻率必須大於 0: {hz}')
+        self.hz = hz
+        self.max_depth = max(1, int(max_depth))
+        self.switch_interval = switch_interval
+        self.counts = collections.Counter()
+        self.sample_count = 0
+        self.tick_count = 0
+        self.lag_total = 0.0
+        self.started_at = None
+        self.elapsed = 0.0
+        # 要取樣的執行緒：[(名稱, threading.Thread, FrameProfiler 或 None), ...]
+        self._targets = []
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._labels = {}
+        self._saved_switch_interval = None
+
+    def add_thread(self, name, thread, frame_profiler=None):
+        """
+        加入要取樣的執行緒（取樣中也可以加，例如模擬執行緒晚一點才啟動）\n
+        \n
+        參數:\n
+        name (str): 火焰圖最底層顯示的執行緒名稱\n
+        thread (threading.Thread): 要取樣的執行緒，還沒啟動的會先略過\n
+        frame_profiler (FrameProfiler): 這條執行緒用的分段計時器，用來知道現在在哪個階段；None 表示不分階段
+        """
+        self._targets.append((name, thread, frame_profiler))
+        if self.is_running and frame_profiler is not None:
+            frame_profiler.is_tracking_phase = True
+
+    @property
+    def is_running(self):
+        """
+        是否正在取樣\n
+        返回值：True 表示背景執行緒正在取樣
+        """
+        return self._thread is not None
+
+    ######################開始和停止######################
+    def start(self):
+        """
+        開始取樣（已經在取樣的話什麼都不做），之前的取樣結果會清掉
+        """
+        if self.is_running:
+            return
+        self.clear()
+        for _, _, frame_profiler in self._targets:
+            if frame_profiler is not None:
+                frame_profiler.is_tracking_phase = True
+        if self.switch_interval is not None:
+            self._saved_switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(min(self.switch_interval, self._saved_switch_interval))
+        self._stop_event.clear()
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        停止取樣並等背景執行緒結束，取樣結果保留到下次 start()
+        """
+        if not self.is_running:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.elapsed = time.perf_counter() - self.started_at
+        if self._saved_switch_interval is not None:
+            sys.setswitchinterval(self._saved_switch_interval)
+            self._saved_switch_interval = None
+        for _, _, frame_profiler in self._targets:
+            if frame_profiler is not None:
+                frame_profiler.is_tracking_phase = False
+
+    def clear(self):
+        """
+        清掉取樣結果
+        """
+        self.counts.clear()
+        self.sample_count = 0
+        self.tick_count = 0
+        self.lag_total = 0.0
+        self.elapsed = 0.0
+
+    def _run(self):
+        """
+        背景執行緒主體：照固定間隔取樣，直到 stop()
+        """
+        interval = 1.0 / self.hz
+        next_time = time.perf_counter() + interval
+        while not self._stop_event.wait(max(0.0, next_time - time.perf_counter())):
+            # wait 回來時已經拿到 GIL，比預定時間晚的部分就是等 GIL 的延遲
+            self.lag_total += max(0.0, time.perf_counter() - next_time)
+            self.tick_count += 1
+            self.sample()
+            next_time += interval
+            now = time.perf_counter()
+            if now - next_time > interval:
+                # 落後超過一次取樣就不追了，從現在重新算
+                next_time = now + interval
+
+    ######################取樣######################
+    def sample(self):
+        """
+        取樣一次：記下每個目標執行緒目前的呼叫堆疊和所在階段\n
+        通常由背景執行緒呼叫，測試時也可以直接呼叫
+        """
+        frames = sys._current_frames()
+        max_depth = self.max_depth
+        for name, thread, frame_profiler in self._targets:
+            frame = frames.get(thread.ident)
+            if frame is None:
+                continue
+            phase = OTHER_PHASE
+            if frame_profiler is not None and frame_profiler.active_phase is not None:
+                phase = frame_profiler.active_phase
+            codes = []
+            while frame is not None and len(codes) < max_depth:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()
+            self.counts[(name, phase, tuple(codes))] += 1
+            self.sample_count += 1
+        # 不要留著其他執行緒的 frame，避免它們的區域變數晚一點才被釋放
+        del frames
+
+    ######################結果######################
+    def _label(self, code):
+        """
+        code 物件轉成名稱（有快取，同一個函式只轉一次）
+        """
+        label = self._labels.get(code)
+        if label is None:
+            label = frame_label(code)
+            self._labels[code] = label
+        return label
+
+    def collapsed_lines(self):
+        """
+        把取樣結果轉成 collapsed stack 格式\n
+        返回值：字串列表，每行是 '執行緒;階段;最外層函式;...;最內層函式 次數'，依次數由多到少排列
+        """
+        merged = collections.Counter()
+        for (name, phase, codes), count in self.counts.items():
+            merged[';'.join([name, phase] + [self._label(code) for code in codes])] += count
+        return [f'{stack} {count}' for stack, count in merged.most_common()]
+
+    def write_collapsed(self, path):
+        """
+        把取樣結果寫成 collapsed stack 檔案（flamegraph.pl、speedscope、inferno 都能讀）\n
+        \n
+        參數:\n
+        path (str): 檔案路徑，資料夾不存在時會自動建立，已存在的檔案會被覆蓋\n
+        \n
+        回傳:\n
+        str: 寫入的檔案路徑
+        """
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for line in self.collapsed_lines():
+                f.write(line + '\n')
+        return path
+
+    def phase_totals(self):
+        """
+        每個階段被取樣到幾次\n
+        返回值：{(執行緒名稱, 階段): 次數}，依次數由多到少排列
+        """
+        totals = collections.Counter()
+        for (name, phase, _), count in self.counts.items():
+            totals[(name, phase)] += count
+        return dict(totals.most_common())
+
+    def summary(self):
+        """
+        取樣結果的簡短文字摘要（停止取樣時印在終端機）\n
+        返回值：多行字串，列出每條執行緒的每個階段佔了幾 %
+        """
+        totals = self.phase_totals()
+        per_thread = collections.Counter()
+        for (name, _), count in totals.items():
+            per_thread[name] += count
+        lag_ms = self.lag_total * 1000.0 / max(1, self.tick_count)
+        lines = [f'取樣 {self.sample_count} 次，{self.elapsed:.1f} 秒，平均延遲 {lag_ms:.2f} ms']
+        for thread_name in per_thread:
+            for (name, phase), count in totals.items():
+                if name == thread_name:
+                    lines.append(f'  {name:<12}{phase:<10}{count * 100.0 / per_thread[name]:6.1f}%')
+        return '\n'.join(lines)
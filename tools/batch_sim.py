@@ -0,0 +1,111 @@
+######################載入套件######################
+"""
+批次模擬工具
+用所有 CPU 核心同時跑很多局不開視窗的遊戲（自動玩家操作），統計每種設定的難度
+
+使用方式:
+    python tools/batch_sim.py --games 1000
+    python tools/batch_sim.py --games 200 --speeds 5,6,8 --tornado 3-6,5-10
+    python tools/batch_sim.py --games 500 --processes 4 --out results.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+# 子行程也會匯入 pygame，不要每個行程都印歡迎訊息
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+# 將專案根目錄加入 Python 路徑，確保可以匯入專案模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.game.batch import GameConfig, BatchSummary, run_batch
+
+
+######################定義函式區######################
+def parse_intervals(text):
+    """
+    解析龍捲風間隔參數，例如 '3-6,5-10'\n
+    返回值：[(3.0, 6.0), (5.0, 10.0)]
+    """
+    intervals = []
+    for part in text.split(','):
+        low, high = part.split('-')
+        intervals.append((float(low), float(high)))
+    return intervals
+
+
+def build_configs(args):
+    """
+    依照命令列參數產生每一局的設定\n
+    每種（球速, 龍捲風間隔）組合都跑 --games 局，種子從 --seed 開始連續編號
+    """
+    speeds = [float(value) for value in args.speeds.split(',')]
+    intervals = parse_intervals(args.tornado)
+    configs = []
+    for speed in speeds:
+        for interval in intervals:
+            for i in range(args.games):
+                configs.append(GameConfig(args.seed + i, ball_speed=speed, tornado_interval=interval,
+                                          max_seconds=args.max_seconds, multiball=args.multiball,
+                                          collision_mode=args.collision))
+    return configs
+
+
+def print_summary(summary):
+    """
+    印出每組設定的統計和整體速度
+    """
+    print(f'\n{"球速":>6}{"龍捲風間隔":>12}{"局數":>8}{"清空率":>9}{"清空秒數 p50":>14}{"p95":>9}'
+          f'{"龍捲風重來":>12}{"掉球":>8}')
+    for (speed, interval), stats in summary.by_group().items():
+        p50 = f'{stats["clear_time_p50"]:.1f}' if 'clear_time_p50' in stats else '-'
+        p95 = f'{stats["clear_time_p95"]:.1f}' if 'clear_time_p95' in stats else '-'
+        print(f'{speed:>6g}{f"{interval[0]:g}-{interval[1]:g}":>12}{stats["games"]:>8}{stats["clear_rate"]:>9.1%}'
+              f'{p50:>14}{p95:>9}{stats["tornado_resets_mean"]:>12.2f}{stats["balls_lost_mean"]:>8.2f}')
+    games_per_second, steps_per_second = summary.throughput()
+    print(f'\n速度: {games_per_second:.2f} 局/秒，{steps_per_second:,.0f} 步/秒')
+
+
+######################主程式######################
+def main():
+    """
+    解析命令列參數、跑批次模擬，結果邊跑邊寫出並在最後印出統計
+    """
+    parser = argparse.ArgumentParser(description='用多個行程同時跑很多局遊戲並統計難度')
+    parser.add_argument('--games', type=int, default=100, help='每種設定跑幾局（預設 100）')
+    parser.add_argument('--seed', type=int, default=0, help='第一局的種子，之後依序加 1')
+    parser.add_argument('--speeds', default='6', help='球速列表，用逗號分隔（預設 6）')
+    parser.add_argument('--tornado', default='5-10', help='龍捲風間隔列表，例如 3-6,5-10（預設 5-10）')
+    parser.add_argument('--max-seconds', type=float, default=600, help='每局最多玩幾秒遊戲時間（預設 600）')
+    parser.add_argument('--multiball', type=int, default=0, help='多球模式額外的球數')
+    parser.add_argument('--collision', choices=('point', 'swept'), default='point', help='碰撞方式')
+    parser.add_argument('--processes', type=int, default=None, help='行程數（預設 CPU 核心數）')
+    parser.add_argument('--out', default=None, help='每局結果逐行寫到這個 JSON Lines 檔')
+    args = parser.parse_args()
+
+    configs = build_configs(args)
+    processes = args.processes or os.cpu_count() or 1
+    print(f'共 {len(configs)} 局，使用 {processes} 個行程')
+
+    summary = BatchSummary()
+    out = open(args.out, 'w', encoding='utf-8') if args.out else None
+    try:
+        for result in run_batch(configs, processes):
+            summary.add(result)
+            if out is not None:
+                out.write(json.dumps(result) + '\n')
+            # 每完成 10% 印一次進度
+            done = len(summary.results)
+            if done % max(1, len(configs) // 10) == 0 or done == len(configs):
+                games_per_second, _ = summary.throughput()
+                print(f'  {done}/{len(configs)} 局完成（{games_per_second:.2f} 局/秒）')
+    finally:
+        if out is not None:
+            out.close()
+
+    print_summary(summary)
+
+
+# 其他工具都直接呼叫 main()，這裡一定要加判斷：macOS 和 Windows 用 spawn 啟動子行程，
+# 每個子行程會用 __mp_main__ 的名字重新執行這個檔案，沒有判斷的話子行程又會跑 main() 建自己的行程池
+if __name__ == '__main__':
+    main()
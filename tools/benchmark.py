@@ -0,0 +1,403 @@
+######################載入套件######################
+"""
+效能基準測試工具
+用 SDL 的 dummy 顯示驅動（不開真的視窗），以固定亂數種子跑一組固定劇本
+量測遊戲最吃時間的幾個地方，輸出 JSON，並和之前存下來的基準結果比較
+
+量測項目:
+- ball_update_<模式>_<磚塊數>: Ball.update 對 50 到 100000 塊磚的牆（point 和 swept 兩種碰撞）
+- brick_draw / tornado_draw / balloon_draw / balloon_emitter_draw: 各種物件的繪圖
+- engine_frame_<繪圖模式>: 完整的 GameEngine 一幀（模擬一步 + 畫圖 + 送出畫面）
+
+使用方式:
+    python tools/benchmark.py                     # 量測並和基準比較（沒有基準就只印結果）
+    python tools/benchmark.py --save-baseline     # 量測並存成新的基準
+    python tools/benchmark.py --filter ball --quick
+    python tools/benchmark.py --out results.json --threshold 0.2
+
+基準檔:
+- 預設是 benchmarks/baseline.json，專案裡沒有附上：數字只跟同一台機器、同一個環境比才有意義
+- 第一次在這台機器上跑之前先執行 python tools/benchmark.py --save-baseline 建立
+- 找不到基準檔時會印出提示和建立它的指令，這次不做比較，結束代碼是 0
+
+比較方式:
+- 每個項目重複量測多次，記錄每次操作微秒數的最小值、中位數和最大值
+- 預設用最小值比較（背景程式只會讓量測變慢、不會變快，最小值最不受干擾），可用 --metric 改成中位數
+- 比基準慢超過 threshold（預設 15%）就算退步，程式結束代碼為 1，方便接在發佈流程裡
+- 虛擬機或共用機器的數字會跳動，請提高 --repeats 或放寬 --threshold
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+# 不開真的視窗，必須在匯入 pygame 之前設定
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+# 將專案根目錄加入 Python 路徑，確保可以匯入專案模組
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import numpy as np
+import pygame
+from config import settings
+from config import colors as game_colors
+from src.entities.ball import Ball
+from src.entities.balloon import Balloon
+from src.entities.balloon_emitter import BalloonEmitter
+from src.entities.brick import Brick
+from src.entities.brick_store import BrickStore
+from src.entities.paddle import Paddle
+from src.entities.tornado import Tornado
+from src.physics.spatial_grid import SpatialGrid
+
+
+######################初始化設定######################
+# 預設的基準檔案位置（每台電腦的數字不同，請在同一台機器上建立和比較）
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, 'benchmarks', 'baseline.json')
+# Ball.update 要量測的磚塊數量
+BRICK_COUNTS = (50, 1000, 10000, 100000)
+# 每次操作的時間固定是這個步長（秒）
+STEP_DT = settings.FIXED_DT
+# 磚塊顏色（和 Simulation.build_bricks 相同，由上到下）
+PALETTE = [(255, 0, 0), (255, 165, 0), (255, 255, 0), (0, 255, 0), (0, 0, 255)]
+
+
+######################場景建立######################
+def build_wall(count, width=settings.WIDTH, height=settings.HEIGHT // 2):
+    """
+    建立一面剛好 count 塊磚的牆，鋪滿場地上半部\n
+    \n
+    參數:\n
+    count (int): 磚塊數量，範圍 > 0\n
+    width, height (int): 牆佔用的範圍\n
+    \n
+    回傳:\n
+    tuple: (磚塊列表, 磚塊倉庫, 空間網格)，和 Simulation 的建立順序相同
+    """
+    # 欄數和列數的比例接近牆的長寬比，磚塊接近原本的 4:1 形狀
+    cols = max(1, int(round((count * width / height / 4) ** 0.5 * 2)))
+    rows = -(-count // cols)
+    brick_width = width / cols
+    brick_height = height / rows
+    bricks = []
+    for i in range(count):
+        row, col = divmod(i, cols)
+        bricks.append(Brick(col * brick_width, row * brick_height, brick_height, brick_width, PALETTE[row % 5]))
+    store = BrickStore.from_bricks(bricks)
+    grid = SpatialGrid(bricks)
+    return bricks, store, grid
+
+
+def scenario_ball_update(count, mode, seed):
+    """
+    Ball.update 對 count 塊磚的牆\n
+    球從底板上方以隨機角度往上發射，掉下去就重新發射，磚塊清到一半就整面恢復\n
+    回傳：執行 n 次操作的函式（每次呼叫都從同樣的狀態開始，做的事情完全一樣）
+    """
+    bricks, store, grid = build_wall(count)
+    paddle = Paddle((settings.WIDTH - 120) // 2, settings.HEIGHT - 50, 15, 120, game_colors.WHITE)
+    ball = Ball(game_colors.WHITE, 12, settings.WIDTH / 2, paddle.y - 12, speed=6)
+    ball.collision_mode = mode
+    half = count // 2
+
+    def run(n):
+        rng = random.Random(seed)
+        store.reset_all()
+        ball.is_launched = False
+        for _ in range(n):
+            if not ball.is_launched:
+                ball.reset_to(rng.uniform(50, settings.WIDTH - 50), paddle.y - 12)
+                ball.launch(-rng.uniform(0.2, 0.8) * np.pi)
+            ball.update(STEP_DT, settings.WIDTH, settings.HEIGHT, paddle, bricks, grid)
+            if store.live_count < half:
+                store.reset_all()
+    return run
+
+
+def scenario_brick_draw(seed):
+    """
+    Brick.draw 畫出原本 5x10 的磚塊牆\n
+    回傳：執行 n 次操作的函式（一次操作 = 整面牆畫一次）
+    """
+    surface = pygame.Surface((settings.WIDTH, settings.HEIGHT))
+    bricks = [Brick(5 + col * 80, 50 + row * 30, 25, 75, PALETTE[row])
+              for row in range(5) for col in range(10)]
+
+    def run(n):
+        for _ in range(n):
+            for brick in bricks:
+                brick.draw(surface)
+    return run
+
+
+def scenario_tornado_draw(seed, count=10):
+    """
+    Tornado.update + Tornado.draw，場上同時有 count 個龍捲風\n
+    回傳：執行 n 次操作的函式（一次操作 = 所有龍捲風移動並畫一次）
+    """
+    random.seed(seed)
+    surface = pygame.Surface((settings.WIDTH, settings.HEIGHT))
+    tornadoes = [Tornado(random.randint(0, settings.WIDTH - 30), random.randint(0, settings.HEIGHT - 80))
+                 for _ in range(count)]
+    start = [(tornado.y, tornado.rotation) for tornado in tornadoes]
+
+    def run(n):
+        # 每次呼叫都從同樣的位置開始
+        for tornado, (y, rotation) in zip(tornadoes, start):
+            tornado.y, tornado.rotation = y, rotation
+        for _ in range(n):
+            for tornado in tornadoes:
+                tornado.update(STEP_DT)
+                if tornado.is_off_screen(settings.HEIGHT):
+                    tornado.y = -80
+                tornado.draw(surface)
+    return run
+
+
+def scenario_balloon_draw(seed, count=settings.BALLOON_CAP):
+    """
+    Balloon.update + Balloon.draw（一個氣球一個物件的舊做法）\n
+    回傳：執行 n 次操作的函式（一次操作 = 所有氣球移動並畫一次）
+    """
+    random.seed(seed)
+    surface = pygame.Surface((settings.WIDTH, settings.HEIGHT))
+    balloons = [Balloon(random.randint(50, settings.WIDTH - 50), random.randint(0, settings.HEIGHT),
+                        (255, 100, 100), random.randint(15, 25)) for _ in range(count)]
+    start = [(balloon.x, balloon.y, balloon.time) for balloon in balloons]
+
+    def run(n):
+        # 每次呼叫都從同樣的位置開始
+        for balloon, (x, y, t) in zip(balloons, start):
+            balloon.x, balloon.y, balloon.time = x, y, t
+        for _ in range(n):
+            for balloon in balloons:
+                balloon.update(STEP_DT)
+                if balloon.is_off_screen():
+                    balloon.y = settings.HEIGHT + 50
+                balloon.draw(surface)
+    return run
+
+
+def scenario_balloon_emitter_draw(seed, count=settings.BALLOON_CAP):
+    """
+    BalloonEmitter.update + draw（遊戲實際使用的陣列式做法）\n
+    回傳：執行 n 次操作的函式（一次操作 = 所有氣球移動並畫一次）
+    """
+    surface = pygame.Surface((settings.WIDTH, settings.HEIGHT))
+    emitter = BalloonEmitter(count)
+
+    def run(n):
+        # 每次呼叫都從空的發射器和同樣的亂數開始
+        rng = random.Random(seed)
+        emitter.clear()
+        for _ in range(n):
+            while len(emitter) < count:
+                emitter.spawn(rng.randint(50, settings.WIDTH - 50), rng.randint(0, settings.HEIGHT),
+                              (255, 100, 100), rng.randint(15, 25), rng=rng)
+            emitter.update(STEP_DT)
+            emitter.draw(surface)
+    return run
+
+
+def scenario_engine_frame(render_mode, seed):
+    """
+    完整的 GameEngine 一幀：模擬一步、畫出所有東西、送出畫面\n
+    底板依照固定劇本左右移動，第一幀發射球\n
+    回傳：執行 n 次操作的函式（一次操作 = 一幀）
+    """
+    # GameEngine 在建立時讀取繪圖模式，建立完就恢復原本設定
+    from src.game.game_engine import GameEngine
+    from src.game.simulation import FrameInput
+    original_mode = settings.RENDER_MODE
+    settings.RENDER_MODE = render_mode
+    try:
+        engine = GameEngine(threaded=False)
+    finally:
+        settings.RENDER_MODE = original_mode
+    sim = engine.sim
+
+    def run(n):
+        # 每次呼叫都從剛開局的狀態和同樣的亂數開始
+        random.seed(seed)
+        sim.restart_game()
+        sim.tornadoes.clear()
+        sim.tornado_spawn_timer = 0
+        inputs = FrameInput(launch=True)
+        for frame in range(n):
+            # 底板用正弦波來回移動，每次執行的劇本都一樣
+            inputs.paddle_x = settings.WIDTH / 2 + 300 * np.sin(frame * 0.05)
+            sim.step(inputs, STEP_DT)
+            inputs.clear_events()
+            engine.draw()
+    return run
+
+
+def build_scenarios(seed):
+    """
+    列出所有量測項目\n
+    返回值：[(名稱, 建立場景的函式, 每次重複要跑幾次操作), ...]\n
+    場景在量測前才建立，用 --filter 略過的項目不會浪費時間建立
+    """
+    scenarios = []
+    for mode in ('point', 'swept'):
+        for count in BRICK_COUNTS:
+            scenarios.append((f'ball_update_{mode}_{count}',
+                              lambda count=count, mode=mode: scenario_ball_update(count, mode, seed), 2000))
+    scenarios.append(('brick_draw', lambda: scenario_brick_draw(seed), 100))
+    scenarios.append(('tornado_draw', lambda: scenario_tornado_draw(seed), 100))
+    scenarios.append(('balloon_draw', lambda: scenario_balloon_draw(seed), 100))
+    scenarios.append(('balloon_emitter_draw', lambda: scenario_balloon_emitter_draw(seed), 100))
+    for render_mode in ('full', 'dirty'):
+        scenarios.append((f'engine_frame_{render_mode}',
+                          lambda render_mode=render_mode: scenario_engine_frame(render_mode, seed), 50))
+    return scenarios
+
+
+######################量測與比較######################
+def measure(run, ops, repeats, warmup=1):
+    """
+    量測一個場景\n
+    \n
+    參數:\n
+    run (callable): 執行 n 次操作的函式\n
+    ops (int): 每次重複跑幾次操作（每次重複做的事情完全一樣）\n
+    repeats (int): 重複幾次\n
+    warmup (int): 正式量測前先跑幾次（讓快取、圖片預先準備好）\n
+    \n
+    回傳:\n
+    dict: median_us、min_us、max_us（每次操作的微秒數）、ops、repeats
+    """
+    for _ in range(warmup):
+        run(ops)
+    per_op = []
+    # 量測時暫停垃圾回收，避免它在隨機的時間點插進來讓數字跳動
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run(ops)
+            per_op.append((time.perf_counter() - start) / ops * 1e6)
+    finally:
+        gc.enable()
+    return {
+        'median_us': round(statistics.median(per_op), 3),
+        'min_us': round(min(per_op), 3),
+        'max_us': round(max(per_op), 3),
+        'ops': ops,
+        'repeats': repeats,
+    }
+
+
+def compare(results, baseline, threshold, metric='min_us'):
+    """
+    和基準結果比較\n
+    \n
+    參數:\n
+    results (dict): 這次的量測結果 {名稱: {...}}\n
+    baseline (dict): 基準的量測結果 {名稱: {...}}\n
+    threshold (float): 允許變慢的比例，例如 0.15 表示慢 15% 以內不算退步\n
+    metric (str): 用哪個數字比較，'min_us' 或 'median_us'\n
+    \n
+    回傳:\n
+    list: 退步的項目名稱
+    """
+    regressions = []
+    print(f'\n{"名稱":<28}{"基準 (us)":>12}{"這次 (us)":>12}{"變化":>10}')
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f'{name:<28}{"-":>12}{result[metric]:>12.2f}{"新項目":>10}')
+            continue
+        ratio = result[metric] / base[metric] - 1 if base[metric] > 0 else 0.0
+        mark = ''
+        if ratio > threshold:
+            regressions.append(name)
+            mark = ' ❌'
+        print(f'{name:<28}{base[metric]:>12.2f}{result[metric]:>12.2f}{ratio:>+10.1%}{mark}')
+    return regressions
+
+
+def environment_info(seed):
+    """
+    記錄量測環境，比較時才知道數字是不是在同一種環境下跑出來的
+    """
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'seed': seed,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+######################主程式######################
+def main():
+    """
+    解析命令列參數，跑所有量測項目，輸出結果並和基準比較
+    """
+    parser = argparse.ArgumentParser(description='Breaking the Block 效能基準測試')
+    parser.add_argument('--seed', type=int, default=1234, help='亂數種子（預設 1234）')
+    parser.add_argument('--repeats', type=int, default=7, help='每個項目重複量測幾次')
+    parser.add_argument('--quick', action='store_true', help='快速模式：重複 3 次、操作數減少')
+    parser.add_argument('--filter', default=None, help='只跑名稱包含這個字串的項目')
+    parser.add_argument('--out', default=None, help='把結果寫到這個 JSON 檔')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基準檔案（預設 benchmarks/baseline.json）')
+    parser.add_argument('--save-baseline', action='store_true', help='把這次的結果存成基準')
+    parser.add_argument('--metric', choices=('min_us', 'median_us'), default='min_us', help='比較時用的數字（預設 min_us）')
+    parser.add_argument('--threshold', type=float, default=0.15, help='變慢超過這個比例就算退步（預設 0.15）')
+    args = parser.parse_args()
+
+    pygame.init()
+    # 圖片轉換需要有顯示畫面，dummy 驅動下也要設定一次
+    pygame.display.set_mode((settings.WIDTH, settings.HEIGHT))
+
+    repeats = 3 if args.quick else args.repeats
+    results = {}
+    for name, setup, ops in build_scenarios(args.seed):
+        if args.filter and args.filter not in name:
+            continue
+        if args.quick:
+            ops = max(1, ops // 5)
+        run = setup()
+        results[name] = measure(run, ops, repeats)
+        print(f'{name:<28}{results[name]["min_us"]:>12.2f}{results[name]["median_us"]:>12.2f} us/op (min / median)')
+
+    report = {'environment': environment_info(args.seed), 'results': results}
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'✅ 結果已寫到 {args.out}')
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f'✅ 基準已存到 {args.baseline}')
+        return
+
+    if not os.path.isfile(args.baseline):
+        # 基準檔不放在專案裡（每台機器的數字不一樣），沒有基準就只印結果，不算退步
+        command = 'python tools/benchmark.py --save-baseline'
+        if os.path.abspath(args.baseline) != DEFAULT_BASELINE:
+            command += f' --baseline {args.baseline}'
+        print(f'\n⚠️  找不到基準檔 {args.baseline}，這次沒有和基準比較（不會檢查是否退步）')
+        print(f'   先在這台機器上執行 {command} 建立基準，之後再跑就會比較')
+        return
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline.get('results', {}), args.threshold, args.metric)
+    if regressions:
+        print(f'\n❌ {len(regressions)} 個項目變慢超過 {args.threshold:.0%}: {", ".join(regressions)}')
+        sys.exit(1)
+    print(f'\n✅ 沒有項目變慢超過 {args.threshold:.0%}')
+
+
+main()
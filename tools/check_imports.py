@@ -14,6 +14,8 @@ from src.entities.brick import Brick
 from src.entities.tornado import Tornado
 from src.entities.balloon import Balloon
 from src.entities.paddle import Paddle
+from src.entities.registry import EntityRegistry
+from src.rendering.quality import QualityController
 
 ######################測試匯入######################
 print('✅ 所有模組匯入成功')
@@ -37,4 +39,28 @@ collision_result = brick.check_collision(15, 15)
 print('碰撞檢測結果:', collision_result)
 print('碰撞後磚塊狀態 is_hit:', brick.is_hit)
 
+######################測試物件池######################
+# 生成、消失再生成，應該拿回同一個物件，舊的 handle 失效
+registry = EntityRegistry()
+tornadoes = registry.pool(Tornado)
+first = tornadoes.spawn(0, 0)
+old_handle = first.handle
+tornadoes.despawn(first)
+tornadoes.compact()
+second = tornadoes.spawn(10, 20)
+print('物件池回收再利用:', second is first, '舊 handle 失效:', registry.get(old_handle) is None)
+# 消失後還沒 compact() 就生成：不能拿回還在 active 裡的物件，整理後數量要對
+tornadoes.despawn(second)
+third = tornadoes.spawn(30, 40)
+tornadoes.compact()
+print('compact 前不重用消失的物件:', third is not second, '整理後數量正確:',
+      len(tornadoes) == len(tornadoes.active) == 1)
+
+######################測試畫面品質######################
+# 最近幾幀都超過預算，應該降一級
+quality = QualityController(budget_ms=10.0, window=4, check_interval=1)
+quality.samples[:] = 20.0
+quality.frame_count = quality.window
+print('耗時超過預算時降級:', quality.evaluate(), quality.name)
+
 print('🎉 所有基本功能測試完成')
@@ -0,0 +1,140 @@
+######################載入套件######################
+"""
+關卡檔工具
+在 JSON 原始檔和二進位關卡檔（.btbl）之間轉換，並檢查關卡內容是否合理
+
+使用方式:
+    python tools/level_tool.py compile levels/classic.json levels/classic.btbl
+    python tools/level_tool.py decompile levels/classic.btbl classic_out.json
+    python tools/level_tool.py validate levels/classic.json
+    python tools/level_tool.py info huge.btbl
+    python tools/level_tool.py generate 200000 huge.btbl   # 產生大型測試關卡
+    python tools/level_tool.py generate 200000 tall.btbl --height 60000   # 產生捲動關卡
+"""
+import argparse
+import os
+import sys
+import time
+# 將專案根目錄加入 Python 路徑，確保可以匯入專案模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from src.game.level import Level, generate_grid_level
+
+
+######################定義函式區######################
+def report_problems(level, check_overlap=True):
+    """
+    檢查關卡並印出問題\n
+    \n
+    參數:\n
+    level (Level): 要檢查的關卡\n
+    check_overlap (bool): 是否檢查磚塊互相重疊\n
+    \n
+    回傳:\n
+    bool: True 表示沒有問題
+    """
+    problems = level.validate(check_overlap)
+    for problem in problems:
+        print(f'❌ {problem}')
+    return not problems
+
+
+def print_info(level, path, load_seconds):
+    """
+    印出關卡的基本資料\n
+    \n
+    參數:\n
+    level (Level): 關卡\n
+    path (str): 檔案路徑\n
+    load_seconds (float): 載入花了幾秒
+    """
+    print(f'關卡: {level.name or "(沒有名稱)"}（{path}）')
+    print(f'場地: {level.width}x{level.height}，磚塊 {level.count:,} 塊，載入 {load_seconds * 1000:.1f} ms')
+    if level.count:
+        print(f'耐久度: {int(level.hit_points.min())}-{int(level.hit_points.max())}，'
+              f'總共要撞 {int(level.hit_points.sum(dtype="int64")):,} 次')
+    print(f'檔案大小: {os.path.getsize(path):,} 位元組')
+
+
+######################主程式######################
+def main():
+    """
+    解析子命令並執行，檢查失敗時結束代碼為 1
+    """
+    parser = argparse.ArgumentParser(description='關卡檔轉換和檢查工具')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = commands.add_parser('compile', help='把 JSON 原始檔轉成二進位關卡檔')
+    compile_parser.add_argument('source', help='JSON 原始檔')
+    compile_parser.add_argument('out', help='輸出的二進位關卡檔（.btbl）')
+    compile_parser.add_argument('--force', action='store_true', help='檢查有問題也照樣輸出')
+
+    decompile_parser = commands.add_parser('decompile', help='把二進位關卡檔轉回 JSON（每塊磚逐一列出）')
+    decompile_parser.add_argument('source', help='二進位關卡檔')
+    decompile_parser.add_argument('out', help='輸出的 JSON 檔')
+
+    validate_parser = commands.add_parser('validate', help='檢查關卡內容')
+    validate_parser.add_argument('paths', nargs='+', help='關卡檔（.json 或 .btbl）')
+    validate_parser.add_argument('--no-overlap', action='store_true', help='不檢查磚塊重疊（磚塊很多時比較快）')
+
+    info_parser = commands.add_parser('info', help='印出關卡的基本資料')
+    info_parser.add_argument('path', help='關卡檔（.json 或 .btbl）')
+
+    generate_parser = commands.add_parser('generate', help='產生規則排列的大型關卡（效能測試用）')
+    generate_parser.add_argument('count', type=int, help='磚塊數量')
+    generate_parser.add_argument('out', help='輸出路徑（.json 或 .btbl）')
+    generate_parser.add_argument('--width', type=int, default=settings.WIDTH, help='場地寬度')
+    generate_parser.add_argument('--height', type=int, default=settings.HEIGHT,
+                                 help='場地高度，比視窗高就是捲動關卡')
+    generate_parser.add_argument('--fill-height', type=int, default=None,
+                                 help='磚塊牆佔用的高度，預設一般關卡是上半部、捲動關卡留最後半個畫面給底板')
+    args = parser.parse_args()
+
+    if args.command == 'compile':
+        level = Level.load(args.source)
+        if not report_problems(level) and not args.force:
+            print('關卡有問題，沒有輸出（加上 --force 可以強制輸出）')
+            sys.exit(1)
+        level.save_binary(args.out)
+        print(f'✅ 已寫出 {args.out}（{level.count:,} 塊磚，{os.path.getsize(args.out):,} 位元組）')
+
+    elif args.command == 'decompile':
+        level = Level.load(args.source)
+        level.save_json(args.out)
+        print(f'✅ 已寫出 {args.out}（{level.count:,} 塊磚）')
+
+    elif args.command == 'validate':
+        is_ok = True
+        for path in args.paths:
+            try:
+                level = Level.load(path)
+            except (OSError, ValueError) as e:
+                print(f'❌ {path}: {e}')
+                is_ok = False
+                continue
+            if report_problems(level, not args.no_overlap):
+                print(f'✅ {path}: {level.count:,} 塊磚，沒有問題')
+            else:
+                is_ok = False
+        if not is_ok:
+            sys.exit(1)
+
+    elif args.command == 'info':
+        start = time.perf_counter()
+        level = Level.load(args.path)
+        print_info(level, args.path, time.perf_counter() - start)
+
+    elif args.command == 'generate':
+        fill_height = args.fill_height
+        if fill_height is None and args.height > settings.HEIGHT:
+            fill_height = args.height - settings.HEIGHT // 2
+        level = generate_grid_level(args.count, args.width, args.height, fill_height)
+        if args.out.lower().endswith('.json'):
+            level.save_json(args.out)
+        else:
+            level.save_binary(args.out)
+        print(f'✅ 已寫出 {args.out}（{level.count:,} 塊磚，{os.path.getsize(args.out):,} 位元組）')
+
+
+main()
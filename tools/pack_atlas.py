@@ -0,0 +1,58 @@
+######################載入套件######################
+"""
+圖集打包工具
+把 settings.ASSET_MANIFEST 上的圖片打包成一張圖集，遊戲啟動時只要讀一個檔案
+每個名稱使用第一個存在的候選路徑，找不到的名稱會略過並列出來
+
+使用方式:
+    python tools/pack_atlas.py
+    python tools/pack_atlas.py --out assets/atlas.png --index assets/atlas.json
+"""
+import argparse
+import os
+import sys
+# 將專案根目錄加入 Python 路徑，確保可以匯入專案模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from config import settings
+from src.utils.asset_manager import AssetManager, pack_atlas
+
+
+######################主程式######################
+def main():
+    """
+    讀取資源清單、載入圖片並寫出圖集和索引檔
+    """
+    parser = argparse.ArgumentParser(description='把資源清單上的圖片打包成圖集')
+    parser.add_argument('--index', default=settings.ASSET_ATLAS_INDEX, help='索引檔輸出路徑（JSON）')
+    parser.add_argument('--out', default=None, help='圖集圖片輸出路徑（PNG），預設和索引檔同名')
+    parser.add_argument('--padding', type=int, default=1, help='小圖之間的空隙（像素）')
+    args = parser.parse_args()
+
+    # 不需要真的開視窗，只是載入和存檔
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.init()
+
+    assets = AssetManager(manifest=settings.ASSET_MANIFEST)
+    images = {}
+    for name in assets.manifest:
+        image = assets.get(name)
+        if image is None:
+            print(f'⚠️  找不到 {name}，略過（候選路徑: {assets.manifest[name]}）')
+        else:
+            images[name] = image
+
+    if not images:
+        print('❌ 清單上沒有任何圖片可以打包')
+        sys.exit(1)
+
+    index_path = assets.resolve(args.index)
+    image_path = assets.resolve(args.out) if args.out else os.path.splitext(index_path)[0] + '.png'
+    rects = pack_atlas(images, image_path, index_path, padding=args.padding)
+    for name, rect in rects.items():
+        print(f'{name}: {rect}')
+    print(f'✅ 已寫出 {image_path} 和 {index_path}（{len(rects)} 張圖片）')
+
+
+main()
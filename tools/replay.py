@@ -0,0 +1,91 @@
+######################載入套件######################
+"""
+錄製檔重播工具
+不開視窗、不限制幀率，全速重播用 `python main.py --record` 錄下來的一局
+重播時會比對每個檢查點的狀態雜湊值，確認結果和錄製時一模一樣
+同一個錄製檔每次跑的工作量都一樣，也可以拿來當效能測試劇本
+
+使用方式:
+    python tools/replay.py game.btbr              # 只跑模擬並驗證
+    python tools/replay.py game.btbr --render     # 連畫圖一起跑（SDL dummy 驅動，不開視窗）
+    python tools/replay.py game.btbr --repeat 5   # 重複 5 次，印出最快和平均速度
+"""
+import argparse
+import os
+import sys
+# 不開真的視窗，必須在匯入 pygame 之前設定
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+# 將專案根目錄加入 Python 路徑，確保可以匯入專案模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.game.replay import Recording, replay
+
+
+######################定義函式區######################
+def run_once(recording, is_render, verify):
+    """
+    重播一次\n
+    \n
+    參數:\n
+    recording (Recording): 錄製結果\n
+    is_render (bool): 是否每一步都畫一次畫面（用完整的 GameEngine 繪圖流程）\n
+    verify (bool): 是否比對檢查點\n
+    \n
+    回傳:\n
+    ReplayResult: 重播結果
+    """
+    if not is_render:
+        return replay(recording, verify)
+
+    # 畫圖模式：建立完整的遊戲引擎，再把模擬核心換成照錄製設定建立的那一個
+    from src.game.game_engine import GameEngine
+    from src.rendering.brick_layer import BrickLayer
+    from src.rendering.dirty_renderer import DirtyRectRenderer
+    engine = GameEngine(threaded=False)
+    sim = recording.build_simulation()
+    sim.profiler = engine.profiler
+    sim.ball.image = engine.sim.ball.image
+    sim.balls.image = engine.sim.balls.image
+    engine.sim = sim
+    engine.brick_layer = BrickLayer(sim.bricks, engine.screen.get_size(), sim.brick_grid)
+    if engine.dirty_renderer is not None:
+        engine.dirty_renderer = DirtyRectRenderer(engine.screen, engine.brick_layer, engine.dirty_renderer.max_rects)
+    return replay(recording, verify, sim=sim, on_step=lambda _sim: engine.draw())
+
+
+######################主程式######################
+def main():
+    """
+    解析命令列參數、重播錄製檔並印出結果\n
+    驗證失敗時結束代碼為 1
+    """
+    parser = argparse.ArgumentParser(description='全速重播錄製檔並驗證每一步的狀態')
+    parser.add_argument('path', help='錄製檔路徑')
+    parser.add_argument('--render', action='store_true', help='每一步都畫圖（不開視窗）')
+    parser.add_argument('--no-verify', action='store_true', help='不比對檢查點，只量速度')
+    parser.add_argument('--repeat', type=int, default=1, help='重複重播幾次')
+    args = parser.parse_args()
+
+    recording = Recording.load(args.path)
+    header = recording.header
+    print(f"錄製檔: {args.path}（種子 {header['seed']}，{len(recording.inputs)} 步，"
+          f"{len(recording.checkpoints)} 個檢查點）")
+
+    speeds = []
+    for i in range(max(1, args.repeat)):
+        result = run_once(recording, args.render, not args.no_verify)
+        speeds.append(result.steps_per_second)
+        if not result.is_match:
+            print(f"❌ 第 {result.mismatch_step} 步的狀態和錄製時不一樣")
+            sys.exit(1)
+        print(f"第 {i + 1} 次: {result.steps} 步，{result.elapsed:.3f} 秒，"
+              f"{result.steps_per_second:,.0f} 步/秒，比對 {result.checked} 個檢查點")
+
+    if len(speeds) > 1:
+        print(f"最快 {max(speeds):,.0f} 步/秒，平均 {sum(speeds) / len(speeds):,.0f} 步/秒")
+    if not args.no_verify:
+        print(f"✅ 所有檢查點都吻合（最後狀態 {result.final_hash}）")
+
+
+main()
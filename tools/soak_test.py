@@ -0,0 +1,131 @@
+######################載入套件######################
+"""
+記憶體耐久測試工具
+不開視窗，讓自動玩家玩很久，確認穩定狀態下每一幀幾乎不配置新的記憶體
+- 先跑一段暖身（倒轉記錄填滿、物件池長到夠用），之後才開始追蹤（tracemalloc 在暖身前就打開）
+- 平均每幀淨增加超過預算（有東西越積越多），或每幀暫時用掉的記憶體 p99 超過預算，就算失敗
+- 失敗時程式結束代碼為 1，方便接在發佈流程裡
+
+使用方式:
+    python tools/soak_test.py                         # 只跑模擬核心
+    python tools/soak_test.py --render                # 連畫圖、倒轉記錄一起跑（完整的 GameEngine 一幀）
+    python tools/soak_test.py --frames 36000 --level levels/tower.json
+    python tools/soak_test.py --budget-bytes 0 --budget-peak 4096
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+# 不開真的視窗，必須在匯入 pygame 之前設定
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+# 將專案根目錄加入 Python 路徑，確保可以匯入專案模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from src.game.autopilot import Autopilot
+from src.game.simulation import Simulation
+from src.utils.alloc_tracker import AllocationTracker
+from src.utils.resource_loader import assets
+
+
+######################定義函式區######################
+def build_step(seed, level_path, is_render):
+    """
+    建立「跑一幀」的函式\n
+    \n
+    參數:\n
+    seed (int): 模擬和自動玩家的亂數種子\n
+    level_path (str): 關卡檔路徑，None 表示用內建的磚塊牆\n
+    is_render (bool): True 用完整的 GameEngine（模擬一步、記倒轉、畫圖、送出畫面），False 只跑模擬核心\n
+    \n
+    回傳:\n
+    callable: 沒有參數，每呼叫一次跑一幀
+    """
+    pilot = Autopilot(seed=seed)
+    if not is_render:
+        if level_path is not None:
+            level_path = assets.resolve(level_path)
+        sim = Simulation(settings.WIDTH, settings.HEIGHT, seed=seed, level=level_path)
+        return lambda: sim.step(pilot.next_input(sim), settings.FIXED_DT)
+
+    from src.game.game_engine import GameEngine
+    engine = GameEngine(seed=seed, level_path=level_path, threaded=False)
+
+    def step():
+        engine.advance(pilot.next_input(engine.sim))
+        engine.draw(0.5)
+    return step
+
+
+def main():
+    """
+    執行耐久測試：暖身、追蹤、和預算比較\n
+    \n
+    命令列參數:\n
+    --frames 數字: 追蹤幾幀（預設 3600，約 1 分鐘遊戲時間）\n
+    --warmup 數字: 開始追蹤之前先跑幾幀（預設 1800）\n
+    --seed 數字: 亂數種子\n
+    --level 檔案: 關卡檔\n
+    --render: 連畫圖一起跑\n
+    --budget-bytes 數字: 平均每幀淨增加的預算（位元組）\n
+    --budget-peak 數字: 每幀暫時用掉的記憶體 p99 預算（位元組）
+    """
+    parser = argparse.ArgumentParser(description='長時間自動遊玩，檢查每幀的記憶體配置有沒有超過預算')
+    parser.add_argument('--frames', type=int, default=3600, help='追蹤幾幀（預設 3600）')
+    parser.add_argument('--warmup', type=int, default=1800, help='開始追蹤之前先跑幾幀（預設 1800）')
+    parser.add_argument('--seed', type=int, default=1, help='亂數種子（預設 1）')
+    parser.add_argument('--level', metavar='PATH', default=settings.LEVEL_PATH, help='關卡檔（.json 或 .btbl）')
+    parser.add_argument('--render', action='store_true', help='連畫圖一起跑（不開視窗）')
+    parser.add_argument('--budget-bytes', type=float, default=settings.ALLOC_BUDGET_BYTES_PER_FRAME,
+                        help='平均每幀淨增加的預算（位元組）')
+    parser.add_argument('--budget-peak', type=float, default=settings.ALLOC_BUDGET_PEAK_BYTES,
+                        help='每幀暫時用掉的記憶體 p99 預算（位元組）')
+    args = parser.parse_args()
+
+    # 命令列給的關卡路徑以目前所在的資料夾為準
+    level_path = args.level
+    if level_path is not None and level_path != settings.LEVEL_PATH:
+        level_path = os.path.abspath(level_path)
+    # 先打開 tracemalloc 再建立遊戲和暖身：暖身時配置、之後才被換掉的資料（例如倒轉記錄）也要有記錄，
+    # 不然釋放時不會扣掉，看起來就像記憶體一直在增加
+    tracemalloc.start(settings.ALLOC_TRACE_DEPTH)
+    step = build_step(args.seed, level_path, args.render)
+
+    print(f"暖身 {args.warmup} 幀...")
+    for _ in range(args.warmup):
+        step()
+
+    # 暖身時的快照可能要很久才比較一次，整段追蹤只在最後比較一次就好
+    tracker = AllocationTracker(window=max(1, args.frames), snapshot_interval=max(1, args.frames))
+    tracker.start()
+    start = time.perf_counter()
+    for _ in range(args.frames):
+        tracker.begin_frame()
+        step()
+        tracker.end_frame()
+    elapsed = time.perf_counter() - start
+    tracker.stop()
+    tracemalloc.stop()
+
+    print(f"追蹤 {tracker.frame_count} 幀，{elapsed:.1f} 秒（開著 tracemalloc 會比平常慢很多）")
+    print(tracker.report())
+
+    net = tracker.net_bytes_per_frame()
+    peak = tracker.percentiles('peak_bytes', (99,))[0]
+    is_ok = True
+    if net > args.budget_bytes:
+        print(f"❌ 平均每幀淨增加 {net:,.1f} 位元組，超過預算 {args.budget_bytes:,.0f}")
+        is_ok = False
+    if peak > args.budget_peak:
+        print(f"❌ 每幀暫時用掉的記憶體 p99 {peak:,.0f} 位元組，超過預算 {args.budget_peak:,.0f}")
+        is_ok = False
+    if not is_ok:
+        sys.exit(1)
+    print(f"✅ 在預算內（每幀淨增加 {net:,.1f} / {args.budget_bytes:,.0f} 位元組，"
+          f"暫時用掉 p99 {peak:,.0f} / {args.budget_peak:,.0f} 位元組）")
+
+
+######################主程式######################
+main()